@@ -0,0 +1,177 @@
+""" Single-pass evaluation of a batch of find_parent() / find_parents() filters.
+
+    find_parents_many(element, filters) returns what [element.find_parents(name, attrs, limit)
+    for name, attrs in filters] returns, but walks the ancestor chain once. Ancestors are grouped
+    by their (name, prefix, attributes) signature and every filter is matched once per distinct
+    signature, since a name / attrs filter only looks at those; deep chains repeat a handful of
+    signatures (div.wrapper_div / p.wrapper in the fixtures), so most ancestors cost a dict lookup.
+    Filters holding a function are matched per ancestor, as the function sees the tag itself.
+    A handful of find_parent filters that all match within a few levels gains nothing: the
+    separate calls stop as early, and the batch pays for the signatures.
+
+    The benchmark compares one batch call with N separate calls, for growing N and depth, on the
+    deep documents of BenchFindParents, and asserts that the results are the same elements.
+
+    Usage: python AncestorBatch.py --depths 10 100 1000 --sizes 1 4 16 64
+"""
+import argparse
+import re
+import unittest
+import bs4
+from bs4.element import ResultSet, SoupStrainer
+
+from BenchFindParents import best_of, deep_soup
+from FilterSpaces import EMPTY_FILTERS, PARENTS_NAME_FILTERS_MATCH, PARENTS_NAME_FILTERS_NOT_EXIST, START_TAG_NAMES
+
+
+ATTRS_FILTERS = [{}, {"class": "wrapper_div"}, {"class": "wrapper_div_2"}, {"class": "class_not_exits"}]
+
+# every name filter of TestFindParents / TestFindParent with every attrs filter they use
+FILTERS = [(name, attrs) for attrs in ATTRS_FILTERS
+           for name in PARENTS_NAME_FILTERS_MATCH + PARENTS_NAME_FILTERS_NOT_EXIST + EMPTY_FILTERS]
+
+
+# below this many filters, matching each one per ancestor is cheaper than building signatures
+MEMO_MIN_FILTERS = 4
+
+
+def signature(tag):
+    """ Everything a non-function name / attrs filter can look at (attribute order included, which
+        only costs a few extra keys). """
+    return tag.name, tag.prefix, tuple((k, tuple(v) if isinstance(v, list) else v) for k, v in tag.attrs.items())
+
+
+def uses_function(strainer):
+    """ Whether the strainer looks past signature(): a function filter, or a string filter (a
+        SoupStrainer(string=...) passed as a name also checks each ancestor's .string). """
+    if strainer.string is not None:
+        return True
+    values = [strainer.name] + list(strainer.attrs.values())
+    return any(callable(v) and not isinstance(v, re.Pattern) for v in values)
+
+
+def find_parents_many(element, filters, limit=None):
+    """ [element.find_parents(name, attrs, limit) for name, attrs in filters], in one walk. """
+    if len(filters) == 1:
+        name, attrs = filters[0]
+        return [element.find_parents(name, attrs, limit)]
+    strainers = [name if isinstance(name, SoupStrainer) else SoupStrainer(name, attrs) for name, attrs in filters]
+    if len(strainers) < MEMO_MIN_FILTERS:
+        per_tag, memoised = list(range(len(strainers))), []
+    else:
+        per_tag = [i for i, s in enumerate(strainers) if uses_function(s)]
+        memoised = [i for i, s in enumerate(strainers) if not uses_function(s)]
+    results = [[] for _ in strainers]
+    open_ = set(range(len(strainers)))
+    seen = {}           # signature -> indices of the memoised filters that match it
+    for p in element.parents:
+        if limit and not open_:
+            break
+        if memoised:
+            key = signature(p)
+            matched = seen.get(key)
+            if matched is None:
+                matched = seen[key] = [i for i in memoised if strainers[i].search(p)]
+        else:
+            matched = []
+        for i in matched:
+            if i in open_:
+                results[i].append(p)
+        for i in per_tag:
+            if i in open_ and strainers[i].search(p):
+                results[i].append(p)
+        if limit:
+            open_.difference_update([i for i in matched + per_tag if len(results[i]) >= limit])
+    return [ResultSet(s, r) for s, r in zip(strainers, results)]
+
+
+def find_parent_many(element, filters):
+    """ [element.find_parent(name, attrs) for name, attrs in filters], in one walk. """
+    return [r[0] if r else None for r in find_parents_many(element, filters, limit=1)]
+
+
+def separate_calls(element, filters, method):
+    return [getattr(element, method)(name, attrs) for name, attrs in filters]
+
+
+def batch_call(element, filters, method):
+    return (find_parent_many if method == "find_parent" else find_parents_many)(element, filters)
+
+
+def same(r1, r2):
+    def ids(r):
+        return [None if e is None else (id(e) if not isinstance(e, list) else [id(x) for x in e]) for e in r]
+    return ids(r1) == ids(r2)
+
+
+def bench(depths, sizes, repeat):
+    """ Yield (method, depth, n, separate ns, batch ns). """
+    for depth in depths:
+        soup = deep_soup(depth)
+        element = soup.find(string=START_TAG_NAMES[0])
+        for n in sizes:
+            filters = [FILTERS[i % len(FILTERS)] for i in range(n)]
+            for method in ["find_parent", "find_parents"]:
+                separate_ns, r_separate = best_of(lambda: separate_calls(element, filters, method), repeat)
+                batch_ns, r_batch = best_of(lambda: batch_call(element, filters, method), repeat)
+                assert same(r_separate, r_batch), (method, depth, n)
+                yield method, depth, n, separate_ns, batch_ns
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--depths", nargs="+", type=int, default=[10, 100, 1000])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1, 4, 16, 64], help="filters per batch")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+    header = "%-14s %7s %5s %14s %12s %9s" % ("method", "depth", "N", "separate_us", "batch_us", "speedup")
+    print(header)
+    print("-" * len(header))
+    for method, depth, n, separate_ns, batch_ns in bench(args.depths, args.sizes, args.repeat):
+        print("%-14s %7d %5d %14.1f %12.1f %8.2fx" % (method, depth, n, separate_ns / 1e3, batch_ns / 1e3,
+                                                      separate_ns / batch_ns))
+
+
+class TestAncestorBatch(unittest.TestCase):
+    """ A batch gives the same elements as separate calls, on the fixture and on deep documents. """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        import FindParents
+        FindParents.TestFindParents.setUpClass()
+        cls.test_html_page_element = FindParents.TestFindParents.test_html_page_element
+
+    def test_fixture(self):
+        for start in START_TAG_NAMES:
+            tag = self.test_html_page_element.find(string=start)
+            for method in ["find_parent", "find_parents"]:
+                self.assertTrue(same(separate_calls(tag, FILTERS, method), batch_call(tag, FILTERS, method)), method)
+            for n in [1, 2, len(FILTERS)]:
+                for limit in [1, 2, 3]:
+                    r = find_parents_many(tag, FILTERS[:n], limit)
+                    self.assertTrue(same(r, [tag.find_parents(name, attrs, limit) for name, attrs in FILTERS[:n]]), limit)
+
+    def test_function_filters(self):
+        tag = deep_soup(20).find(string="Lacie")
+        filters = [(lambda t: t.name == "div", {}), ("p", {"class": lambda v: v == "wrapper"}), ("div", {}),
+                   (["p", "div"], {"class": "wrapper_div"}), (True, {})]
+        for method in ["find_parent", "find_parents"]:
+            self.assertTrue(same(separate_calls(tag, filters, method), batch_call(tag, filters, method)), method)
+
+    def test_string_strainers(self):
+        # the inner div's .string is "Lacie" (through <b>), the outer div's is None: same signature
+        soup = bs4.BeautifulSoup("<div><div><b>Lacie</b></div><i>x</i></div>", "html.parser")
+        tag = soup.find(string="Lacie")
+        filters = [(SoupStrainer("div", string="Lacie"), {}), (SoupStrainer("div", string=lambda s: s is None), {}),
+                   ("div", {}), ("b", {}), (True, {})]
+        self.assertGreaterEqual(len(filters), MEMO_MIN_FILTERS)
+        for method in ["find_parent", "find_parents"]:
+            self.assertTrue(same(separate_calls(tag, filters, method), batch_call(tag, filters, method)), method)
+        self.assertEqual(len(find_parents_many(tag, filters)[0]), 1)
+
+    def test_bench_asserts(self):
+        self.assertEqual(len(list(bench([30], [1, 8], 1))), 4)
+
+
+if __name__ == '__main__':
+    main()
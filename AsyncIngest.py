@@ -0,0 +1,243 @@
+""" asyncio ingestion pipeline: read, parse and query a corpus with bounded queues.
+
+    Three stages, each a group of coroutines, joined by asyncio.Queues of --queue-size:
+
+        read    loop.run_in_executor on an I/O thread pool (the event loop never blocks on disk)
+                -> raw queue
+        parse   bs4.BeautifulSoup(markup, "html.parser") on a parse thread pool
+                -> soup queue
+        query   CorpusPipeline.run_queries (the testcase find_* patterns) on a query thread
+
+    A full queue makes the stage before it wait (backpressure), so at most about
+    2 * queue-size + concurrency documents are held at once. Per document the pipeline records
+    each stage's service time and the time it waited in the queue in front of that stage (for
+    read, the list of paths, all queued at the start); a sampler records both queue depths
+    every --sample-interval seconds. The report prints
+    p50 / p90 / p99 / max per stage and the depth timeline: a stage whose input queue stays
+    full is the bottleneck, one whose input stays empty is starved.
+
+    Parsing stays on threads: a parsed tree does not survive pickling back from a process pool
+    (its next_element chain recurses past the recursion limit), so parsing on several cores means
+    parsing and querying in the same process, which CorpusPipeline.py does.
+
+    Usage: python AsyncIngest.py --corpus DIR --readers 4 --parsers 2 --queriers 1 --queue-size 8
+           python AsyncIngest.py --documents 100 --stories 200     (generates a temporary corpus)
+"""
+import argparse
+import asyncio
+import collections
+import math
+import os
+import sys
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import bs4
+
+import Corpus
+from CorpusPipeline import QUERIES, expected_totals, run_queries
+
+
+STAGES = ["read", "parse", "query"]
+_DONE = None
+
+
+def read_file(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def parse(markup):
+    return bs4.BeautifulSoup(markup, "html.parser")
+
+
+def percentile(values, q):
+    """ q-th percentile (0-100) by nearest rank. """
+    values = sorted(values)
+    if not values:
+        return float("nan")
+    return values[max(0, math.ceil(q / 100.0 * len(values)) - 1)]
+
+
+class Stats(object):
+
+    def __init__(self):
+        self.service = collections.defaultdict(list)    # stage -> seconds per document
+        self.wait = collections.defaultdict(list)       # stage -> seconds queued before the stage
+        self.depth = []                                 # (t, raw queue size, soup queue size)
+        self.totals = collections.Counter()
+        self.documents = 0
+        self.bytes = 0
+
+
+async def ingest(paths, queries, readers=4, parsers=2, queriers=1, queue_size=8,
+                 sample_interval=0.05):
+    """ Run the pipeline over paths; return its Stats and the wall time. """
+    loop = asyncio.get_running_loop()
+    stats = Stats()
+    todo = asyncio.Queue()
+    for path in paths:
+        todo.put_nowait(path)
+    raw = asyncio.Queue(maxsize=queue_size)
+    soups = asyncio.Queue(maxsize=queue_size)
+    io_pool = ThreadPoolExecutor(max_workers=readers)
+    parse_pool = ThreadPoolExecutor(max_workers=parsers)
+    query_pool = ThreadPoolExecutor(max_workers=queriers)
+    t_start = time.perf_counter()
+
+    async def timed(stage, pool, fn, *args):
+        t0 = time.perf_counter()
+        r = await loop.run_in_executor(pool, fn, *args)
+        stats.service[stage].append(time.perf_counter() - t0)
+        return r
+
+    async def reader():
+        while not todo.empty():
+            path = todo.get_nowait()
+            stats.wait["read"].append(time.perf_counter() - t_start)
+            markup = await timed("read", io_pool, read_file, path)
+            await raw.put((markup, time.perf_counter()))
+
+    async def parser():
+        while True:
+            item = await raw.get()
+            if item is _DONE:
+                return
+            markup, queued = item
+            stats.wait["parse"].append(time.perf_counter() - queued)
+            soup = await timed("parse", parse_pool, parse, markup)
+            stats.bytes += len(markup.encode("utf-8"))
+            await soups.put((soup, time.perf_counter()))
+
+    async def querier():
+        while True:
+            item = await soups.get()
+            if item is _DONE:
+                return
+            soup, queued = item
+            stats.wait["query"].append(time.perf_counter() - queued)
+            counts = await timed("query", query_pool, run_queries, soup, queries)
+            stats.totals.update(counts)
+            stats.documents += 1
+
+    async def stage(workers, n, done_queue, consumers):
+        """ Run n workers; once all have finished, tell the next stage's consumers. """
+        await asyncio.gather(*[workers() for _ in range(n)])
+        for _ in range(consumers):
+            await done_queue.put(_DONE)
+
+    async def sampler():
+        while True:
+            stats.depth.append((time.perf_counter() - t_start, raw.qsize(), soups.qsize()))
+            await asyncio.sleep(sample_interval)
+
+    # the stages are supervised together: if one fails, the others (blocked on a queue the failed
+    # stage no longer drains or fills) are cancelled and its exception propagates
+    sampling = asyncio.ensure_future(sampler())
+    stages = [asyncio.ensure_future(stage(reader, readers, raw, parsers)),
+              asyncio.ensure_future(stage(parser, parsers, soups, queriers)),
+              asyncio.ensure_future(stage(querier, queriers, None, 0))]
+    try:
+        done, pending = await asyncio.wait(stages, return_when=asyncio.FIRST_EXCEPTION)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            task.result()
+    finally:
+        sampling.cancel()
+        for task in stages:
+            task.cancel()
+        for pool in [io_pool, parse_pool, query_pool]:
+            pool.shutdown()
+    return stats, time.perf_counter() - t_start
+
+
+def report(stats, seconds, timeline_rows=20):
+    print("%d documents, %.1f MB in %.2f s: %.1f docs/s, %.2f MB/s" % (
+        stats.documents, stats.bytes / (1 << 20), seconds, stats.documents / seconds, stats.bytes / seconds / (1 << 20)))
+    header = "%-6s %-8s %9s %9s %9s %9s" % ("stage", "", "p50_ms", "p90_ms", "p99_ms", "max_ms")
+    print(header)
+    print("-" * len(header))
+    for stage in STAGES:
+        for what, values in [("service", stats.service[stage]), ("queued", stats.wait.get(stage))]:
+            if values:
+                print("%-6s %-8s %9.2f %9.2f %9.2f %9.2f" % (stage, what, *[
+                    percentile(values, q) * 1e3 for q in (50, 90, 99, 100)]))
+    print("queue depth over time (raw -> parse, soup -> query):")
+    step = max(1, len(stats.depth) // timeline_rows)
+    for t, raw, soups in stats.depth[::step]:
+        print("  %7.2f s  raw %3d %-20s soup %3d %s" % (t, raw, "#" * raw, soups, "#" * soups))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", help="directory of .html files (a Corpus.py directory is checked against its manifest)")
+    parser.add_argument("--documents", type=int, default=100, help="documents of the generated corpus")
+    parser.add_argument("--stories", type=int, default=200, help="stories per generated document")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--parsers", type=int, default=2)
+    parser.add_argument("--queriers", type=int, default=1)
+    parser.add_argument("--queue-size", type=int, default=8)
+    parser.add_argument("--sample-interval", type=float, default=0.05, help="seconds between queue depth samples")
+    parser.add_argument("--queries", nargs="+", default=list(QUERIES), choices=list(QUERIES))
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = args.corpus
+        if corpus is None:
+            corpus = tmp
+            Corpus.generate(corpus, Corpus.CorpusConfig(args.documents, args.stories, seed=1))
+        if os.path.exists(os.path.join(corpus, Corpus.MANIFEST)):
+            paths = Corpus.document_paths(corpus)
+            expected = expected_totals(Corpus.load_manifest(corpus), args.queries)
+        else:
+            paths = sorted(os.path.join(corpus, f) for f in os.listdir(corpus) if f.endswith(".html"))
+            expected = None
+        stats, seconds = asyncio.run(ingest(paths, args.queries, args.readers, args.parsers, args.queriers,
+                                            args.queue_size, args.sample_interval))
+    report(stats, seconds)
+    if expected is not None and stats.totals != expected:
+        print("totals %s differ from the manifest's %s" % (dict(stats.totals), dict(expected)))
+        return 1
+    return 0
+
+
+class TestAsyncIngest(unittest.TestCase):
+    """ Every document goes through every stage once, within the queue bound, with the manifest's totals. """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.manifest = Corpus.generate(cls.tmp.name, Corpus.CorpusConfig(documents=12, stories=10, depth=4, seed=4))
+        cls.paths = Corpus.document_paths(cls.tmp.name)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp.cleanup()
+
+    def test_pipeline(self):
+        stats, _ = asyncio.run(ingest(self.paths, list(QUERIES), readers=3, parsers=2, queriers=1,
+                                      queue_size=2, sample_interval=0.001))
+        self.assertEqual(stats.documents, 12)
+        self.assertEqual(stats.bytes, self.manifest["bytes"])
+        self.assertEqual(stats.totals, expected_totals(self.manifest, list(QUERIES)))
+        self.assertEqual([len(stats.service[stage]) for stage in STAGES], [12, 12, 12])
+        self.assertTrue(stats.depth)
+        self.assertLessEqual(max(max(raw, soups) for _, raw, soups in stats.depth), 2)
+
+    def test_failing_stage(self):
+        # an unknown query label makes run_queries raise in the query stage; the pipeline must not hang
+        with self.assertRaises(KeyError):
+            asyncio.run(asyncio.wait_for(ingest(self.paths, ["no_such_query"], readers=3, parsers=2, queriers=1,
+                                                queue_size=1), 20))
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual([percentile(values, q) for q in (50, 90, 99, 100)], [50, 90, 99, 100])
+        self.assertEqual(percentile([3.0], 99), 3.0)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
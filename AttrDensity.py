@@ -0,0 +1,170 @@
+""" Attribute-density scaling benchmark for attrs filters.
+
+    The testcases filter on a one-key {"class": ...} dict against tags with one class and at most
+    three attributes. Here the TestFindParents.input_and_r_1 fixture (two div.wrapper_div and a
+    p.wrapper around p.story, three a.sister) is rebuilt with every tag carrying `attrs` extra
+    data-k<i>="v<i>" attributes and `classes` classes (fillers first, the fixture class last),
+    the wrapper triple repeated `levels` times and `breadth` a.sister links, so the walks are long
+    enough to time.
+
+    Queries follow input_and_r_1: find_parents("div", attrs) from "Elsie" and, for the sibling
+    side, find_next_siblings("a", attrs) from the first <a>. attrs holds the class filter plus
+    keys - 1 of the data-k<i> attributes, every value written as a string, an re pattern or a
+    two-item list; every filter matches, so the results stay the fixture's (2 divs per level,
+    breadth - 1 sisters) whatever the density.
+
+    Two tables: ns per element visited against the attribute count (one class), and against the
+    class count (no extra attributes), each with the fitted growth exponent (Complexity.py).
+
+    Usage: python AttrDensity.py --attrs 1 10 30 100 --classes 1 10 50 --keys 1 4 16
+"""
+import argparse
+import re
+import unittest
+from hypothesis import given
+
+from BenchFindParents import best_of
+from Complexity import fit_exponent
+import FixtureCache
+import FindParents
+
+
+METHODS = ["find_parents", "find_next_siblings"]
+VALUE_KINDS = ["string", "re", "list"]
+ATTR_COUNTS = [1, 10, 30, 100]
+CLASS_COUNTS = [1, 10, 50]
+KEY_COUNTS = [1, 4, 16]
+
+
+def attributes(cls, attrs, classes):
+    """ Markup of the class attribute and the extra data-* attributes of one tag. """
+    class_value = " ".join(["f%d" % i for i in range(classes - 1)] + [cls])
+    return ' class="%s"' % class_value + "".join(' data-k%d="v%d"' % (i, i) for i in range(attrs))
+
+
+def build_dense_document(attrs, classes, levels=1, breadth=3):
+    """ The input_and_r_1 fixture with `levels` wrapper triples, `breadth` sisters and dense attributes. """
+    div = "<div%s>" % attributes("wrapper_div", attrs, classes)
+    p = "<p%s>" % attributes("wrapper", attrs, classes)
+    names = ["Elsie", "Lacie", "Tillie"]
+    sisters = ",\n".join('<a href="http://example.com/%s" id="link%d"%s>%s</a>' % (
+        names[i % 3].lower(), i + 1, attributes("sister", attrs, classes), names[i % 3]) for i in range(breadth))
+    return ("<html><head><title>The Dormouse's story</title></head>\n<body>\n"
+            + '<p class="title"><b>The Dormouse\'s story</b></p>\n'
+            + (div + div + p) * levels
+            + "<p%s>Once upon a time there were three little sisters; and their names were\n" % attributes(
+                "story", attrs, classes)
+            + sisters + ";\nand they lived at the bottom of a well.</p>"
+            + "</p></div></div>" * levels
+            + '\n<p class="story">...</p>\n</body></html>')
+
+
+def dense_soup(attrs, classes, levels=1, breadth=3):
+    return FixtureCache.parse(build_dense_document(attrs, classes, levels, breadth), "html.parser")
+
+
+def value_filter(value, kind):
+    if kind == "re":
+        return re.compile("^" + re.escape(value))
+    if kind == "list":
+        return [value + "_not_exist", value]
+    return value
+
+
+def attrs_filter(cls, keys, kind):
+    """ {"class": cls, "data-k0": "v0", ...} with keys entries, values of the given kind. """
+    f = {"class": value_filter(cls, kind)}
+    for i in range(keys - 1):
+        f["data-k%d" % i] = value_filter("v%d" % i, kind)
+    return f
+
+
+def query(method, soup, keys, kind):
+    """ (start element, fn(start), elements the walk visits) """
+    if method == "find_parents":
+        start = soup.find(string="Elsie")
+        attrs = attrs_filter("wrapper_div", keys, kind)
+        return start, lambda s: s.find_parents("div", attrs), len(list(start.parents))
+    start = soup.a
+    attrs = attrs_filter("sister", keys, kind)
+    return start, lambda s: s.find_next_siblings("a", attrs), len(list(start.next_siblings))
+
+
+def bench(method, points, keys_list, levels, breadth, repeat):
+    """ Yield (kind, keys, attrs, classes, ns per element visited) for every (attrs, classes) point. """
+    for attrs, classes in points:
+        soup = dense_soup(attrs, classes, levels, breadth)
+        for kind in VALUE_KINDS:
+            for keys in keys_list:
+                if keys > attrs + 1:
+                    continue
+                start, call, visited = query(method, soup, keys, kind)
+                ns, _ = best_of(lambda: call(start), repeat)
+                yield kind, keys, attrs, classes, ns / visited
+
+
+def report(title, method, rows, axis, values):
+    """ One row per (kind, keys): ns/element at each value of axis ("attrs" or "classes"), and the exponent. """
+    table = {}
+    for kind, keys, attrs, classes, ns in rows:
+        table.setdefault((kind, keys), {})[attrs if axis == "attrs" else classes] = ns
+    print("%s: %s, ns per element visited" % (method, title))
+    header = "%-7s %5s %s %9s" % ("kind", "keys", " ".join("%9s" % ("%s=%d" % (axis, v)) for v in values), "exponent")
+    print(header)
+    print("-" * len(header))
+    for (kind, keys), cells in table.items():
+        xs = sorted(cells)
+        exponent = fit_exponent(xs, [cells[x] for x in xs]) if len(xs) > 1 else float("nan")
+        print("%-7s %5d %s %9.2f" % (kind, keys, " ".join("%9s" % ("%.0f" % cells[v] if v in cells else "-")
+                                                         for v in values), exponent))
+    print()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--methods", nargs="+", default=METHODS)
+    parser.add_argument("--attrs", type=int, nargs="+", default=ATTR_COUNTS, help="extra attributes per tag")
+    parser.add_argument("--classes", type=int, nargs="+", default=CLASS_COUNTS, help="classes per tag")
+    parser.add_argument("--keys", type=int, nargs="+", default=KEY_COUNTS, help="entries of the attrs filter")
+    parser.add_argument("--levels", type=int, default=100, help="repeats of the div/div/p wrapper triple")
+    parser.add_argument("--breadth", type=int, default=300, help="a.sister siblings")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    for method in args.methods:
+        rows = bench(method, [(a, 1) for a in args.attrs], args.keys, args.levels, args.breadth, args.repeat)
+        report("cost against attribute count, 1 class", method, rows, "attrs", args.attrs)
+        rows = bench(method, [(0, c) for c in args.classes], [1], args.levels, args.breadth, args.repeat)
+        report("cost against class count, no extra attributes", method, rows, "classes", args.classes)
+
+
+class TestAttrDensity(unittest.TestCase):
+    """ Dense attributes change the cost, never the results: input_and_r_1 still holds on the dense fixture. """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.test_html_page_element = dense_soup(attrs=40, classes=20)
+
+    @given(input=FindParents.TestFindParents.input_and_r_1())
+    def test_template(self, input):
+        (start_tag_name, input_name_filter, input_attrs_filter, input_limit, r_exp) = input
+        tag = self.test_html_page_element.find(string=start_tag_name)
+        r = tag.find_parents(name=input_name_filter, attrs=input_attrs_filter, limit=input_limit)
+        self.assertEqual(len(r), r_exp)
+
+    def test_dense_filters(self):
+        for levels, breadth in [(1, 3), (5, 12)]:
+            soup = dense_soup(attrs=20, classes=5, levels=levels, breadth=breadth)
+            for kind in VALUE_KINDS:
+                for keys in [1, 4, 21]:
+                    start, call, _ = query("find_parents", soup, keys, kind)
+                    self.assertEqual(len(call(start)), 2 * levels, (kind, keys))
+                    start, call, _ = query("find_next_siblings", soup, keys, kind)
+                    self.assertEqual(len(call(start)), breadth - 1, (kind, keys))
+
+    def test_bench(self):
+        rows = list(bench("find_parents", [(1, 1), (8, 3)], [1, 4], 3, 3, 1))
+        self.assertEqual(len(rows), len(VALUE_KINDS) * 3)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+""" Wide-sibling throughput benchmark for find_next_siblings().
+
+    The document repeats the Elsie/Lacie/Tillie paragraph of TestFindNextSiblings.setUpClass
+    until p.story holds about `n` siblings (a.sister and p.brother tags with NavigableStrings in
+    between), and every query starts from the first <a> like the blackbox testcases do.
+
+    Two tables are printed:
+      - throughput of every name/attrs/text combination of input_and_r_1..input_and_r_7 without
+        a limit, in siblings walked per second;
+      - the same combinations with limit=1..5: once the limit is hit, the visited count and the
+        time must stay flat as n grows.
+
+    Usage: python BenchFindNextSiblings.py --sizes 1000 10000 100000 --repeat 3
+"""
+import argparse
+import unittest
+
+import FixtureCache
+from BenchFindParents import best_of, elements_visited
+from FilterSpaces import NEXT_SIBLINGS_SPACES, iter_space
+from Instrumentation import VisitCounter
+
+
+UNIT = ('<a href="http://example.com/lacie" class="sister" id="link{0}">Lacie</a> and\n'
+        '<a href="http://example.com/tillie" class="sister" id="link{1}">Tillie</a>;\n'
+        '<p class="brother">Tom</p>\n'
+        '<p class="brother">Bob</p>\n')
+SIBLINGS_PER_UNIT = 8       # four tags, each followed by a NavigableString
+
+
+def build_wide_document(n):
+    """ Return the Dormouse document whose p.story holds about `n` siblings after the first <a>. """
+    units = max(1, n // SIBLINGS_PER_UNIT)
+    return ("<html><head><title>The Dormouse's story</title></head>\n<body>\n"
+            + '<p class="title"><b>The Dormouse\'s story</b></p>\n'
+            + '<p class="story">Once upon a time there were three little sisters; and their names were\n'
+            + '<a href="http://example.com/elsie" class="sister" id="link1">Elsie</a>,\n'
+            + "".join(UNIT.format(2 * i + 2, 2 * i + 3) for i in range(units))
+            + 'and they lived at the bottom of a well.</p>\n'
+            + '<p class="story">...</p>\n</body></html>')
+
+
+def wide_soup(n):
+    return FixtureCache.parse(build_wide_document(n), "html.parser")
+
+
+def space_combinations(case):
+    """ Yield (name, attrs, text, text_kwarg) for every filter combination of input_and_r_<case>. """
+    space = NEXT_SIBLINGS_SPACES[case]
+    for name, attrs, text in iter_space(space, ["name", "attrs", "text"]):
+        yield name, attrs, text, space["text_kwarg"]
+
+
+def find_next_siblings(tag, name, attrs, text, text_kwarg, limit):
+    """ Call find_next_siblings the way test_black_N does. """
+    return tag.find_next_siblings(name=name, attrs=attrs, limit=limit, **{text_kwarg: text})
+
+
+def bench_size(n, repeat, cases, limits):
+    """ Return {(case, name, attrs, text, limit): (matches, visited, ns)} measured at size n. """
+    soup = wide_soup(n)
+    start = soup.a
+    sibling_index = {id(s): i for i, s in enumerate(start.next_siblings)}
+    results = {}
+    for case in cases:
+        for name, attrs, text, text_kwarg in space_combinations(case):
+            for limit in limits:
+                ns, r = best_of(lambda: find_next_siblings(start, name, attrs, text, text_kwarg, limit), repeat)
+                key = (case, repr(name), repr(attrs), "%s=%r" % (text_kwarg, text), limit)
+                results[key] = (len(r), elements_visited(sibling_index, r, limit), ns)
+    return len(sibling_index), results
+
+
+def report_throughput(sizes, by_size):
+    header = "%4s %-24s %-28s %-34s %8s %8s %10s %12s" % (
+        "case", "name", "attrs", "text", "n", "matches", "ns/sib", "sib/s")
+    print(header)
+    print("-" * len(header))
+    for n in sizes:
+        siblings, results = by_size[n]
+        for (case, name, attrs, text, limit), (matches, visited, ns) in results.items():
+            if limit is not None:
+                continue
+            print("%4d %-24s %-28s %-34s %8d %8d %10.1f %12.0f" % (
+                case, name, attrs, text, siblings, matches, ns / max(visited, 1), visited * 1e9 / max(ns, 1)))
+
+
+def report_limits(sizes, by_size):
+    """ One row per limited query with its visited count and time at every size. When the limit
+        is hit at every size, the walk must stop at the same sibling ("flat") and the time ratio
+        between the largest and the smallest size should stay close to 1. """
+    header = "%4s %-24s %-28s %-34s %5s %9s " % ("case", "name", "attrs", "text", "limit", "visited") \
+        + " ".join("%12s" % ("us@%d" % n) for n in sizes) + " %7s  flat" % "ratio"
+    print(header)
+    print("-" * len(header))
+    first = by_size[sizes[0]][1]
+    for key in first:
+        (case, name, attrs, text, limit) = key
+        if limit is None:
+            continue
+        rows = [by_size[n][1][key] for n in sizes]
+        hit = all(matches == limit for matches, _, _ in rows)
+        visited = sorted({v for _, v, _ in rows})
+        times = [ns for _, _, ns in rows]
+        flat = len(visited) == 1 if hit else None
+        print("%4d %-24s %-28s %-34s %5d %9s " % (case, name, attrs, text, limit, "/".join(map(str, visited)))
+              + " ".join("%12.1f" % (ns / 1000) for ns in times)
+              + " %7.2f  " % (times[-1] / max(times[0], 1))
+              + {True: "yes", False: "NO", None: "-"}[flat])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--cases", type=int, nargs="+", default=sorted(NEXT_SIBLINGS_SPACES))
+    args = parser.parse_args(argv)
+    limits = [None, 1, 2, 3, 4, 5]
+    by_size = {n: bench_size(n, args.repeat, args.cases, limits) for n in args.sizes}
+    report_throughput(args.sizes, by_size)
+    print()
+    report_limits(args.sizes, by_size)
+
+
+class TestWideDocument(unittest.TestCase):
+    """ Sanity checks of the generated document, so the benchmark measures the walk it claims to. """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.small = wide_soup(80)
+        cls.large = wide_soup(800)
+
+    def test_sibling_count(self):
+        tag = self.small.a
+        siblings = list(tag.next_siblings)
+        # ",\n" after Elsie, then 8 per unit; the last unit's trailing text runs into the closing sentence
+        self.assertEqual(len(siblings), 1 + 80)
+        self.assertEqual(len(tag.find_next_siblings("a", attrs={"class": "sister"}, text="Lacie")), 10)
+        self.assertEqual(len(tag.find_next_siblings("p", string=["Tom", "Bob"])), 20)
+
+    def test_limit_stops_early(self):
+        # steps actually taken along next_siblings, counted by Instrumentation.VisitCounter
+        for limit in range(1, 6):
+            visited = []
+            for soup in [self.small, self.large]:
+                tag = soup.a
+                with VisitCounter() as counter:
+                    r = tag.find_next_siblings("a", attrs={"class": "sister"}, text=True, limit=limit)
+                self.assertEqual(len(r), limit)
+                visited.append(counter.last("find_next_siblings").visited)
+            self.assertEqual(visited[0], visited[1])
+            self.assertLess(visited[1], len(list(self.large.a.next_siblings)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+""" Depth-scaling benchmark for find_parents() and find_parent().
+
+    The document nests the div.wrapper_div / p.wrapper pattern of TestFindParents.setUpClass
+    `depth` levels deep around p.story, and every query starts from the "Elsie" string like the
+    blackbox testcases do. Cost is reported as ns per ancestor visited, so a filter whose cost
+    grows linearly with depth shows a flat ns/ancestor column.
+
+    Usage: python BenchFindParents.py --depths 5000 20000 100000 --repeat 5
+"""
+import argparse
+import gc
+import time
+import unittest
+
+import FixtureCache
+from FilterSpaces import PARENTS_NAME_FILTERS, filter_kind
+
+
+STORY = """<p class="story">
+    Once upon a time there were three little sisters; and their names were
+    <a href="http://example.com/elsie" class="sister" id="link1">Elsie</a>,
+    <a href="http://example.com/lacie" class="sister" id="link2">Lacie</a> and
+    <a href="http://example.com/tillie" class="sister" id="link3">Tillie</a>;
+    and they lived at the bottom of a well.
+</p>"""
+
+ATTRS_FILTERS = [{"class": "wrapper_div"}, {}]
+LIMITS = [None, 1, 10]
+
+
+def level_tag(i):
+    """ Return (open, close) markup of nesting level i: div.wrapper_div on even levels, p.wrapper on odd ones. """
+    if i % 2 == 0:
+        return '<div class="wrapper_div">', '</div>'
+    return '<p class="wrapper">', '</p>'
+
+
+def build_deep_document(depth):
+    """ Return the Dormouse document with `depth` wrapper levels around p.story. """
+    levels = [level_tag(i) for i in range(depth)]
+    return ("<html><head><title>The Dormouse's story</title></head>\n<body>\n"
+            + '<p class="title"><b>The Dormouse\'s story</b></p>\n'
+            + "".join(o for o, _ in levels)
+            + STORY
+            + "".join(c for _, c in reversed(levels))
+            + '\n<p class="story">...</p>\n</body></html>')
+
+
+def deep_soup(depth):
+    return FixtureCache.parse(build_deep_document(depth), "html.parser")
+
+
+def best_of(fn, repeat):
+    """ Call fn() `repeat` times, return (fastest wall time in ns, last result).
+        The garbage collector is paused around each call, as timeit does. """
+    best = None
+    gc_was_enabled = gc.isenabled()
+    try:
+        for _ in range(repeat):
+            gc.disable()
+            t0 = time.perf_counter_ns()
+            r = fn()
+            dt = time.perf_counter_ns() - t0
+            if gc_was_enabled:
+                gc.enable()
+            best = dt if best is None else min(best, dt)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best, r
+
+
+def elements_visited(element_index, r, limit):
+    """ Number of elements a find_parents / find_next_siblings call walked before it returned r. """
+    if limit is None or len(r) < limit:
+        return len(element_index)       # walked to the end of the generator
+    return element_index[id(r[-1])] + 1
+
+
+def bench_depth(depth, repeat):
+    """ Yield one result row per (method, name filter, attrs filter, limit) at the given depth. """
+    soup = deep_soup(depth)
+    start = soup.find(string="Elsie")
+    ancestor_index = {id(p): i for i, p in enumerate(start.parents)}
+    for name in PARENTS_NAME_FILTERS:
+        for attrs in ATTRS_FILTERS:
+            for limit in LIMITS:
+                ns, r = best_of(lambda: start.find_parents(name=name, attrs=attrs, limit=limit), repeat)
+                visited = elements_visited(ancestor_index, r, limit)
+                yield ("find_parents", depth, filter_kind(name), repr(name), attrs, limit, len(r), visited, ns)
+            ns, r = best_of(lambda: start.find_parent(name=name, attrs=attrs), repeat)
+            visited = elements_visited(ancestor_index, [] if r is None else [r], 1)
+            yield ("find_parent", depth, filter_kind(name), repr(name), attrs, 1, int(r is not None), visited, ns)
+
+
+def report(rows):
+    header = "%-13s %7s %-7s %-22s %-26s %6s %8s %8s %12s %10s" % (
+        "method", "depth", "kind", "name", "attrs", "limit", "matches", "visited", "total_us", "ns/anc")
+    print(header)
+    print("-" * len(header))
+    for method, depth, kind, name, attrs, limit, matches, visited, ns in rows:
+        print("%-13s %7d %-7s %-22s %-26s %6s %8d %8d %12.1f %10.1f" % (
+            method, depth, kind, name, attrs, limit, matches, visited, ns / 1000, ns / max(visited, 1)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--depths", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    for depth in args.depths:
+        report(bench_depth(depth, args.repeat))
+        print()
+
+
+class TestDeepDocument(unittest.TestCase):
+    """ Sanity checks of the generated document, so the benchmark measures the walk it claims to. """
+
+    depth = 50
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.test_html_page_element = deep_soup(cls.depth)
+
+    def test_ancestor_count(self):
+        tag = self.test_html_page_element.find(string="Elsie")
+        # a, p.story, the wrapper levels, body, html and the BeautifulSoup object
+        self.assertEqual(len(tag.find_parents(True)), self.depth + 5)
+        self.assertEqual(len(tag.find_parents("div", attrs={"class": "wrapper_div"})), self.depth // 2)
+
+    def test_visited_with_limit(self):
+        tag = self.test_html_page_element.find(string="Elsie")
+        ancestor_index = {id(p): i for i, p in enumerate(tag.parents)}
+        r = tag.find_parents("div", limit=3)
+        # a, p.story, then p.wrapper / div.wrapper_div pairs up to the third div
+        self.assertEqual(elements_visited(ancestor_index, r, 3), 8)
+        r = tag.find_parents("div_not_exist", limit=3)
+        self.assertEqual(elements_visited(ancestor_index, r, 3), self.depth + 5)
+
+
+if __name__ == '__main__':
+    main()
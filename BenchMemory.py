@@ -0,0 +1,132 @@
+""" tracemalloc memory suite for large find_parents() / find_next_siblings() results.
+
+    Without a limit both methods return a ResultSet holding every match. For growing result
+    sizes (deep documents from BenchFindParents, wide ones from BenchFindNextSiblings) this
+    records, per call:
+        peak        highest traced allocation above the baseline while the call runs
+        retained    allocation still alive after the call while its result is held
+    for two styles of the same query:
+        full        the find_* call, materialising the whole ResultSet
+        lazy        iter_matches() over .parents / .next_siblings, counting matches without
+                    keeping them; its few KB of "retained" are list objects parked on the
+                    interpreter's free lists and do not grow with the result
+
+    bytes/result is the full style's retained size per match; multiply it by the largest result
+    a worker can see (plus the tree itself, see BenchParse.py) to size its memory limit.
+
+    Usage: python BenchMemory.py --depths 1000 10000 --sizes 10000 100000
+"""
+import argparse
+import gc
+import tracemalloc
+import unittest
+from BenchFindNextSiblings import wide_soup
+from BenchFindParents import deep_soup
+from LazyNavigation import iter_matches
+
+
+# (label, name, attrs) per method; from every ancestor / sibling down to no match at all
+FILTERS = {
+    "find_parents": [("True", True, {}), ("div.wrapper_div", "div", {"class": "wrapper_div"}),
+                     ("div_not_exist", "div_not_exist", {})],
+    "find_next_siblings": [("True", True, {}), ("a.sister", "a", {"class": "sister"}),
+                           ("a_not_exist", "a_not_exist", {})],
+}
+
+
+def start_element(method, size):
+    """ The element the testcases start from, in a document whose walk is `size` elements long. """
+    if method == "find_parents":
+        return deep_soup(size).find(string="Elsie")
+    return wide_soup(size).a
+
+
+def full_query(method, start, name, attrs):
+    return getattr(start, method)(name, attrs)
+
+
+def lazy_query(method, start, name, attrs):
+    generator = start.parents if method == "find_parents" else start.next_siblings
+    return sum(1 for _ in iter_matches(generator, name, attrs))
+
+
+def traced(fn):
+    """ Run fn() under tracemalloc; return (result, peak bytes, retained bytes) above the baseline.
+        fn() runs once untraced first, so one-time allocations (caches, specialised code) are not counted. """
+    fn()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        r = fn()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return r, peak - baseline, current - baseline
+
+
+def measure(method, size):
+    """ Yield (label, results, full peak, full retained, lazy peak, lazy retained) per filter. """
+    start = start_element(method, size)
+    for label, name, attrs in FILTERS[method]:
+        r, full_peak, full_retained = traced(lambda: full_query(method, start, name, attrs))
+        count, lazy_peak, lazy_retained = traced(lambda: lazy_query(method, start, name, attrs))
+        assert count == len(r), (method, size, label)
+        yield label, len(r), full_peak, full_retained, lazy_peak, lazy_retained
+        del r
+
+
+def report(method, sizes):
+    header = "%-20s %8s %-16s %8s %12s %12s %12s %12s %10s" % (
+        "method", "size", "filter", "results", "full_peak", "full_kept", "lazy_peak", "lazy_kept", "B/result")
+    print(header)
+    print("-" * len(header))
+    worst = 0.0
+    for size in sizes:
+        for label, results, full_peak, full_retained, lazy_peak, lazy_retained in measure(method, size):
+            per_result = full_retained / results if results else 0.0
+            worst = max(worst, per_result)
+            print("%-20s %8d %-16s %8d %12d %12d %12d %12d %10.1f" % (
+                method, size, label, results, full_peak, full_retained, lazy_peak, lazy_retained, per_result))
+    print("%s: at most %.1f bytes retained per result\n" % (method, worst))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--depths", nargs="+", type=int, default=[100, 1000, 10000],
+                        help="wrapper levels of the find_parents documents")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000],
+                        help="siblings of the find_next_siblings documents")
+    args = parser.parse_args(argv)
+    report("find_parents", args.depths)
+    report("find_next_siblings", args.sizes)
+
+
+class TestMemory(unittest.TestCase):
+    """ The lazy style finds the same elements and keeps nothing; the full one grows with results. """
+
+    def test_iter_matches_same_elements(self):
+        for method, size in [("find_parents", 50), ("find_next_siblings", 200)]:
+            start = start_element(method, size)
+            generator = start.parents if method == "find_parents" else start.next_siblings
+            for label, name, attrs in FILTERS[method]:
+                r_full = full_query(method, start, name, attrs)
+                r_lazy = list(iter_matches(generator, name, attrs))
+                self.assertEqual([id(e) for e in r_full], [id(e) for e in r_lazy], label)
+                generator = start.parents if method == "find_parents" else start.next_siblings
+
+    def test_retained_grows_with_results(self):
+        small = {row[0]: row for row in measure("find_next_siblings", 1000)}
+        large = {row[0]: row for row in measure("find_next_siblings", 10000)}
+        _, results, _, full_retained, _, lazy_retained = large["True"]
+        self.assertGreater(full_retained, small["True"][3] * 5)
+        self.assertGreaterEqual(full_retained, 8 * results)          # one pointer per match at least
+        # lazy keeps no results: ten times the matches moves it by noise (free lists, caches), a
+        # small fraction of what the full ResultSet retains
+        self.assertLess(abs(lazy_retained - small["True"][5]), full_retained / 10)
+        self.assertLess(lazy_retained, full_retained / 5)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+""" Parse-throughput benchmark for large Dormouse-style documents.
+
+    The document repeats the body of TestFindNextSiblings.setUpClass (div.wrapper_div, p.wrapper,
+    p.story with the three sisters and two brothers) until it reaches the requested size. For
+    every installed tree builder and every size it reports parse throughput in MB/s, the peak RSS
+    of the process, and the time to the first find_parents / find_next_siblings result.
+
+    html.parser is always measured; lxml and html5lib are measured when installed and skipped
+    otherwise. Each measurement runs in a fresh process so peak RSS belongs to that measurement.
+    Note that lxml and html5lib close a <p> when another <p> opens, so their trees are shallower.
+
+    Usage: python BenchParse.py --sizes 10K 1M 10M 100M --builders html.parser lxml html5lib
+"""
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+import bs4
+from bs4.builder import builder_registry
+
+
+BUILDERS = ["html.parser", "lxml", "html5lib"]
+
+HEAD = "<html><head><title>The Dormouse's story</title></head>\n<body>\n"
+BLOCK = """
+<p class="title"><b>The Dormouse's story</b></p>
+<div class="wrapper_div">
+    <div class="wrapper_div">
+        <p class="wrapper">
+            <p class="story">
+                Once upon a time there were three little sisters; and their names were
+                <a href="http://example.com/elsie" class="sister" id="link1">Elsie</a>,
+                <a href="http://example.com/lacie" class="sister" id="link2">Lacie</a> and
+                <a href="http://example.com/tillie" class="sister" id="link3">Tillie</a>;
+                and they lived at the bottom of a well.
+                <p class="brother">Tom</p>
+                <p class="brother">Bob</p>
+            </p>
+        </p>
+    </div>
+</div>
+"""
+TAIL = '<p class="story">...</p>\n</body></html>'
+
+
+def parse_size(text):
+    """ "10K" -> 10240, "100M" -> 104857600, "512" -> 512 """
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    text = text.strip().upper()
+    if text[-1:] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def build_document(size):
+    """ Return a Dormouse-style document of at least `size` bytes (one block at least). """
+    blocks = max(1, (size - len(HEAD) - len(TAIL) + len(BLOCK) - 1) // len(BLOCK))
+    return HEAD + BLOCK * blocks + TAIL
+
+
+def installed_builders(names):
+    return [name for name in names if builder_registry.lookup(name) is not None]
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1 << 20) if sys.platform == "darwin" else rss / (1 << 10)
+
+
+def measure(builder, size):
+    """ Parse one document and run the first queries; runs in its own process. """
+    markup = build_document(size)
+    baseline_mb = peak_rss_mb()
+    t0 = time.perf_counter()
+    soup = bs4.BeautifulSoup(markup, builder)
+    parsed = time.perf_counter()
+    r_parents = soup.find(string="Elsie").find_parents("div", attrs={"class": "wrapper_div"})
+    first_parents = time.perf_counter()
+    r_siblings = soup.a.find_next_siblings("a", attrs={"class": "sister"})
+    first_siblings = time.perf_counter()
+    return dict(builder=builder, bytes=len(markup.encode("utf-8")), parse_s=parsed - t0,
+                parents_ms=(first_parents - parsed) * 1e3, siblings_ms=(first_siblings - first_parents) * 1e3,
+                ttfq_s=first_parents - t0, baseline_mb=baseline_mb, peak_mb=peak_rss_mb(),
+                results=(len(r_parents), len(r_siblings)))
+
+
+def measure_in_fresh_process(builder, size):
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(measure, builder, size).result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=["10K", "100K", "1M", "10M"],
+                        help="document sizes, with K/M/G suffixes (up to 100M is practical)")
+    parser.add_argument("--builders", nargs="+", default=BUILDERS)
+    args = parser.parse_args(argv)
+
+    builders = installed_builders(args.builders)
+    for name in args.builders:
+        if name not in builders:
+            print("skipped %s: not installed" % name)
+    header = "%-12s %10s %9s %8s %12s %12s %9s %10s %10s" % (
+        "builder", "bytes", "parse_s", "MB/s", "parents_ms", "siblings_ms", "ttfq_s", "base_MB", "peak_MB")
+    print(header)
+    print("-" * len(header))
+    for builder in builders:
+        for size in map(parse_size, args.sizes):
+            m = measure_in_fresh_process(builder, size)
+            print("%-12s %10d %9.3f %8.2f %12.3f %12.3f %9.3f %10.1f %10.1f" % (
+                m["builder"], m["bytes"], m["parse_s"], m["bytes"] / (1 << 20) / m["parse_s"],
+                m["parents_ms"], m["siblings_ms"], m["ttfq_s"], m["baseline_mb"], m["peak_mb"]))
+
+
+class TestParseDocument(unittest.TestCase):
+    """ The generated documents have the requested size and the fixture's structure. """
+
+    def test_size(self):
+        for size in [1, 10 << 10, 1 << 20]:
+            markup = build_document(size)
+            self.assertGreaterEqual(len(markup), size)
+            self.assertLessEqual(len(markup), max(size, len(HEAD + TAIL)) + len(BLOCK))
+
+    def test_parse_size(self):
+        self.assertEqual([parse_size(s) for s in ["512", "10K", "1.5M"]], [512, 10240, 1572864])
+
+    def test_installed_builders(self):
+        markup = build_document(4 * len(BLOCK))
+        for builder in installed_builders(BUILDERS):
+            soup = bs4.BeautifulSoup(markup, builder)
+            self.assertEqual(len(soup.find_all("a", attrs={"class": "sister"})), 12)
+            self.assertTrue(soup.find(string="Elsie").find_parents("div"))
+        self.assertIn("html.parser", installed_builders(BUILDERS))
+
+    def test_html_parser_queries(self):
+        m = measure("html.parser", 3 * len(BLOCK))
+        # two wrapper divs around the first Elsie; Lacie and Tillie, the other blocks' sisters are not siblings
+        self.assertEqual(m["results"], (2, 2))
+        self.assertGreaterEqual(m["peak_mb"], m["baseline_mb"])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+""" Prebuilt SoupStrainer reuse: benchmark and test mode.
+
+    Every find_* call with raw name/attrs/text filters builds a new SoupStrainer. This module runs
+    every blackbox combination (Scenarios.scenarios()) both ways: with the raw keyword arguments,
+    and with a SoupStrainer built once per filter tuple and passed as `name`, like test_white_1
+    does. Results must be the same elements; the report shows the per-call time removed by reuse,
+    grouped by method and by name / text filter kind, next to the cost of building the strainer.
+
+    Usage: python BenchStrainerReuse.py --number 200 --repeat 5
+           python -m unittest BenchStrainerReuse
+"""
+import argparse
+import time
+import unittest
+from bs4.element import SoupStrainer
+
+from BenchFindParents import best_of
+from FilterSpaces import freeze
+from Scenarios import METHODS, fixture, scenarios
+
+
+def strainer_cache():
+    """ Return a function scenario -> SoupStrainer that builds one strainer per filter tuple. """
+    cache = {}
+
+    def get(scenario):
+        key = (freeze(scenario.name), freeze(scenario.attrs), freeze(scenario.text))
+        strainer = cache.get(key)
+        if strainer is None:
+            strainer = cache[key] = scenario.strainer()
+        return strainer
+    return get
+
+
+def same_elements(r1, r2):
+    return [id(e) for e in r1] == [id(e) for e in r2]
+
+
+def per_call_ns(fn, number, repeat):
+    def loop():
+        for _ in range(number):
+            fn()
+    ns, _ = best_of(loop, repeat)
+    return ns / number
+
+
+def bench(methods, number, repeat):
+    """ Yield (scenario, raw ns, reused-strainer ns, strainer build ns) per blackbox combination. """
+    get_strainer = strainer_cache()
+    for method in methods:
+        soup = fixture(method)
+        for scenario in scenarios([method]):
+            element = scenario.start_element(soup)
+            strainer = get_strainer(scenario)
+            r_raw = scenario.call(element)
+            r_reused = scenario.call(element, strainer)
+            assert same_elements(r_raw, r_reused), scenario
+            raw = per_call_ns(lambda: scenario.call(element), number, repeat)
+            reused = per_call_ns(lambda: scenario.call(element, strainer), number, repeat)
+            build = per_call_ns(lambda: SoupStrainer(scenario.name, scenario.attrs, string=scenario.text), number, repeat)
+            yield scenario, raw, reused, build
+
+
+def report(rows):
+    groups = {}
+    for scenario, raw, reused, build in rows:
+        g = groups.setdefault((scenario.method, scenario.name_kind, scenario.text_kind), [])
+        g.append((raw, reused, build))
+    header = "%-20s %-7s %-7s %6s %10s %10s %10s %7s %10s" % (
+        "method", "name", "text", "combos", "raw_ns", "reused_ns", "saved_ns", "saved", "build_ns")
+    print(header)
+    print("-" * len(header))
+    total = [0.0, 0.0, 0]
+    for (method, name_kind, text_kind), g in sorted(groups.items()):
+        raw = sum(r for r, _, _ in g) / len(g)
+        reused = sum(r for _, r, _ in g) / len(g)
+        build = sum(b for _, _, b in g) / len(g)
+        total[0] += raw * len(g)
+        total[1] += reused * len(g)
+        total[2] += len(g)
+        print("%-20s %-7s %-7s %6d %10.0f %10.0f %10.0f %6.0f%% %10.0f" % (
+            method, name_kind, text_kind, len(g), raw, reused, raw - reused, 100 * (raw - reused) / raw, build))
+    raw, reused = total[0] / total[2], total[1] / total[2]
+    print("all %d combinations: %.0f ns raw, %.0f ns reused, %.0f ns (%.0f%%) saved per call" % (
+        total[2], raw, reused, raw - reused, 100 * (raw - reused) / raw))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--methods", nargs="+", choices=METHODS, default=METHODS)
+    parser.add_argument("--number", type=int, default=200, help="calls per timing")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+    report(list(bench(args.methods, args.number, args.repeat)))
+
+
+class TestStrainerReuse(unittest.TestCase):
+    """ A strainer built once and reused must give the same elements as raw filters, and still
+        satisfy the expected result of the testcase. """
+
+    def check_method(self, method):
+        soup = fixture(method)
+        get_strainer = strainer_cache()
+        for scenario in scenarios([method]):
+            element = scenario.start_element(soup)
+            r_raw = scenario.call(element)
+            r_reused = scenario.call(element, get_strainer(scenario))
+            self.assertTrue(same_elements(r_raw, r_reused), scenario)
+            self.assertTrue(scenario.check(r_reused), scenario)
+
+    def test_find_next_siblings(self):
+        self.check_method("find_next_siblings")
+
+    def test_find_parents(self):
+        self.check_method("find_parents")
+
+    def test_find_parent(self):
+        self.check_method("find_parent")
+
+
+if __name__ == '__main__':
+    main()
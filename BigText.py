@@ -0,0 +1,118 @@
+""" Large text-node benchmark for the text / string filters of find_next_siblings().
+
+    TestFindNextSiblings matches text filters ("Lacie", re.compile("^Lacie"), ["Tom", "Bob"], True)
+    against short strings. Here p.story holds, after the first <a>, `units` repetitions of
+
+        <big text> <a class="sister">Lacie</a> <big text> <p class="brother"><big text></p>
+
+    where every <big text> is `size` bytes (1 B to 10 MB) of filler ending in "Lacie", so an
+    anchored regex fails at the first character while an unanchored one scans the whole node.
+    Every filter runs in two forms:
+        text        find_next_siblings(text=f): the big NavigableStrings are the candidates
+        p+text      find_next_siblings("p", {"class": "brother"}, text=f): the filter sees the
+                    .string of each p.brother
+    and the report gives, per match attempt (sibling checked), the time and the transient
+    allocations (tracemalloc peak above the baseline, BenchMemory.traced). A filter that copies
+    or rescans the text shows up as time or bytes growing with the node size.
+
+    Usage: python BigText.py --sizes 1 100 10K 1M 10M --units 4
+"""
+import argparse
+import re
+import unittest
+import warnings
+
+import bs4
+from BenchFindParents import best_of
+from BenchMemory import traced
+from BenchParse import parse_size
+
+
+# the filters of TestFindNextSiblings, plus an unanchored regex that has to scan the node
+FILTERS = [("string", "Lacie"), ("re ^Lacie", re.compile("^Lacie")), ("re search", re.compile("Lacie")),
+           ("list", ["Tom", "Bob"]), ("True", True)]
+FORMS = ["text", "p+text"]
+SIZES = ["1", "100", "10K", "1M", "10M"]
+FILLER = "once upon a time there were three little sisters "
+
+
+def big_text(size):
+    """ `size` characters of filler ending in "Lacie" (just a prefix of it below 5 characters). """
+    if size < len("Lacie"):
+        return "Lacie"[:size] or " "
+    body = FILLER * ((size - 5) // len(FILLER) + 1)
+    return body[:size - 5] + "Lacie"
+
+
+def build_big_text_document(size, units):
+    text = big_text(size)
+    unit = (text + '<a href="http://example.com/lacie" class="sister">Lacie</a>' + text
+            + '<p class="brother">' + text + '</p>')
+    return ("<html><head><title>The Dormouse's story</title></head>\n<body>\n"
+            + '<p class="story"><a href="http://example.com/elsie" class="sister" id="link1">Elsie</a>'
+            + unit * units + "</p>\n</body></html>")
+
+
+def query(start, form, f):
+    def call():
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)     # text= on bs4 >= 4.11
+            if form == "text":
+                return start.find_next_siblings(text=f)
+            return start.find_next_siblings("p", {"class": "brother"}, text=f)
+    return call
+
+
+def measure(size, units, repeat):
+    """ Yield (form, label, matches, attempts, ns, peak bytes) per filter and form. """
+    soup = bs4.BeautifulSoup(build_big_text_document(size, units), "html.parser")
+    start = soup.a
+    siblings = list(start.next_siblings)
+    attempts = {"text": sum(isinstance(s, bs4.NavigableString) for s in siblings),
+                "p+text": sum(getattr(s, "name", None) == "p" for s in siblings)}
+    for form in FORMS:
+        for label, f in FILTERS:
+            call = query(start, form, f)
+            ns, r = best_of(call, repeat)
+            _, peak, _ = traced(call)
+            yield form, label, len(r), attempts[form], ns, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=SIZES, help="bytes per text node, with K/M suffixes")
+    parser.add_argument("--units", type=int, default=4, help="big-text units after the first <a>")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    header = "%10s %-7s %-10s %8s %9s %12s %14s" % ("text_B", "form", "filter", "matches", "attempts",
+                                                    "ns/attempt", "peak_B/attempt")
+    print(header)
+    print("-" * len(header))
+    for size in map(parse_size, args.sizes):
+        for form, label, matches, attempts, ns, peak in measure(size, args.units, args.repeat):
+            print("%10d %-7s %-10s %8d %9d %12.0f %14.1f" % (size, form, label, matches, attempts,
+                                                             ns / attempts, peak / attempts))
+
+
+class TestBigText(unittest.TestCase):
+    """ Results on big text nodes are what the filters say, and no filter copies the text. """
+
+    def test_matches(self):
+        for size in [1, 5, 64, 5000]:
+            results = {(form, label): matches for form, label, matches, _, _, _ in measure(size, 3, 1)}
+            self.assertEqual(results["text", "True"], 2 * 3)
+            self.assertEqual(results["text", "re search"], 2 * 3 if size >= 5 else 0)
+            self.assertEqual(results["text", "string"], 2 * 3 if size == 5 else 0)
+            self.assertEqual(results["text", "re ^Lacie"], 2 * 3 if size == 5 else 0)
+            self.assertEqual(results["p+text", "True"], 3)
+            self.assertEqual(results["p+text", "list"], 0)
+            self.assertEqual(results["p+text", "re search"], 3 if size >= 5 else 0)
+
+    def test_no_copies(self):
+        size = 1 << 20
+        for form, label, _, attempts, _, peak in measure(size, 2, 1):
+            self.assertLess(peak, size / 10, (form, label))
+
+
+if __name__ == '__main__':
+    main()
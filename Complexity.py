@@ -0,0 +1,154 @@
+""" Empirical complexity assertions for find_parents(), find_parent() and find_next_siblings().
+
+    Every filter combination of the blackbox testcases (FilterSpaces: input_and_r_1..7 of the
+    three classes) is grouped by case and filter kind (string, re, list, True, empty; for
+    find_next_siblings also the kind of the text filter). Each group is timed, without a limit,
+    on documents of growing size: the deep documents of BenchFindParents for the two ancestor
+    methods, the wide documents of BenchFindNextSiblings for find_next_siblings. The growth
+    exponent k of time ~ size**k is the slope of a least-squares fit in log-log space.
+
+    The walks are linear, in depth and in sibling count, so every exponent must stay at or below
+    BOUNDS[method]; a quadratic slip in any filter path fits at about 2 and fails. find_parent
+    stops at the first match, so the groups that match near the start (input_and_r_3 on these
+    documents) fit near 0. A group above its bound is measured once more, keeping the faster
+    time per size, before it counts as a failure: single points are noisy.
+
+    The bound assertions time the whole filter space and a scheduler spike at one size can still
+    bend a fit, so they run only with RUN_COMPLEXITY=1 (on a quiet machine); the default suite
+    keeps the checks of the fitting itself, on synthetic times.
+
+    Usage: python Complexity.py --depths 250 500 1000 2000 --sizes 1000 2000 4000 8000
+"""
+import argparse
+import math
+import os
+import statistics
+import sys
+import unittest
+
+from BenchFindNextSiblings import space_combinations, wide_soup
+from BenchFindParents import best_of, deep_soup
+from FilterSpaces import NEXT_SIBLINGS_SPACES, PARENT_SPACES, PARENTS_SPACES, filter_kind, iter_space
+
+
+BOUNDS = {"find_parents": 1.4, "find_parent": 1.4, "find_next_siblings": 1.4}
+DEPTHS = [250, 500, 1000, 2000]
+SIZES = [1000, 2000, 4000, 8000]
+RUN_BOUNDS = os.environ.get("RUN_COMPLEXITY", "0") == "1"
+
+
+def fit_exponent(sizes, times):
+    """ Slope of log(time) over log(size). """
+    slope, _ = statistics.linear_regression([math.log(n) for n in sizes], [math.log(t) for t in times])
+    return slope
+
+
+def groups(method):
+    """ {(case, kind): [call(start)]} for every filter combination of the method's testcases. """
+    result = {}
+    if method == "find_next_siblings":
+        for case in NEXT_SIBLINGS_SPACES:
+            for name, attrs, text, text_kwarg in space_combinations(case):
+                kind = "%s/%s" % (filter_kind(name), filter_kind(text))
+                result.setdefault((case, kind), []).append(
+                    lambda start, name=name, attrs=attrs, kw={text_kwarg: text}:
+                    start.find_next_siblings(name=name, attrs=attrs, **kw))
+        return result
+    spaces = PARENTS_SPACES if method == "find_parents" else PARENT_SPACES
+    for case, space in spaces.items():
+        for name, attrs in iter_space(space, ["name", "attrs"]):
+            result.setdefault((case, filter_kind(name)), []).append(
+                lambda start, name=name, attrs=attrs: getattr(start, method)(name=name, attrs=attrs))
+    return result
+
+
+def start_element(method, size):
+    if method == "find_next_siblings":
+        return wide_soup(size).a
+    return deep_soup(size).find(string="Elsie")
+
+
+def time_group(calls, starts, repeat):
+    """ Best-of time in ns of running every call of a group, per start element. """
+    return [best_of(lambda: [call(start) for call in calls], repeat)[0] for start in starts]
+
+
+def measure(method, sizes, repeat=3):
+    """ Yield (case, kind, times in ns per size, exponent, within bound). """
+    starts = [start_element(method, n) for n in sizes]
+    for (case, kind), calls in sorted(groups(method).items()):
+        times = time_group(calls, starts, repeat)
+        exponent = fit_exponent(sizes, times)
+        if exponent > BOUNDS[method]:
+            times = [min(t1, t2) for t1, t2 in zip(times, time_group(calls, starts, repeat))]
+            exponent = fit_exponent(sizes, times)
+        yield case, kind, times, exponent, exponent <= BOUNDS[method]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--depths", type=int, nargs="+", default=DEPTHS, help="wrapper levels for the ancestor methods")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="siblings for find_next_siblings")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--methods", nargs="+", default=list(BOUNDS))
+    args = parser.parse_args(argv)
+    failed = 0
+    for method in args.methods:
+        sizes = args.sizes if method == "find_next_siblings" else args.depths
+        header = "%-19s %4s %-16s %s %8s %6s" % ("method", "case", "kind", " ".join("%10s" % ("us@%d" % n) for n in sizes),
+                                             "exponent", "bound")
+        print(header)
+        print("-" * len(header))
+        for case, kind, times, exponent, ok in measure(method, sizes, args.repeat):
+            failed += not ok
+            print("%-19s %4d %-16s %s %8.2f %6.2f%s" % (method, case, kind, " ".join("%10.1f" % (t / 1e3) for t in times),
+                                                     exponent, BOUNDS[method], "" if ok else "  ABOVE BOUND"))
+        print()
+    return 1 if failed else 0
+
+
+class TestComplexity(unittest.TestCase):
+    """ No filter group of the blackbox testcases grows faster than its bound. """
+
+    def assert_bounded(self, method, sizes):
+        for case, kind, times, exponent, ok in measure(method, sizes):
+            self.assertTrue(ok, "%s input_and_r_%d %s: time ~ n**%.2f > n**%.2f (%s ns at %s)" % (
+                method, case, kind, exponent, BOUNDS[method], times, sizes))
+
+    def test_fit_exponent(self):
+        sizes = [100, 200, 400, 800]
+        self.assertAlmostEqual(fit_exponent(sizes, [3 * n for n in sizes]), 1.0)
+        self.assertAlmostEqual(fit_exponent(sizes, [n * n + 0.0 for n in sizes]), 2.0)
+        self.assertAlmostEqual(fit_exponent(sizes, [7.0] * 4), 0.0)
+        quadratic = [n * n * (1.3 if n == 200 else 1.0) for n in sizes]     # one noisy point
+        self.assertGreater(fit_exponent(sizes, quadratic), BOUNDS["find_parents"])
+
+    def test_groups_cover_spaces(self):
+        self.assertEqual(sum(len(c) for c in groups("find_parents").values()),
+                         sum(len(list(iter_space(s, ["name", "attrs"]))) for s in PARENTS_SPACES.values()))
+        kinds = {kind for _, kind in groups("find_parents")}
+        self.assertEqual(kinds, {"string", "re", "list", "True", "empty"})
+
+    @unittest.skipUnless(RUN_BOUNDS, "timing assertions; set RUN_COMPLEXITY=1")
+    def test_quadratic_is_caught(self):
+        starts = [start_element("find_parents", n) for n in [100, 200, 400, 800]]
+        def quadratic(start):
+            return [p.find_parents("div") for p in start.parents]
+        exponent = fit_exponent([100, 200, 400, 800], time_group([quadratic], starts, 3))
+        self.assertGreater(exponent, BOUNDS["find_parents"])
+
+    @unittest.skipUnless(RUN_BOUNDS, "timing assertions; set RUN_COMPLEXITY=1")
+    def test_find_parents(self):
+        self.assert_bounded("find_parents", [100, 200, 400, 800])
+
+    @unittest.skipUnless(RUN_BOUNDS, "timing assertions; set RUN_COMPLEXITY=1")
+    def test_find_parent(self):
+        self.assert_bounded("find_parent", [100, 200, 400, 800])
+
+    @unittest.skipUnless(RUN_BOUNDS, "timing assertions; set RUN_COMPLEXITY=1")
+    def test_find_next_siblings(self):
+        self.assert_bounded("find_next_siblings", [200, 400, 800, 1600])
+
+
+if __name__ == '__main__':
+    sys.exit(main())
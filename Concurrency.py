@@ -0,0 +1,138 @@
+""" Read-only concurrent navigation on a shared soup, from a ThreadPoolExecutor.
+
+    The testcase classes share one parsed fixture (test_html_page_element) across all their
+    tests; a server shares one parsed document across request threads the same way. Every
+    thread here runs the blackbox query mix (every Scenario of the three methods, from the
+    shared fixtures of Scenarios.fixture) and compares each result, element by element, with a
+    single-threaded reference run. The report gives queries per second and the speedup over one
+    thread for 1 to 64 threads.
+
+    With the GIL, pure-Python navigation cannot run in parallel, so throughput stays flat (or
+    drops a little with switching); the numbers only mean "no slower and still correct". On a
+    free-threaded CPython (sys._is_gil_enabled() false) the same run shows real scaling. When a
+    free-threaded interpreter (python3.13t, python3.14t) is on PATH, or given with
+    --free-threaded, the suite is re-run in it and its table printed after this one.
+
+    Usage: python Concurrency.py --threads 1 2 4 8 16 32 64 --rounds 64
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from Scenarios import METHODS, fixture, scenarios
+
+
+THREADS = [1, 2, 4, 8, 16, 32, 64]
+FREE_THREADED = ["python3.14t", "python3.13t"]
+
+
+def gil_enabled():
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+
+def query_mix(methods=METHODS):
+    """ [(scenario, start element)] of every blackbox combination, on the shared fixtures. """
+    soups = {method: fixture(method) for method in methods}
+    return [(s, s.start_element(soups[s.method])) for s in scenarios(methods)]
+
+
+def run_mix(mix):
+    """ Results of one pass over the mix, as element ids. """
+    return [[id(e) for e in scenario.call(start)] for scenario, start in mix]
+
+
+def run_threads(mix, reference, threads, rounds):
+    """ Run `rounds` passes of the mix on `threads` threads; return (seconds, mismatching passes). """
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        passes = list(pool.map(lambda _: run_mix(mix), range(rounds)))
+    seconds = time.perf_counter() - t0
+    return seconds, sum(r != reference for r in passes)
+
+
+def bench(threads_list, rounds, methods=METHODS):
+    """ Yield (threads, queries, seconds, mismatches). """
+    mix = query_mix(methods)
+    reference = run_mix(mix)
+    run_threads(mix, reference, 1, 2)           # warm up
+    for threads in threads_list:
+        seconds, mismatches = run_threads(mix, reference, threads, rounds)
+        yield threads, rounds * len(mix), seconds, mismatches
+
+
+def report(rows):
+    print("%s, GIL %s" % (sys.version.split()[0], "enabled" if gil_enabled() else "disabled"))
+    header = "%8s %9s %10s %12s %8s %10s" % ("threads", "queries", "seconds", "queries/s", "speedup", "mismatch")
+    print(header)
+    print("-" * len(header))
+    base = None
+    failed = 0
+    for threads, queries, seconds, mismatches in rows:
+        rate = queries / seconds
+        base = base or rate
+        failed += mismatches
+        print("%8d %9d %10.3f %12.0f %7.2fx %10d" % (threads, queries, seconds, rate, rate / base, mismatches))
+    return failed
+
+
+def free_threaded_interpreter(explicit=None):
+    """ Path of a free-threaded python other than this one, or None. """
+    candidates = [explicit] if explicit else FREE_THREADED
+    for name in candidates:
+        path = shutil.which(name)
+        if path and os.path.realpath(path) != os.path.realpath(sys.executable):
+            return path
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=THREADS)
+    parser.add_argument("--rounds", type=int, default=64, help="passes over the query mix per thread count; one task per pass, so at least the largest thread count")
+    parser.add_argument("--methods", nargs="+", default=METHODS)
+    parser.add_argument("--free-threaded", metavar="PYTHON", help="free-threaded interpreter to re-run the suite in")
+    parser.add_argument("--no-rerun", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    failed = report(bench(args.threads, args.rounds, args.methods))
+    if not args.no_rerun and gil_enabled():
+        python = free_threaded_interpreter(args.free_threaded)
+        if python is None:
+            print("\nno free-threaded CPython found (%s); no-GIL numbers skipped" % ", ".join(FREE_THREADED))
+        else:
+            print("\n%s:" % python)
+            command = [python, os.path.abspath(__file__), "--no-rerun", "--rounds", str(args.rounds),
+                       "--threads"] + [str(t) for t in args.threads] + ["--methods"] + args.methods
+            failed += subprocess.call(command, cwd=os.path.dirname(os.path.abspath(__file__)))
+    return 1 if failed else 0
+
+
+class TestConcurrency(unittest.TestCase):
+    """ Every thread sees exactly the single-threaded results on the shared fixtures. """
+
+    def test_results_match(self):
+        rows = list(bench([1, 4], 4))
+        self.assertEqual([threads for threads, _, _, _ in rows], [1, 4])
+        self.assertEqual([mismatches for _, _, _, mismatches in rows], [0, 0])
+
+    def test_reference_is_expected(self):
+        mix = query_mix()
+        for (scenario, start), ids in zip(mix, run_mix(mix)):
+            self.assertTrue(scenario.check(scenario.call(start)), scenario)
+            self.assertEqual(len(ids), len(scenario.call(start)))
+
+    def test_mismatch_detected(self):
+        mix = query_mix(["find_parents"])
+        reference = run_mix(mix)
+        reference[0] = reference[0] + [0]
+        _, mismatches = run_threads(mix, reference, 2, 3)
+        self.assertEqual(mismatches, 3)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,236 @@
+""" Seeded synthetic corpus of documents shaped like the testcase fixtures.
+
+    Every document is the Dormouse page with `stories` story blocks in its body. A story block is
+    a chain of wrapper levels alternating div.wrapper_div / p.wrapper (outermost first, as in
+    BenchFindParents.level_tag) around a p.story that holds filler text, a run of a.sister links
+    with text in between, and p.brother siblings after them:
+
+        <div class="wrapper_div"><p class="wrapper"> ... <p class="story">Once upon a time ...
+            <a class="sister" ...>Elsie</a>,
+            <a class="sister" ...>Lacie</a> and ... ;
+            <p class="brother">Tom</p>
+        </p> ... </p></div>
+
+    Per story, the number of wrapper levels is drawn from 1..depth, sisters from 1..breadth and
+    brothers from 0..breadth; every tag of a story block gets `attrs` extra data-* attributes and
+    the filler text is about `text_size` bytes. Documents are written story by story, so a
+    document is never held in memory whole, and each one is reproducible from (seed, index) alone.
+
+    manifest.json records the configuration and, per document, the expected tag / class / string
+    counts plus, per story, the expected results of the three methods from its first sister:
+        find_parents("div", {"class": "wrapper_div"})   -> parents_div
+        find_parent("p")["class"]                       -> ["story"]
+        find_next_siblings("a", {"class": "sister"})    -> next_sisters
+        find_next_siblings("p", {"class": "brother"})   -> next_brothers
+
+    Usage: python Corpus.py OUTDIR --documents 10 --stories 1000 --depth 8 --breadth 6 --seed 1
+"""
+import argparse
+import collections
+import json
+import os
+import random
+import unittest
+
+
+SISTER_NAMES = ["Elsie", "Lacie", "Tillie", "Alice", "Dinah", "Mabel"]
+BROTHER_NAMES = ["Tom", "Bob", "Jim", "Sam"]
+WORDS = ["once", "upon", "a", "time", "there", "were", "three", "little", "sisters", "and", "they",
+         "lived", "at", "the", "bottom", "of", "well", "treacle", "drawing", "muchness"]
+
+HEAD = ("<html><head><title>The Dormouse's story</title></head>\n<body>\n"
+        '<p class="title"><b>The Dormouse\'s story</b></p>\n')
+TAIL = '<p class="story">...</p>\n</body></html>\n'
+TITLE = "The Dormouse's story"
+
+MANIFEST = "manifest.json"
+
+
+class CorpusConfig(object):
+
+    def __init__(self, documents=1, stories=10, depth=4, breadth=3, attrs=0, text_size=80, seed=0):
+        self.documents = documents
+        self.stories = stories
+        self.depth = depth
+        self.breadth = breadth
+        self.attrs = attrs
+        self.text_size = text_size
+        self.seed = seed
+
+    def as_dict(self):
+        return dict(self.__dict__)
+
+
+def document_name(index):
+    return "doc_%05d.html" % index
+
+
+def document_rng(seed, index):
+    """ The RNG of one document; str seeds are hashed deterministically by random.Random. """
+    return random.Random("%s:%d" % (seed, index))
+
+
+def extra_attrs(rng, n):
+    return "".join(' data-k%d="%s"' % (i, rng.choice(WORDS)) for i in range(n))
+
+
+def filler(rng, size):
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def write_story(out, rng, config, story_index, counts):
+    """ Write one story block to out, update the document counts and return the story's expectations. """
+    depth = rng.randint(1, config.depth)
+    sisters = [rng.choice(SISTER_NAMES) for _ in range(rng.randint(1, config.breadth))]
+    brothers = [rng.choice(BROTHER_NAMES) for _ in range(rng.randint(0, config.breadth))]
+
+    closes = []
+    for level in range(depth):
+        if level % 2 == 0:
+            out.write('<div class="wrapper_div"%s>' % extra_attrs(rng, config.attrs))
+            closes.append("</div>")
+            counts["tags"]["div"] += 1
+            counts["classes"]["wrapper_div"] += 1
+        else:
+            out.write('<p class="wrapper"%s>' % extra_attrs(rng, config.attrs))
+            closes.append("</p>")
+            counts["tags"]["p"] += 1
+            counts["classes"]["wrapper"] += 1
+    out.write('\n<p class="story"%s>Once upon a time there were %d little sisters; %s; and their names were\n'
+              % (extra_attrs(rng, config.attrs), len(sisters), filler(rng, config.text_size)))
+    for i, name in enumerate(sisters):
+        out.write('<a href="http://example.com/%s" class="sister" id="link%d_%d"%s>%s</a>%s\n' % (
+            name.lower(), story_index, i, extra_attrs(rng, config.attrs), name,
+            ";" if i == len(sisters) - 1 else (" and" if i == len(sisters) - 2 else ",")))
+        counts["strings"][name] += 1
+    out.write("and they lived at the bottom of a well.\n")
+    for name in brothers:
+        out.write('<p class="brother"%s>%s</p>\n' % (extra_attrs(rng, config.attrs), name))
+        counts["strings"][name] += 1
+    out.write("</p>" + "".join(reversed(closes)) + "\n")
+
+    counts["tags"]["p"] += 1 + len(brothers)
+    counts["tags"]["a"] += len(sisters)
+    counts["classes"]["story"] += 1
+    counts["classes"]["sister"] += len(sisters)
+    counts["classes"]["brother"] += len(brothers)
+    return {"first_sister": sisters[0], "depth": depth, "sisters": len(sisters), "brothers": len(brothers),
+            "parents_div": (depth + 1) // 2, "next_sisters": len(sisters) - 1, "next_brothers": len(brothers)}
+
+
+def write_document(path, config, index):
+    """ Stream document `index` of the corpus to path; return its manifest entry. """
+    rng = document_rng(config.seed, index)
+    counts = {"tags": collections.Counter(html=1, head=1, title=1, body=1, p=2, b=1),
+              "classes": collections.Counter(title=1, story=1),
+              "strings": collections.Counter({TITLE: 2})}
+    stories = []
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as out:
+        out.write(HEAD)
+        for s in range(config.stories):
+            stories.append(write_story(out, rng, config, s, counts))
+        out.write(TAIL)
+    os.replace(tmp, path)
+    return {"file": os.path.basename(path), "bytes": os.path.getsize(path),
+            "tags": dict(counts["tags"]), "classes": dict(counts["classes"]), "strings": dict(counts["strings"]),
+            "stories": stories}
+
+
+def generate(directory, config):
+    """ Write the corpus and its manifest into directory; return the manifest. """
+    os.makedirs(directory, exist_ok=True)
+    documents = [write_document(os.path.join(directory, document_name(i)), config, i) for i in range(config.documents)]
+    manifest = {"config": config.as_dict(), "documents": documents,
+                "bytes": sum(d["bytes"] for d in documents)}
+    with open(os.path.join(directory, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+def load_manifest(directory):
+    with open(os.path.join(directory, MANIFEST)) as f:
+        return json.load(f)
+
+
+def document_paths(directory):
+    """ Paths of the corpus documents, in manifest order. """
+    return [os.path.join(directory, d["file"]) for d in load_manifest(directory)["documents"]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory")
+    parser.add_argument("--documents", type=int, default=10)
+    parser.add_argument("--stories", type=int, default=100, help="story blocks per document")
+    parser.add_argument("--depth", type=int, default=6, help="max wrapper levels around each p.story")
+    parser.add_argument("--breadth", type=int, default=5, help="max a.sister / p.brother per story")
+    parser.add_argument("--attrs", type=int, default=0, help="extra data-* attributes per tag")
+    parser.add_argument("--text-size", type=int, default=80, help="bytes of filler text per story")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    config = CorpusConfig(args.documents, args.stories, args.depth, args.breadth, args.attrs, args.text_size, args.seed)
+    manifest = generate(args.directory, config)
+    print("%d documents, %d bytes, manifest in %s" % (
+        len(manifest["documents"]), manifest["bytes"], os.path.join(args.directory, MANIFEST)))
+
+
+class TestCorpus(unittest.TestCase):
+    """ Generated documents parse into exactly the counts and query results their manifest claims. """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        import tempfile
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.config = CorpusConfig(documents=2, stories=25, depth=7, breadth=4, attrs=2, text_size=40, seed=3)
+        cls.manifest = generate(cls.tmp.name, cls.config)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp.cleanup()
+
+    def parse(self, entry):
+        import bs4
+        with open(os.path.join(self.tmp.name, entry["file"]), encoding="utf-8") as f:
+            return bs4.BeautifulSoup(f.read(), "html.parser")
+
+    def test_counts(self):
+        for entry in self.manifest["documents"]:
+            soup = self.parse(entry)
+            for name, n in entry["tags"].items():
+                self.assertEqual(len(soup.find_all(name)), n, name)
+            for cls, n in entry["classes"].items():
+                self.assertEqual(len(soup.find_all(class_=cls)), n, cls)
+            for string, n in entry["strings"].items():
+                self.assertEqual(len(soup.find_all(string=string)), n, string)
+
+    def test_story_queries(self):
+        for entry in self.manifest["documents"]:
+            soup = self.parse(entry)
+            for story, p in zip(entry["stories"], soup.find_all("p", class_="story")):
+                a = p.find("a", recursive=False)
+                self.assertEqual(a.string, story["first_sister"])
+                self.assertEqual(len(a.find_parents("div", attrs={"class": "wrapper_div"})), story["parents_div"])
+                self.assertEqual(a.find_parent("p")["class"], ["story"])
+                self.assertEqual(len(a.find_next_siblings("a", attrs={"class": "sister"})), story["next_sisters"])
+                self.assertEqual(len(a.find_next_siblings("p", attrs={"class": "brother"})), story["next_brothers"])
+
+    def test_reproducible(self):
+        import tempfile
+        with tempfile.TemporaryDirectory() as d:
+            again = generate(d, self.config)
+            self.assertEqual(again, self.manifest)
+            with open(document_paths(d)[1], "rb") as f1, open(document_paths(self.tmp.name)[1], "rb") as f2:
+                self.assertEqual(f1.read(), f2.read())
+            other = CorpusConfig(**dict(self.config.as_dict(), seed=4))
+            self.assertNotEqual(generate(d, other)["documents"], self.manifest["documents"])
+
+
+if __name__ == '__main__':
+    main()
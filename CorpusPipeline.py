@@ -0,0 +1,179 @@
+""" Process-pool pipeline: parse every document of a corpus once and run a query set on it.
+
+    The queries are the testcase patterns, run from the first a.sister of every p.story (the
+    start element of Corpus.py's manifest expectations):
+        parents_div     find_parents("div", {"class": "wrapper_div"})
+        parent_p        find_parent("p")
+        next_sisters    find_next_siblings("a", {"class": "sister"})
+        next_brothers   find_next_siblings("p", {"class": "brother"})
+
+    Files are handed to the pool one per task, with at most two tasks per worker in flight, so
+    a worker holds one parsed document at a time (it is decomposed before the next one) and the
+    parent never queues the whole directory. Each task returns its per-query match counts, which
+    are summed as they stream back. Workers are replaced after --tasks-per-child documents to
+    return the memory the parser's peak leaves behind.
+
+    For every worker count the report gives docs/s, MB/s and the largest worker RSS, and checks
+    that the totals are the same for every worker count and, with a Corpus.py manifest, equal to
+    the sums of its per-story expectations.
+
+    Usage: python CorpusPipeline.py --corpus DIR --workers 1 2 4 8 --queries parents_div next_sisters
+           python CorpusPipeline.py --documents 200 --stories 200      (generates a temporary corpus)
+"""
+import argparse
+import collections
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import unittest
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import bs4
+
+import Corpus
+from BenchParse import peak_rss_mb
+
+
+QUERIES = {
+    "parents_div": ("find_parents", "div", {"class": "wrapper_div"}),
+    "parent_p": ("find_parent", "p", {}),
+    "next_sisters": ("find_next_siblings", "a", {"class": "sister"}),
+    "next_brothers": ("find_next_siblings", "p", {"class": "brother"}),
+}
+
+
+def start_elements(soup):
+    """ The first a.sister of every p.story. """
+    for story in soup.find_all("p", class_="story"):
+        a = story.find("a", class_="sister", recursive=False)
+        if a is not None:
+            yield a
+
+
+def run_queries(soup, queries):
+    counts = collections.Counter()
+    for start in start_elements(soup):
+        for label in queries:
+            method, name, attrs = QUERIES[label]
+            r = getattr(start, method)(name, attrs)
+            counts[label] += (r is not None) if method == "find_parent" else len(r)
+    return counts
+
+
+def process_file(path, queries):
+    """ Parse one document, run the queries; return (bytes, counts, worker pid, worker peak RSS MB). """
+    with open(path, encoding="utf-8") as f:
+        markup = f.read()
+    soup = bs4.BeautifulSoup(markup, "html.parser")
+    counts = run_queries(soup, queries)
+    soup.decompose()
+    return len(markup.encode("utf-8")), counts, os.getpid(), peak_rss_mb()
+
+
+def pipeline(paths, queries, workers, tasks_per_child=50):
+    """ Yield (bytes, counts, pid, rss) per document as the workers finish them. """
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, max_tasks_per_child=tasks_per_child) as pool:
+        pending = set()
+        paths = iter(paths)
+        for path in paths:
+            pending.add(pool.submit(process_file, path, queries))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in pending:
+            yield future.result()
+
+
+def run(paths, queries, workers, tasks_per_child=50):
+    """ (documents, bytes, seconds, totals, largest worker RSS MB) of one pipeline run. """
+    totals = collections.Counter()
+    documents, size, rss = 0, 0, 0.0
+    t0 = time.perf_counter()
+    for nbytes, counts, _, worker_rss in pipeline(paths, queries, workers, tasks_per_child):
+        documents += 1
+        size += nbytes
+        totals.update(counts)
+        rss = max(rss, worker_rss)
+    return documents, size, time.perf_counter() - t0, totals, rss
+
+
+def expected_totals(manifest, queries):
+    """ Totals the manifest's per-story expectations predict for the queries. """
+    stories = [story for document in manifest["documents"] for story in document["stories"]]
+    per_story = {"parents_div": lambda s: s["parents_div"], "parent_p": lambda s: 1,
+                 "next_sisters": lambda s: s["next_sisters"], "next_brothers": lambda s: s["next_brothers"]}
+    return collections.Counter({label: sum(per_story[label](s) for s in stories) for label in queries})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", help="directory of .html files (a Corpus.py directory is checked against its manifest)")
+    parser.add_argument("--documents", type=int, default=200, help="documents of the generated corpus")
+    parser.add_argument("--stories", type=int, default=200, help="stories per generated document")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--queries", nargs="+", default=list(QUERIES), choices=list(QUERIES))
+    parser.add_argument("--tasks-per-child", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = args.corpus
+        if corpus is None:
+            corpus = tmp
+            Corpus.generate(corpus, Corpus.CorpusConfig(args.documents, args.stories, seed=1))
+        if os.path.exists(os.path.join(corpus, Corpus.MANIFEST)):
+            paths = Corpus.document_paths(corpus)
+            expected = expected_totals(Corpus.load_manifest(corpus), args.queries)
+        else:
+            paths = sorted(os.path.join(corpus, f) for f in os.listdir(corpus) if f.endswith(".html"))
+            expected = None
+
+        header = "%8s %6s %9s %8s %8s %12s  %s" % ("workers", "docs", "seconds", "docs/s", "MB/s", "worker_RSS", "totals")
+        print(header)
+        print("-" * len(header))
+        failed = 0
+        reference = expected
+        for workers in args.workers:
+            documents, size, seconds, totals, rss = run(paths, args.queries, workers, args.tasks_per_child)
+            status = ""
+            if reference is None:
+                reference = totals
+            elif totals != reference:
+                status = "  MISMATCH"
+                failed += 1
+            print("%8d %6d %9.2f %8.1f %8.2f %10.1fMB  %s%s" % (
+                workers, documents, seconds, documents / seconds, size / seconds / (1 << 20), rss,
+                " ".join("%s=%d" % (label, totals[label]) for label in args.queries), status))
+    return 1 if failed else 0
+
+
+class TestCorpusPipeline(unittest.TestCase):
+    """ Streamed totals match the manifest for any worker count. """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.manifest = Corpus.generate(cls.tmp.name, Corpus.CorpusConfig(documents=5, stories=20, depth=5, seed=2))
+        cls.paths = Corpus.document_paths(cls.tmp.name)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp.cleanup()
+
+    def test_single_document(self):
+        nbytes, counts, _, _ = process_file(self.paths[0], list(QUERIES))
+        document = dict(self.manifest, documents=self.manifest["documents"][:1])
+        self.assertEqual(counts, expected_totals(document, list(QUERIES)))
+        self.assertEqual(nbytes, self.manifest["documents"][0]["bytes"])
+
+    def test_pool(self):
+        expected = expected_totals(self.manifest, list(QUERIES))
+        for workers in [1, 2]:
+            documents, size, _, totals, _ = run(self.paths, list(QUERIES), workers, tasks_per_child=2)
+            self.assertEqual((documents, size, totals), (5, self.manifest["bytes"], expected))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,305 @@
+""" Differential check of find_parent() and find_parents() against a plain parent walk.
+
+    For sampled start nodes and (name, attrs) filters of large generated documents (Corpus.py)
+    every check asserts
+
+        element.find_parent(name, attrs)    is manual_parent(element, name, attrs)
+        element.find_parents(name, attrs)   are manual_parents(element, name, attrs), in order
+
+    where the walks follow .parent pointers and match each tag with tag_matches(), the filter
+    rules of NavigationOracle (match_name / match_value), not with SoupStrainer. (find_parent is
+    not compared with find_parents(limit=1): bs4 implements the one with the other.) Filters
+    come from NavigationOracle.random_filter plus a few named callables, so they can be written
+    to JSON.
+
+    The documents are split into chunks of checks that run in a process pool, one pool per
+    document whose workers parse it once, in their initializer; the report gives checks per
+    second. A failing check is minimised: the filter is simplified while it still fails, and the
+    document is cut down to the start node inside its bare ancestor chain; the result is saved
+    as JSON under --out (default counterexamples/).
+
+    Usage: python DifferentialCheck.py --documents 4 --stories 50000 --chunks 16 --checks 20000
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import bs4
+from bs4.element import Tag
+
+import Corpus
+from NavigationOracle import match_name, match_value, random_filter
+
+
+# name filters that are functions, by name, so counterexamples stay serialisable
+CALLABLES = {
+    "has_class": lambda tag: tag.has_attr("class"),
+    "short_name": lambda tag: len(tag.name) <= 2,
+    "wrapper_class": lambda value: value is not None and "wrapper" in value,
+}
+
+
+def encode_filter(f):
+    """ JSON form of a filter value. """
+    if f is True:
+        return {"true": True}
+    if isinstance(f, re.Pattern):
+        return {"re": f.pattern}
+    if isinstance(f, str):
+        return {"string": f}
+    if isinstance(f, dict):
+        return {"attrs": {key: encode_filter(value) for key, value in f.items()}}
+    if isinstance(f, list):
+        return {"list": [encode_filter(v) for v in f]}
+    for key, fn in CALLABLES.items():
+        if f is fn:
+            return {"callable": key}
+    raise ValueError("cannot encode filter %r" % (f,))
+
+
+def decode_filter(spec):
+    kind, value = next(iter(spec.items()))
+    if kind == "true":
+        return True
+    if kind == "re":
+        return re.compile(value)
+    if kind == "string":
+        return value
+    if kind == "attrs":
+        return {key: decode_filter(v) for key, v in value.items()}
+    if kind == "list":
+        return [decode_filter(v) for v in value]
+    return CALLABLES[value]
+
+
+def sample_filter(rng, names, classes):
+    name, attrs = random_filter(rng, names, classes)
+    if rng.random() < 0.1:
+        name = rng.choice([CALLABLES["has_class"], CALLABLES["short_name"]])
+    if rng.random() < 0.05:
+        attrs = {"class": CALLABLES["wrapper_class"]}
+    return name, attrs
+
+
+def tag_matches(tag, name, attrs):
+    """ Whether a parent tag matches (name, attrs), without SoupStrainer. """
+    if callable(name) and not isinstance(name, re.Pattern):
+        if not name(tag):
+            return False
+    elif name == "":
+        if not tag.prefix:          # SoupStrainer: "" matches prefixed tags only
+            return False
+    elif name and not match_name(tag.name, tag.prefix, name):
+        return False
+    for key, f in attrs.items():
+        value = tag.get(key)
+        if isinstance(value, list):
+            value = tuple(value)
+        if not match_value(value, f):
+            return False
+    return True
+
+
+def manual_parent(element, name, attrs):
+    p = element.parent
+    while p is not None:
+        if tag_matches(p, name, attrs):
+            return p
+        p = p.parent
+    return None
+
+
+def manual_parents(element, name, attrs):
+    return [p for p in element.parents if tag_matches(p, name, attrs)]
+
+
+def check(element, name, attrs, walk=manual_parent):
+    """ None when bs4 and the walks give the same elements, else all four answers. """
+    r_parent = element.find_parent(name, attrs)
+    r_walk = walk(element, name, attrs)
+    r_parents = element.find_parents(name, attrs)
+    r_walk_all = manual_parents(element, name, attrs)
+    if r_parent is r_walk and [id(p) for p in r_parents] == [id(p) for p in r_walk_all]:
+        return None
+    return {"find_parent": describe(r_parent), "walk": describe(r_walk),
+            "find_parents": [describe(p) for p in r_parents], "walk_all": [describe(p) for p in r_walk_all]}
+
+
+def describe(tag):
+    if tag is None:
+        return None
+    return "<%s%s>" % (tag.name, "".join(' %s="%s"' % (k, " ".join(v) if isinstance(v, list) else v)
+                                         for k, v in tag.attrs.items()))
+
+
+def bare_chain(element):
+    """ Markup of element inside copies of its ancestors with their attributes but no other children. """
+    ancestors = [p for p in element.parents if not isinstance(p, bs4.BeautifulSoup)]
+    if isinstance(element, Tag):
+        inner = describe(element) + "</%s>" % element.name
+    else:
+        inner = str(element) or "x"
+    for p in ancestors:
+        inner = describe(p) + inner + "</%s>" % p.name
+    return inner
+
+
+def simpler_filters(name, attrs):
+    """ Candidate filters one step simpler than (name, attrs). """
+    for key in attrs:
+        yield name, {k: v for k, v in attrs.items() if k != key}
+    if isinstance(name, list):
+        for i in range(len(name)):
+            yield name[:i] + name[i + 1:], attrs
+    if name is not True:
+        yield True, attrs
+
+
+def minimize(element, name, attrs, walk=manual_parent):
+    """ The smallest failing (markup, name, attrs) reachable from a failing check. """
+    changed = True
+    while changed:
+        changed = False
+        for candidate in simpler_filters(name, attrs):
+            if check(element, *candidate, walk=walk) is not None:
+                name, attrs = candidate
+                changed = True
+                break
+    markup = bare_chain(element)
+    small = bs4.BeautifulSoup(markup, "html.parser")
+    start = list(small.descendants)[-1]
+    if check(start, name, attrs, walk=walk) is None:
+        markup = None           # only fails in the full document
+    return {"markup": markup, "name": encode_filter(name), "attrs": encode_filter(attrs),
+            "results": check(element, name, attrs, walk=walk)}
+
+
+_soups = {}
+
+
+def load(path):
+    """ Parsed document and its nodes, once per worker process. """
+    if path not in _soups:
+        with open(path, encoding="utf-8") as f:
+            soup = bs4.BeautifulSoup(f.read(), "html.parser")
+        _soups.clear()
+        _soups[path] = soup, list(soup.descendants)
+    return _soups[path]
+
+
+def run_chunk(path, seed, checks, out_dir=None, walk=manual_parent):
+    """ Run `checks` sampled checks on one document; return (checks, seconds, counterexamples). """
+    soup, nodes = load(path)
+    rng = random.Random(seed)
+    names = sorted({t.name for t in nodes[:20000] if isinstance(t, Tag)})
+    classes = sorted({c for t in nodes[:20000] if isinstance(t, Tag) for c in t.get("class", [])})
+    found = []
+    t0 = time.perf_counter()
+    for _ in range(checks):
+        i = rng.randrange(len(nodes))
+        element = nodes[i]
+        name, attrs = sample_filter(rng, names, classes)
+        if check(element, name, attrs, walk) is not None:
+            example = minimize(element, name, attrs, walk)
+            example.update(document=os.path.basename(path), seed=seed, node=i)
+            found.append(example)
+    seconds = time.perf_counter() - t0
+    if found and out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+        with open(os.path.join(out_dir, "counterexample_%s_%d.json" % (os.path.basename(path), seed)), "w") as f:
+            json.dump(found, f, indent=1)
+    return checks, seconds, found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", help="existing Corpus.py directory; generated into a temporary one otherwise")
+    parser.add_argument("--documents", type=int, default=2)
+    parser.add_argument("--stories", type=int, default=50000, help="story blocks per document (about 20 nodes each)")
+    parser.add_argument("--chunks", type=int, default=8)
+    parser.add_argument("--checks", type=int, default=20000, help="checks per chunk")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="counterexamples")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = args.corpus
+        if corpus is None:
+            corpus = tmp
+            Corpus.generate(corpus, Corpus.CorpusConfig(args.documents, args.stories, depth=8, breadth=6,
+                                                        attrs=1, seed=args.seed))
+        paths = Corpus.document_paths(corpus)
+        seeds = {}          # path -> seeds of its chunks
+        for i in range(args.chunks):
+            seeds.setdefault(paths[i * len(paths) // args.chunks], []).append(args.seed * 1000003 + i)
+        t0 = time.perf_counter()
+        total, found = 0, []
+        context = multiprocessing.get_context("spawn")
+        for path, path_seeds in seeds.items():
+            # every worker parses the document once, before its first chunk
+            with ProcessPoolExecutor(max_workers=min(args.workers, len(path_seeds)), mp_context=context,
+                                     initializer=load, initargs=(path,)) as pool:
+                futures = [pool.submit(run_chunk, path, seed, args.checks, args.out) for seed in path_seeds]
+                for future in as_completed(futures):
+                    checks, seconds, examples = future.result()
+                    total += checks
+                    found.extend(examples)
+                    print("chunk: %d checks in %.2f s, %.0f checks/s, %d counterexamples" % (
+                        checks, seconds, checks / seconds, len(examples)))
+        wall = time.perf_counter() - t0
+    print("%d checks with %d workers in %.2f s (parsing included): %.0f checks/s, %d counterexamples%s" % (
+        total, args.workers, wall, total / wall, len(found), " saved in %s" % args.out if found else ""))
+    return 1 if found else 0
+
+
+class TestDifferentialCheck(unittest.TestCase):
+    """ The check agrees on a generated document, and a broken walk yields a minimal, saved counterexample. """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.tmp = tempfile.TemporaryDirectory()
+        Corpus.generate(cls.tmp.name, Corpus.CorpusConfig(documents=1, stories=50, depth=6, breadth=3, attrs=1, seed=5))
+        cls.path = Corpus.document_paths(cls.tmp.name)[0]
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp.cleanup()
+
+    def test_agree(self):
+        checks, _, found = run_chunk(self.path, 1, 2000)
+        self.assertEqual((checks, found), (2000, []))
+
+    def test_filter_roundtrip(self):
+        rng = random.Random(2)
+        for _ in range(200):
+            name, attrs = sample_filter(rng, ["a", "div", "p"], ["sister", "wrapper_div"])
+            spec = json.loads(json.dumps([encode_filter(name), encode_filter(attrs)]))
+            self.assertEqual(encode_filter(decode_filter(spec[0])), spec[0])
+            self.assertEqual(encode_filter(decode_filter(spec[1])), spec[1])
+
+    def test_counterexample(self):
+        def broken_walk(element, name, attrs):
+            p = manual_parent(element, name, attrs)
+            return p.parent if p is not None and p.name == "div" else p
+        out = os.path.join(self.tmp.name, "out")
+        _, _, found = run_chunk(self.path, 3, 300, out, walk=broken_walk)
+        self.assertTrue(found)
+        example = found[0]
+        self.assertEqual(example["name"], {"true": True})          # simplified as far as it still fails
+        self.assertLess(len(example["markup"]), 1000)
+        small = bs4.BeautifulSoup(example["markup"], "html.parser")
+        start = list(small.descendants)[-1]
+        self.assertIsNotNone(check(start, decode_filter(example["name"]), decode_filter(example["attrs"]), broken_walk))
+        self.assertTrue(os.listdir(out))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
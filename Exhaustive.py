@@ -0,0 +1,143 @@
+""" Exhaustive mode for the blackbox testcases.
+
+    The input_and_r_N strategies draw from small finite domains (FilterSpaces.*_SPACES). Instead
+    of sampling them with Hypothesis, the classes below enumerate the whole cartesian product of
+    each domain once, in a fixed order, and check every combination exactly once against the
+    same expected_N() the strategies use. The @given testcases stay as they are for fuzzing.
+
+    Usage: python Exhaustive.py        (prints the wall-clock comparison with the @given path)
+           python -m unittest Exhaustive
+"""
+import time
+import unittest
+from hypothesis import settings
+
+import FindNextSiblings
+import FindParent
+import FindParents
+from FilterSpaces import NEXT_SIBLINGS_SPACES, PARENTS_SPACES, PARENT_SPACES, iter_space
+
+
+class TestFindNextSiblingsExhaustive(unittest.TestCase):
+    """ Every combination of TestFindNextSiblings.input_and_r_1..7. """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        FindNextSiblings.TestFindNextSiblings.setUpClass()
+        cls.test_html_page_element = FindNextSiblings.TestFindNextSiblings.test_html_page_element
+
+    def check(self, case):
+        space = NEXT_SIBLINGS_SPACES[case]
+        expected = getattr(FindNextSiblings, "expected_%d" % case)
+        tag = self.test_html_page_element.a # get first tag <a>
+        for (input_name_filter, input_attrs_filter, input_text_filter, input_limit) in iter_space(space, ["name", "attrs", "text", "limit"]):
+            r_exp = expected(input_name_filter, input_attrs_filter, input_text_filter, input_limit)
+            r = tag.find_next_siblings(name=input_name_filter, attrs=input_attrs_filter, limit=input_limit,
+                                       **{space["text_kwarg"]: input_text_filter})
+            self.assertEqual(len(r), r_exp, (input_name_filter, input_attrs_filter, input_text_filter, input_limit))
+
+    def test_exhaustive_1(self): self.check(1)
+    def test_exhaustive_2(self): self.check(2)
+    def test_exhaustive_3(self): self.check(3)
+    def test_exhaustive_4(self): self.check(4)
+    def test_exhaustive_5(self): self.check(5)
+    def test_exhaustive_6(self): self.check(6)
+    def test_exhaustive_7(self): self.check(7)
+
+
+class TestFindParentsExhaustive(unittest.TestCase):
+    """ Every combination of TestFindParents.input_and_r_1..7. """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        FindParents.TestFindParents.setUpClass()
+        cls.test_html_page_element = FindParents.TestFindParents.test_html_page_element
+
+    def check(self, case):
+        space = PARENTS_SPACES[case]
+        expected = getattr(FindParents, "expected_%d" % case)
+        for (start_tag_name, input_name_filter, input_attrs_filter, input_limit) in iter_space(space, ["start", "name", "attrs", "limit"]):
+            r_exp = expected(start_tag_name, input_name_filter, input_attrs_filter, input_limit)
+            tag = self.test_html_page_element.find(string=start_tag_name)
+            r = tag.find_parents(name=input_name_filter, attrs=input_attrs_filter, limit=input_limit)
+            self.assertEqual(len(r), r_exp, (start_tag_name, input_name_filter, input_attrs_filter, input_limit))
+
+    def test_exhaustive_1(self): self.check(1)
+    def test_exhaustive_2(self): self.check(2)
+    def test_exhaustive_3(self): self.check(3)
+    def test_exhaustive_4(self): self.check(4)
+    def test_exhaustive_5(self): self.check(5)
+    def test_exhaustive_6(self): self.check(6)
+    def test_exhaustive_7(self): self.check(7)
+
+
+class TestFindParentExhaustive(unittest.TestCase):
+    """ Every combination of TestFindParent.input_and_r_1..7. """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        FindParent.TestFindParent.setUpClass()
+        cls.test_html_page_element = FindParent.TestFindParent.test_html_page_element
+
+    def check(self, case):
+        space = PARENT_SPACES[case]
+        expected = getattr(FindParent, "expected_%d" % case)
+        for (start_tag_name, input_name_filter, input_attrs_filter) in iter_space(space, ["start", "name", "attrs"]):
+            r_exp = expected(start_tag_name, input_name_filter, input_attrs_filter)
+            tag = self.test_html_page_element.find(string=start_tag_name)
+            r = tag.find_parent(name=input_name_filter, attrs=input_attrs_filter)
+            r_c = r['class'][0] if not r==None else None
+            self.assertEqual(r_c, r_exp, (start_tag_name, input_name_filter, input_attrs_filter))
+
+    def test_exhaustive_1(self): self.check(1)
+    def test_exhaustive_2(self): self.check(2)
+    def test_exhaustive_3(self): self.check(3)
+    def test_exhaustive_4(self): self.check(4)
+    def test_exhaustive_5(self): self.check(5)
+    def test_exhaustive_6(self): self.check(6)
+    def test_exhaustive_7(self): self.check(7)
+
+
+COMPARISONS = [
+    ("find_next_siblings", "FindNextSiblings.TestFindNextSiblings", TestFindNextSiblingsExhaustive,
+     NEXT_SIBLINGS_SPACES, ["name", "attrs", "text", "limit"]),
+    ("find_parents", "FindParents.TestFindParents", TestFindParentsExhaustive,
+     PARENTS_SPACES, ["start", "name", "attrs", "limit"]),
+    ("find_parent", "FindParent.TestFindParent", TestFindParentExhaustive,
+     PARENT_SPACES, ["start", "name", "attrs"]),
+]
+
+
+def timed_run(suite):
+    result = unittest.TestResult()
+    t0 = time.perf_counter()
+    suite.run(result)
+    return time.perf_counter() - t0, result
+
+
+def main():
+    loader = unittest.defaultTestLoader
+    print("%-20s %5s %12s %12s %12s %12s %9s" % (
+        "method", "case", "combinations", "hyp_examples", "given_s", "exhaust_s", "saved"))
+    totals = [0.0, 0.0]
+    failed = False
+    for method, given_class, exhaustive_class, spaces, fields in COMPARISONS:
+        for case, space in spaces.items():
+            combinations = 1
+            for f in fields:
+                combinations *= len(space[f])
+            given_s, given_result = timed_run(loader.loadTestsFromName("%s.test_black_%d" % (given_class, case)))
+            exhaust_s, exhaust_result = timed_run(loader.loadTestsFromName("test_exhaustive_%d" % case, exhaustive_class))
+            failed = failed or not (given_result.wasSuccessful() and exhaust_result.wasSuccessful())
+            totals[0] += given_s
+            totals[1] += exhaust_s
+            print("%-20s %5d %12d %12d %12.3f %12.3f %8.0f%%" % (
+                method, case, combinations, settings.default.max_examples, given_s, exhaust_s,
+                100 * (1 - exhaust_s / given_s)))
+    print("total: @given %.2f s, exhaustive %.2f s, saved %.2f s (%.0f%%)" % (
+        totals[0], totals[1], totals[0] - totals[1], 100 * (1 - totals[1] / totals[0])))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,184 @@
+""" Cost matrix of the filter types, in ns per element checked.
+
+    The testcase docstrings allow a name / attrs / text filter to be a string, an re pattern, a
+    list, a function or True, and test_white_1 passes a prebuilt SoupStrainer. Every type runs in
+    every position of the three methods, alone (the other two positions unset):
+
+        name    find_*(name=f)                  SoupStrainer(name=f) passed as name
+        attrs   find_*(attrs={"class": f})      SoupStrainer(attrs={"class": f}) passed as name
+        text    find_*(True, text=f)            SoupStrainer(True, text=f) passed as name
+
+    A text filter alone only selects NavigableStrings, which are never ancestors, so the text
+    position goes with name=True and matches the .string of tags. On the ancestor chain that is
+    expensive by itself: Tag.string follows single-child tags down, so every wrapper level costs
+    a walk to "Elsie" whatever the filter type.
+
+    Each filter is written to select the same elements as the plain string: regexes of growing
+    complexity (anchored, case-insensitive, a 50-way alternation, unanchored), lists of 1 to 1000
+    entries with the hit last, and a function comparing the value. The ancestor methods start
+    from "Elsie" in a BenchFindParents deep document (hits: div, wrapper_div, Elsie), and
+    find_next_siblings from the first <a> of a BenchFindNextSiblings wide document (hits: p,
+    brother, Tom). Cost is the call time divided by the elements the walk visited, so it is the
+    price of one match check plus the walk step; find_parent stops at its first match, so its
+    columns are mostly the per-call overhead.
+
+    Usage: python FilterCosts.py --depth 200 --siblings 800 --lists 1 10 100 1000
+"""
+import argparse
+import re
+import unittest
+import warnings
+from bs4.element import SoupStrainer
+
+from BenchFindNextSiblings import wide_soup
+from BenchFindParents import best_of, deep_soup, elements_visited
+
+
+METHODS = ["find_parents", "find_parent", "find_next_siblings"]
+TARGETS = ["name", "attrs", "text"]
+LIST_SIZES = [1, 10, 100, 1000]
+
+HITS = {"find_parents": {"name": "div", "attrs": "wrapper_div", "text": "Elsie"},
+        "find_next_siblings": {"name": "p", "attrs": "brother", "text": "Tom"}}
+HITS["find_parent"] = HITS["find_parents"]
+
+
+def misses(n):
+    return ["miss%d" % i for i in range(n)]
+
+
+def function_filter(target, hit):
+    if target == "name":
+        return lambda tag: tag.name == hit
+    return lambda value: value == hit
+
+
+def filter_variants(target, hit, list_sizes=LIST_SIZES):
+    """ [(label, filter)] of every filter type, each selecting what the string `hit` selects. """
+    variants = [("string", hit),
+                ("re ^v$", re.compile("^%s$" % re.escape(hit))),
+                ("re (?i)", re.compile("(?i)^%s$" % re.escape(hit.upper()))),
+                ("re 50-way", re.compile("^(?:%s)$" % "|".join(misses(49) + [re.escape(hit)]))),
+                ("re search", re.compile(re.escape(hit))),
+                ]
+    variants += [("list %d" % n, misses(n - 1) + [hit]) for n in list_sizes]
+    variants += [("function", function_filter(target, hit)),
+                 ("True", True),
+                 ("SoupStrainer", strainer(target, hit)),
+                 ]
+    return variants
+
+
+def strainer(target, f):
+    if target == "name":
+        return SoupStrainer(name=f)
+    if target == "attrs":
+        return SoupStrainer(attrs={"class": f})
+    return SoupStrainer(True, text=f)
+
+
+def query(method, target, f):
+    """ fn(start) calling method with f in the target position (a SoupStrainer always as name). """
+    if isinstance(f, SoupStrainer):
+        kwargs = {"name": f}
+    elif target == "name":
+        kwargs = {"name": f}
+    elif target == "attrs":
+        kwargs = {"attrs": {"class": f}}
+    else:
+        kwargs = {"name": True, "text": f}
+    return lambda start: getattr(start, method)(**kwargs)
+
+
+def start_element(method, depth, siblings):
+    if method == "find_next_siblings":
+        return wide_soup(siblings).a
+    return deep_soup(depth).find(string="Elsie")
+
+
+def as_list(r):
+    if r is None:
+        return []
+    return r if isinstance(r, list) else [r]
+
+
+def bench(methods, targets, depth, siblings, list_sizes, repeat):
+    """ Yield (method, target, label, elements visited, call ns). """
+    for method in methods:
+        start = start_element(method, depth, siblings)
+        walk = list(start.next_siblings if method == "find_next_siblings" else start.parents)
+        index = {id(e): i for i, e in enumerate(walk)}
+        for target in targets:
+            for label, f in filter_variants(target, HITS[method][target], list_sizes):
+                call = query(method, target, f)
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", DeprecationWarning)     # text= on bs4 >= 4.11
+                    ns, r = best_of(lambda: call(start), repeat)
+                visited = elements_visited(index, as_list(r), 1 if method == "find_parent" else None)
+                yield method, target, label, visited, ns
+
+
+def report(rows):
+    """ Print one ns/check matrix: filter types down, (method, target) across. """
+    cells = {}
+    labels = []
+    columns = []
+    for method, target, label, visited, ns in rows:
+        cells[label, (method, target)] = ns / max(visited, 1)
+        if label not in labels:
+            labels.append(label)
+        if (method, target) not in columns:
+            columns.append((method, target))
+    print("ns per element checked")
+    names = ["%s.%s" % (m.replace("find_", ""), t) for m, t in columns]
+    header = "%-13s" % "filter" + "".join(" %*s" % (max(len(n), 10), n) for n in names)
+    print(header)
+    print("-" * len(header))
+    for label in labels:
+        print("%-13s" % label + "".join(" %*.0f" % (max(len(n), 10), cells[label, column])
+                                        for n, column in zip(names, columns)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--methods", nargs="+", default=METHODS)
+    parser.add_argument("--targets", nargs="+", default=TARGETS)
+    parser.add_argument("--depth", type=int, default=200, help="wrapper levels above the ancestor start")
+    parser.add_argument("--siblings", type=int, default=800, help="siblings after the find_next_siblings start")
+    parser.add_argument("--lists", type=int, nargs="+", default=LIST_SIZES, help="list filter lengths")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    report(bench(args.methods, args.targets, args.depth, args.siblings, args.lists, args.repeat))
+
+
+class TestFilterCosts(unittest.TestCase):
+    """ Every filter type but True selects the same elements as the plain string, in every position. """
+
+    def test_equivalent(self):
+        for method in METHODS:
+            start = start_element(method, 20, 80)
+            for target in TARGETS:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", DeprecationWarning)
+                    variants = filter_variants(target, HITS[method][target], [1, 10, 100])
+                    expected = as_list(query(method, target, variants[0][1])(start))
+                    self.assertTrue(expected, (method, target))
+                    for label, f in variants[1:]:
+                        r = as_list(query(method, target, f)(start))
+                        if label == "True":
+                            self.assertGreaterEqual(len(r), len(expected))
+                        else:
+                            self.assertEqual([id(e) for e in r], [id(e) for e in expected], (method, target, label))
+
+    def test_report(self):
+        import contextlib
+        import io
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            report(bench(["find_parent"], ["name"], 10, 40, [1, 2], 1))
+        self.assertIn("list 2", out.getvalue())
+        self.assertIn("parent.name", out.getvalue())
+
+
+if __name__ == '__main__':
+    main()
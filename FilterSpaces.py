@@ -0,0 +1,121 @@
+""" Filter values used by the blackbox testcases, shared by the benchmark modules.
+
+    A filter is labelled with one of the kinds listed in the testcase docstrings:
+    string, re, list, function, True, or empty (empty string / empty list).
+"""
+import itertools
+import re
+
+
+FILTER_KINDS = ["string", "re", "list", "function", "True", "empty"]
+
+
+def filter_kind(f):
+    """ Return the kind label of a name/attrs/text filter. """
+    if f is True:
+        return "True"
+    if isinstance(f, re.Pattern):
+        return "re"
+    if isinstance(f, (str, list)) and len(f) == 0:
+        return "empty"
+    if isinstance(f, str):
+        return "string"
+    if isinstance(f, list):
+        return "list"
+    if callable(f):
+        return "function"
+    raise ValueError("unknown filter: %r" % (f,))
+
+
+def freeze(value):
+    """ Hashable key of a filter value, e.g. to cache something per filter. """
+    if isinstance(value, list):
+        return ("list",) + tuple(freeze(v) for v in value)
+    if isinstance(value, dict):
+        return ("dict",) + tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    return value
+
+
+# name filters of TestFindParents, one or two per kind
+PARENTS_NAME_FILTERS = ["div",
+                        re.compile("^div"),
+                        ["div"], ["p", "div"],
+                        True,
+                        "", [],
+                        ]
+
+
+# name filters of TestFindNextSiblings that match some / no sibling tags
+NEXT_SIBLINGS_NAME_FILTERS = ["a", "p",
+                              re.compile("^a"), re.compile("^p"),
+                              ["a"], ["p"],
+                              True,
+                              ]
+NEXT_SIBLINGS_NAME_FILTERS_NOT_EXIST = ["a_not_exist", "p_not_exist",
+                                        re.compile("^a_not_exist"), re.compile("^p_not_exist"),
+                                        ["a_not_exist"], ["p_not_exist"],
+                                        ]
+NEXT_SIBLINGS_TEXT_FILTERS = ["Lacie", re.compile("^Lacie"), ["Lacie"], True]
+NEXT_SIBLINGS_TEXT_FILTERS_NOT_EXIST = ["Lacie_not_exist", re.compile("^Lacie_not_exist"), ["Lacie_not_exist"]]
+EMPTY_FILTERS = ["", []]
+
+# finite domains drawn by TestFindNextSiblings.input_and_r_N, keyed by N;
+# "text_kwarg" is the keyword test_black_N passes the text filter with
+NEXT_SIBLINGS_SPACES = {
+    1: dict(name=NEXT_SIBLINGS_NAME_FILTERS, attrs=[{"class": "sister"}],
+            text=NEXT_SIBLINGS_TEXT_FILTERS, text_kwarg="text", limit=range(1, 6)),
+    2: dict(name=NEXT_SIBLINGS_NAME_FILTERS, attrs=[{"class": "sister"}],
+            text=NEXT_SIBLINGS_TEXT_FILTERS_NOT_EXIST, text_kwarg="text", limit=range(1, 6)),
+    3: dict(name=NEXT_SIBLINGS_NAME_FILTERS, attrs=[{"class": "sister_not_exist"}],
+            text=NEXT_SIBLINGS_TEXT_FILTERS_NOT_EXIST, text_kwarg="text", limit=range(1, 6)),
+    4: dict(name=NEXT_SIBLINGS_NAME_FILTERS_NOT_EXIST, attrs=[{"class": "sister_not_exist"}],
+            text=NEXT_SIBLINGS_TEXT_FILTERS_NOT_EXIST, text_kwarg="text", limit=range(1, 6)),
+    5: dict(name=EMPTY_FILTERS, attrs=[{"class": "sister"}],
+            text=NEXT_SIBLINGS_TEXT_FILTERS, text_kwarg="text", limit=range(1, 6)),
+    6: dict(name=NEXT_SIBLINGS_NAME_FILTERS, attrs=[{}],
+            text=NEXT_SIBLINGS_TEXT_FILTERS, text_kwarg="text", limit=range(1, 6)),
+    7: dict(name=NEXT_SIBLINGS_NAME_FILTERS, attrs=[{"class": "sister"}],
+            text=EMPTY_FILTERS, text_kwarg="string", limit=range(1, 6)),
+}
+
+# finite domains drawn by TestFindParents.input_and_r_N and TestFindParent.input_and_r_N;
+# a list filter is a prefix of a permutation of the two names (num_attr in the strategies)
+START_TAG_NAMES = ["Elsie", "Lacie", "Tillie"]
+PARENTS_NAME_FILTERS_MATCH = ["p", "div",
+                              re.compile("^p"), re.compile("^div"),
+                              ["p"], ["div"], ["p", "div"], ["div", "p"],
+                              True,
+                              ]
+PARENTS_NAME_FILTERS_NOT_EXIST = ["p_not_exist", "div_not_exist",
+                                  re.compile("^p_not_exist"), re.compile("^div_not_exist"),
+                                  ["p_not_exist"], ["div_not_exist"],
+                                  ["p_not_exist", "div_not_exist"], ["div_not_exist", "p_not_exist"],
+                                  ]
+
+PARENTS_SPACES = {
+    1: dict(start=START_TAG_NAMES, name=PARENTS_NAME_FILTERS_MATCH, attrs=[{"class": "wrapper_div"}], limit=range(1, 11)),
+    2: dict(start=START_TAG_NAMES, name=PARENTS_NAME_FILTERS_MATCH, attrs=[{"class": "class_not_exits"}], limit=range(1, 11)),
+    3: dict(start=START_TAG_NAMES, name=PARENTS_NAME_FILTERS_MATCH, attrs=[{}], limit=range(1, 11)),
+    4: dict(start=START_TAG_NAMES, name=PARENTS_NAME_FILTERS_NOT_EXIST, attrs=[{"class": "class_not_exits"}], limit=range(1, 11)),
+    5: dict(start=START_TAG_NAMES, name=PARENTS_NAME_FILTERS_NOT_EXIST, attrs=[{}], limit=range(1, 11)),
+    6: dict(start=START_TAG_NAMES, name=EMPTY_FILTERS, attrs=[{"class": "class_not_exits"}], limit=range(1, 11)),
+    7: dict(start=START_TAG_NAMES, name=EMPTY_FILTERS, attrs=[{}], limit=range(1, 11)),
+}
+
+# TestFindParent draws one-element lists only where num_attr is fixed to 1
+PARENT_NAME_FILTERS_MATCH = [f for f in PARENTS_NAME_FILTERS_MATCH if not (isinstance(f, list) and len(f) > 1)]
+
+PARENT_SPACES = {
+    1: dict(start=START_TAG_NAMES, name=PARENT_NAME_FILTERS_MATCH, attrs=[{"class": "wrapper_div_2"}]),
+    2: dict(start=START_TAG_NAMES, name=PARENT_NAME_FILTERS_MATCH, attrs=[{"class": "class_not_exits"}]),
+    3: dict(start=START_TAG_NAMES, name=PARENT_NAME_FILTERS_MATCH, attrs=[{}]),
+    4: dict(start=START_TAG_NAMES, name=PARENTS_NAME_FILTERS_NOT_EXIST, attrs=[{"class": "class_not_exits"}]),
+    5: dict(start=START_TAG_NAMES, name=PARENTS_NAME_FILTERS_NOT_EXIST, attrs=[{}]),
+    6: dict(start=START_TAG_NAMES, name=EMPTY_FILTERS, attrs=[{"class": "class_not_exits"}]),
+    7: dict(start=START_TAG_NAMES, name=EMPTY_FILTERS, attrs=[{}]),
+}
+
+
+def iter_space(space, fields):
+    """ Yield every combination of the given fields of a space, as tuples in field order. """
+    return itertools.product(*[space[f] for f in fields])
@@ -5,8 +5,92 @@ from hypothesis.internal.conjecture.utils import boolean
 from hypothesis.strategies import *
 import re
 
+import FixtureCache
+from Profiling import profile_tests
+from Instrumentation import VisitCounter
+from Strategies import (EMPTY_FILTERS, LACIE_TEXTS, LACIE_TEXTS_NOT_EXIST, LIMITS_5, SIBLING_NAMES,
+                        SIBLING_NAMES_NOT_EXIST, SISTER_ATTRS, SISTER_ATTRS_NOT_EXIST)
+
 from bs4.element import SoupStrainer
 
+# Expected results of the blackbox testcases, shared by the input_and_r_N strategies
+# and the exhaustive mode (Exhaustive.py).
+
+def expected_1(input_name_filter, input_attrs_filter, input_text_filter, input_limit):
+    # set expected result based on attrs_filter
+    if ( input_name_filter=="a" or 
+         input_name_filter==re.compile("^a") or 
+         input_name_filter==["a"] ):
+        if input_text_filter==True: r_exp=2
+        else: r_exp=1
+    elif input_name_filter==True:
+        if input_text_filter==True: r_exp=2
+        else: r_exp=1
+    else: r_exp=0
+    # set expected result to input_limit if 0<input_limit<r_exp 
+    if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+    return r_exp
+
+def expected_2(input_name_filter, input_attrs_filter, input_text_filter, input_limit):
+    # set expected result based on attrs_filter
+    r_exp=0
+    # set expected result to input_limit if 0<input_limit<r_exp 
+    if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+    return r_exp
+
+def expected_3(input_name_filter, input_attrs_filter, input_text_filter, input_limit):
+    # set expected result based on attrs_filter
+    r_exp=0
+    # set expected result to input_limit if 0<input_limit<r_exp 
+    if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+    return r_exp
+
+def expected_4(input_name_filter, input_attrs_filter, input_text_filter, input_limit):
+    # set expected result based on attrs_filter
+    r_exp=0
+    # set expected result to input_limit if 0<input_limit<r_exp 
+    if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+    return r_exp
+
+def expected_5(input_name_filter, input_attrs_filter, input_text_filter, input_limit):
+    # set expected result based on attrs_filter
+    if input_name_filter=="" :r_exp=0 
+    elif input_text_filter==True: r_exp=2
+    else: r_exp=1
+    # set expected result to input_limit if 0<input_limit<r_exp 
+    if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+    return r_exp
+
+def expected_6(input_name_filter, input_attrs_filter, input_text_filter, input_limit):
+    # set expected result based on attrs_filter
+    if ( input_name_filter=="a" or 
+         input_name_filter==re.compile("^a") or 
+         input_name_filter==["a"] ):
+        if input_text_filter==True: r_exp=2
+        else: r_exp=1
+    elif input_name_filter==True:
+        if input_text_filter==True: r_exp=4
+        else: r_exp=1
+    else: 
+        if input_text_filter==True: r_exp=2
+        else: r_exp=0
+    # set expected result to input_limit if 0<input_limit<r_exp 
+    if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+    return r_exp
+
+def expected_7(input_name_filter, input_attrs_filter, input_text_filter, input_limit):
+    # set expected result based on attrs_filter
+    if input_name_filter==True: r_exp=2
+    elif ( input_name_filter=="a" or 
+         input_name_filter==re.compile("^a") or 
+         input_name_filter==["a"] ): r_exp=2
+    else: r_exp=0
+    # set expected result to input_limit if 0<input_limit<r_exp 
+    if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+    return r_exp
+
+
+@profile_tests
 class TestFindNextSiblings(unittest.TestCase):   
     """
     This class contains all blackbox testcases for function find_next_siblings() of class BeautifulSoup(inherited from class PageElement)
@@ -29,7 +113,7 @@ class TestFindNextSiblings(unittest.TestCase):
 
     @classmethod
     def setUpClass(cls) -> None:
-        cls.test_html_page_element = bs4.BeautifulSoup(
+        cls.test_html_page_element = FixtureCache.parse(
         """
         <html><head><title>The Dormouse's story</title></head>
         <body>
@@ -58,32 +142,12 @@ class TestFindNextSiblings(unittest.TestCase):
     
     @composite
     def input_and_r_1(draw):
-        num_attr = 1
-        input_name_filter = draw(one_of([sampled_from(["a", "p"]),  # string filter
-                                         sampled_from([re.compile("^a"), re.compile("^p")]), # re filter
-                                         permutations(["a", "p"]).map(lambda x: x[:num_attr]), # list of filter
-                                         sampled_from([True]), # boolean True
-                                         ]))
-        input_attrs_filter = draw(dictionaries(keys=sampled_from(["class"]), values=sampled_from(["sister"]), min_size=1))
-        input_text_filter = draw(one_of([sampled_from(["Lacie"]),  # string filter
-                                         sampled_from([re.compile("^Lacie")]), # re filter
-                                         permutations(["Lacie"]).map(lambda x: x[:num_attr]), # list of filter
-                                         sampled_from([True]), # boolean True
-                                         ]))
-        input_limit = draw(integers(min_value=1, max_value=5))     # seems that behavior is not deterministic if limit<=0                              
-
-        # set expected result based on attrs_filter
-        if ( input_name_filter=="a" or 
-             input_name_filter==re.compile("^a") or 
-             input_name_filter==["a"] ):
-            if input_text_filter==True: r_exp=2
-            else: r_exp=1
-        elif input_name_filter==True:
-            if input_text_filter==True: r_exp=2
-            else: r_exp=1
-        else: r_exp=0
-        # set expected result to input_limit if 0<input_limit<r_exp 
-        if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+        input_name_filter = draw(SIBLING_NAMES)
+        input_attrs_filter = draw(SISTER_ATTRS)
+        input_text_filter = draw(LACIE_TEXTS)
+        input_limit = draw(LIMITS_5)
+
+        r_exp = expected_1(input_name_filter, input_attrs_filter, input_text_filter, input_limit)
 
         return (input_name_filter, input_attrs_filter, input_text_filter, input_limit, r_exp)
     @given(input=input_and_r_1())
@@ -102,24 +166,12 @@ class TestFindNextSiblings(unittest.TestCase):
 
     @composite
     def input_and_r_2(draw):
-        num_attr = 1
-        input_name_filter = draw(one_of([sampled_from(["a", "p"]),  # string filter
-                                         sampled_from([re.compile("^a"), re.compile("^p")]), # re filter
-                                         permutations(["a", "p"]).map(lambda x: x[:num_attr]), # list of filter
-                                         sampled_from([True]), # boolean True
-                                         ]))
-        input_attrs_filter = draw(dictionaries(keys=sampled_from(["class"]), values=sampled_from(["sister"]), min_size=1))
-        input_text_filter = draw(one_of([sampled_from(["Lacie_not_exist"]),  # string filter
-                                         sampled_from([re.compile("^Lacie_not_exist")]), # re filter
-                                         permutations(["Lacie_not_exist"]).map(lambda x: x[:num_attr]), # list of filter
-                                         # sampled_from([True]), # boolean True
-                                         ]))
-        input_limit = draw(integers(min_value=1, max_value=5))     # seems that behavior is not deterministic if limit<=0                              
-
-        # set expected result based on attrs_filter
-        r_exp=0
-        # set expected result to input_limit if 0<input_limit<r_exp 
-        if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+        input_name_filter = draw(SIBLING_NAMES)
+        input_attrs_filter = draw(SISTER_ATTRS)
+        input_text_filter = draw(LACIE_TEXTS_NOT_EXIST)
+        input_limit = draw(LIMITS_5)
+
+        r_exp = expected_2(input_name_filter, input_attrs_filter, input_text_filter, input_limit)
 
         return (input_name_filter, input_attrs_filter, input_text_filter, input_limit, r_exp)
     @given(input=input_and_r_2())
@@ -138,24 +190,12 @@ class TestFindNextSiblings(unittest.TestCase):
 
     @composite
     def input_and_r_3(draw):
-        num_attr = 1
-        input_name_filter = draw(one_of([sampled_from(["a", "p"]),  # string filter
-                                         sampled_from([re.compile("^a"), re.compile("^p")]), # re filter
-                                         permutations(["a", "p"]).map(lambda x: x[:num_attr]), # list of filter
-                                         sampled_from([True]), # boolean True
-                                         ]))
-        input_attrs_filter = draw(dictionaries(keys=sampled_from(["class"]), values=sampled_from(["sister_not_exist"]), min_size=1))
-        input_text_filter = draw(one_of([sampled_from(["Lacie_not_exist"]),  # string filter
-                                         sampled_from([re.compile("^Lacie_not_exist")]), # re filter
-                                         permutations(["Lacie_not_exist"]).map(lambda x: x[:num_attr]), # list of filter
-                                         # sampled_from([True]), # boolean True
-                                         ]))
-        input_limit = draw(integers(min_value=1, max_value=5))     # seems that behavior is not deterministic if limit<=0                              
-
-        # set expected result based on attrs_filter
-        r_exp=0
-        # set expected result to input_limit if 0<input_limit<r_exp 
-        if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+        input_name_filter = draw(SIBLING_NAMES)
+        input_attrs_filter = draw(SISTER_ATTRS_NOT_EXIST)
+        input_text_filter = draw(LACIE_TEXTS_NOT_EXIST)
+        input_limit = draw(LIMITS_5)
+
+        r_exp = expected_3(input_name_filter, input_attrs_filter, input_text_filter, input_limit)
 
         return (input_name_filter, input_attrs_filter, input_text_filter, input_limit, r_exp)
     @given(input=input_and_r_3())
@@ -174,24 +214,12 @@ class TestFindNextSiblings(unittest.TestCase):
 
     @composite
     def input_and_r_4(draw):
-        num_attr = 1
-        input_name_filter = draw(one_of([sampled_from(["a_not_exist", "p_not_exist"]),  # string filter
-                                         sampled_from([re.compile("^a_not_exist"), re.compile("^p_not_exist")]), # re filter
-                                         permutations(["a_not_exist", "p_not_exist"]).map(lambda x: x[:num_attr]), # list of filter
-                                         # sampled_from([True]), # boolean True
-                                         ]))
-        input_attrs_filter = draw(dictionaries(keys=sampled_from(["class"]), values=sampled_from(["sister_not_exist"]), min_size=1))
-        input_text_filter = draw(one_of([sampled_from(["Lacie_not_exist"]),  # string filter
-                                         sampled_from([re.compile("^Lacie_not_exist")]), # re filter
-                                         permutations(["Lacie_not_exist"]).map(lambda x: x[:num_attr]), # list of filter
-                                         # sampled_from([True]), # boolean True
-                                         ]))
-        input_limit = draw(integers(min_value=1, max_value=5))     # seems that behavior is not deterministic if limit<=0                              
-
-        # set expected result based on attrs_filter
-        r_exp=0
-        # set expected result to input_limit if 0<input_limit<r_exp 
-        if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+        input_name_filter = draw(SIBLING_NAMES_NOT_EXIST)
+        input_attrs_filter = draw(SISTER_ATTRS_NOT_EXIST)
+        input_text_filter = draw(LACIE_TEXTS_NOT_EXIST)
+        input_limit = draw(LIMITS_5)
+
+        r_exp = expected_4(input_name_filter, input_attrs_filter, input_text_filter, input_limit)
 
         return (input_name_filter, input_attrs_filter, input_text_filter, input_limit, r_exp)
     @given(input=input_and_r_4())
@@ -210,24 +238,12 @@ class TestFindNextSiblings(unittest.TestCase):
 
     @composite
     def input_and_r_5(draw):
-        num_attr = 1
-        input_name_filter = draw(one_of([sampled_from([""]),  # string filter
-                                         sampled_from([[]]), # list of filter
-                                         ]))
-        input_attrs_filter = draw(dictionaries(keys=sampled_from(["class"]), values=sampled_from(["sister"]), min_size=1))
-        input_text_filter = draw(one_of([sampled_from(["Lacie"]),  # string filter
-                                         sampled_from([re.compile("^Lacie")]), # re filter
-                                         permutations(["Lacie"]).map(lambda x: x[:num_attr]), # list of filter
-                                         sampled_from([True]), # boolean True
-                                         ]))
-        input_limit = draw(integers(min_value=1, max_value=5))     # seems that behavior is not deterministic if limit<=0                              
-
-        # set expected result based on attrs_filter
-        if input_name_filter=="" :r_exp=0 
-        elif input_text_filter==True: r_exp=2
-        else: r_exp=1
-        # set expected result to input_limit if 0<input_limit<r_exp 
-        if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+        input_name_filter = draw(EMPTY_FILTERS)
+        input_attrs_filter = draw(SISTER_ATTRS)
+        input_text_filter = draw(LACIE_TEXTS)
+        input_limit = draw(LIMITS_5)
+
+        r_exp = expected_5(input_name_filter, input_attrs_filter, input_text_filter, input_limit)
 
         return (input_name_filter, input_attrs_filter, input_text_filter, input_limit, r_exp)
     @given(input=input_and_r_5())
@@ -245,34 +261,12 @@ class TestFindNextSiblings(unittest.TestCase):
 
     @composite
     def input_and_r_6(draw):
-        num_attr = 1
-        input_name_filter = draw(one_of([sampled_from(["a", "p"]),  # string filter
-                                         sampled_from([re.compile("^a"), re.compile("^p")]), # re filter
-                                         permutations(["a", "p"]).map(lambda x: x[:num_attr]), # list of filter
-                                         sampled_from([True]), # boolean True
-                                         ]))
+        input_name_filter = draw(SIBLING_NAMES)
         input_attrs_filter = {} # empty dict
-        input_text_filter = draw(one_of([sampled_from(["Lacie"]),  # string filter
-                                         sampled_from([re.compile("^Lacie")]), # re filter
-                                         permutations(["Lacie"]).map(lambda x: x[:num_attr]), # list of filter
-                                         sampled_from([True]), # boolean True
-                                         ]))
-        input_limit = draw(integers(min_value=1, max_value=5))     # seems that behavior is not deterministic if limit<=0                              
-
-        # set expected result based on attrs_filter
-        if ( input_name_filter=="a" or 
-             input_name_filter==re.compile("^a") or 
-             input_name_filter==["a"] ):
-            if input_text_filter==True: r_exp=2
-            else: r_exp=1
-        elif input_name_filter==True:
-            if input_text_filter==True: r_exp=4
-            else: r_exp=1
-        else: 
-            if input_text_filter==True: r_exp=2
-            else: r_exp=0
-        # set expected result to input_limit if 0<input_limit<r_exp 
-        if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+        input_text_filter = draw(LACIE_TEXTS)
+        input_limit = draw(LIMITS_5)
+
+        r_exp = expected_6(input_name_filter, input_attrs_filter, input_text_filter, input_limit)
 
         return (input_name_filter, input_attrs_filter, input_text_filter, input_limit, r_exp)
     @given(input=input_and_r_6())
@@ -290,26 +284,12 @@ class TestFindNextSiblings(unittest.TestCase):
 
     @composite
     def input_and_r_7(draw):
-        num_attr = 1
-        input_name_filter = draw(one_of([sampled_from(["a", "p"]),  # string filter
-                                         sampled_from([re.compile("^a"), re.compile("^p")]), # re filter
-                                         permutations(["a", "p"]).map(lambda x: x[:num_attr]), # list of filter
-                                         sampled_from([True]), # boolean True
-                                         ]))
-        input_attrs_filter = draw(dictionaries(keys=sampled_from(["class"]), values=sampled_from(["sister"]), min_size=1))
-        input_text_filter = draw(one_of([sampled_from([""]),  # string filter (empty string "" works as True)
-                                         sampled_from([[]]), # list of filter
-                                         ]))
-        input_limit = draw(integers(min_value=1, max_value=5))     # seems that behavior is not deterministic if limit<=0                              
-
-        # set expected result based on attrs_filter
-        if input_name_filter==True: r_exp=2
-        elif ( input_name_filter=="a" or 
-             input_name_filter==re.compile("^a") or 
-             input_name_filter==["a"] ): r_exp=2
-        else: r_exp=0
-        # set expected result to input_limit if 0<input_limit<r_exp 
-        if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+        input_name_filter = draw(SIBLING_NAMES)
+        input_attrs_filter = draw(SISTER_ATTRS)
+        input_text_filter = draw(EMPTY_FILTERS) # empty string "" works as True
+        input_limit = draw(LIMITS_5)
+
+        r_exp = expected_7(input_name_filter, input_attrs_filter, input_text_filter, input_limit)
 
         return (input_name_filter, input_attrs_filter, input_text_filter, input_limit, r_exp)
     @given(input=input_and_r_7())
@@ -380,5 +360,30 @@ class TestFindNextSiblings(unittest.TestCase):
         r_exp = ["Tom", "Bob"]
         self.assertEqual(r, r_exp)
 
+    def test_white_5(self):
+        """ limit: Integer
+            the walk stops at the limit-th match (counted with Instrumentation.VisitCounter)
+        """
+        tag = self.test_html_page_element.a # get first tag <a>
+        siblings = list(tag.next_siblings)
+        for limit in range(1, 5):
+            with VisitCounter() as counter:
+                r = tag.find_next_siblings(name=True, limit=limit)
+            stats = counter.last("find_next_siblings")
+            position = [i for i, s in enumerate(siblings) if s is r[-1]][0]
+            self.assertEqual(stats.results, limit)
+            self.assertEqual(stats.visited, position + 1)
+
+    def test_white_6(self):
+        """ name: instance of SoupStrainer
+            every sibling is visited once and searched once
+        """
+        tag = self.test_html_page_element.a # get first tag <a>
+        with VisitCounter() as counter:
+            tag.find_next_siblings(name=SoupStrainer("p"), text=None)
+        stats = counter.last("find_next_siblings")
+        self.assertEqual(stats.visited, len(list(tag.next_siblings)))
+        self.assertEqual(stats.strainer_searches, stats.visited)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -5,7 +5,67 @@ from hypothesis.internal.conjecture.utils import boolean
 from hypothesis.strategies import *
 import re
 
+import FixtureCache
+from Profiling import profile_tests
+from Instrumentation import VisitCounter
+from Strategies import (CLASS_ATTRS_NOT_EXIST, EMPTY_FILTERS, NUM_ATTRS, START_TAGS, WRAPPER_DIV_2_ATTRS, parent_names,
+                        parent_names_not_exist)
 
+
+# Expected results of the blackbox testcases, shared by the input_and_r_N strategies
+# and the exhaustive mode (Exhaustive.py).
+
+def expected_1(start_tag_name, input_name_filter, input_attrs_filter):
+    # set expected result based on attrs_filter
+    if ( input_name_filter=="div" or 
+         input_name_filter==re.compile("^div") or 
+         (isinstance(input_name_filter,list) and "div" in input_name_filter) or
+         input_name_filter==True):
+        r_exp="wrapper_div_2"
+    else:
+        r_exp=None
+    return r_exp
+
+def expected_2(start_tag_name, input_name_filter, input_attrs_filter):
+    # set expected result based on attrs_filter
+    r_exp = None
+    return r_exp
+
+def expected_3(start_tag_name, input_name_filter, input_attrs_filter):
+    # set expected result based on attrs_filter
+    if ( input_name_filter=="div" or 
+         input_name_filter==re.compile("^div") or 
+         (isinstance(input_name_filter,list) and "div" in input_name_filter) ):
+        r_exp = "wrapper_div_2"
+    elif input_name_filter==True:
+        r_exp = "sister"
+    else:
+        r_exp = "story"
+    return r_exp
+
+def expected_4(start_tag_name, input_name_filter, input_attrs_filter):
+    # set expected result based on attrs_filter
+    r_exp = None
+    return r_exp
+
+def expected_5(start_tag_name, input_name_filter, input_attrs_filter):
+    # set expected result based on attrs_filter
+    r_exp = None
+    return r_exp
+
+def expected_6(start_tag_name, input_name_filter, input_attrs_filter):
+    # set expected result based on attrs_filter
+    r_exp = None
+    return r_exp
+
+def expected_7(start_tag_name, input_name_filter, input_attrs_filter):
+    # set expected result based on attrs_filter
+    if input_name_filter=="": r_exp = None
+    else: r_exp="sister"
+    return r_exp
+
+
+@profile_tests
 class TestFindParent(unittest.TestCase):       
     """
     This class contains all blackbox testcases for function find_parent() of class BeautifulSoup(inherited from class PageElement)
@@ -29,7 +89,7 @@ class TestFindParent(unittest.TestCase):
     
     @classmethod
     def setUpClass(cls) -> None:
-        cls.test_html_page_element = bs4.BeautifulSoup(
+        cls.test_html_page_element = FixtureCache.parse(
         """
         <html><head><title>The Dormouse's story</title></head>
         <body>
@@ -61,23 +121,11 @@ class TestFindParent(unittest.TestCase):
 
     @composite
     def input_and_r_1(draw):
-        start_tag_name = draw(sampled_from(["Elsie", "Lacie", "Tillie"]))
-        num_attr = 1
-        input_name_filter = draw(one_of([sampled_from(["p", "div"]),  # string filter
-                                         sampled_from([re.compile("^p"), re.compile("^div")]), # re filter
-                                         permutations(["p", "div"]).map(lambda x: x[:num_attr]), # list of filter
-                                         sampled_from([True]), # boolean True
-                                         ]))
-        input_attrs_filter = draw(dictionaries(keys=sampled_from(["class"]), values=sampled_from(["wrapper_div_2"]), min_size=1))
-
-        # set expected result based on attrs_filter
-        if ( input_name_filter=="div" or 
-             input_name_filter==re.compile("^div") or 
-             (isinstance(input_name_filter,list) and "div" in input_name_filter) or
-             input_name_filter==True):
-            r_exp="wrapper_div_2"
-        else:
-            r_exp=None
+        start_tag_name = draw(START_TAGS)
+        input_name_filter = draw(parent_names())
+        input_attrs_filter = draw(WRAPPER_DIV_2_ATTRS)
+
+        r_exp = expected_1(start_tag_name, input_name_filter, input_attrs_filter)
         return (start_tag_name, input_name_filter, input_attrs_filter, r_exp)
 
     @given(input=input_and_r_1())
@@ -95,16 +143,11 @@ class TestFindParent(unittest.TestCase):
 
     @composite
     def input_and_r_2(draw):
-        start_tag_name = draw(sampled_from(["Elsie", "Lacie", "Tillie"]))
-        num_attr = 1
-        input_name_filter = draw(one_of([sampled_from(["p", "div"]),  # string filter
-                                         sampled_from([re.compile("^p"), re.compile("^div")]), # re filter
-                                         permutations(["p", "div"]).map(lambda x: x[:num_attr]), # list of filter
-                                         sampled_from([True]), # boolean True
-                                         ]))
-        input_attrs_filter = draw(dictionaries(keys=sampled_from(["class"]), values=sampled_from(["class_not_exits"]), min_size=1))
-        # set expected result based on attrs_filter
-        r_exp = None
+        start_tag_name = draw(START_TAGS)
+        input_name_filter = draw(parent_names())
+        input_attrs_filter = draw(CLASS_ATTRS_NOT_EXIST)
+
+        r_exp = expected_2(start_tag_name, input_name_filter, input_attrs_filter)
 
         return (start_tag_name, input_name_filter, input_attrs_filter, r_exp)
     @given(input=input_and_r_2())
@@ -122,23 +165,11 @@ class TestFindParent(unittest.TestCase):
 
     @composite
     def input_and_r_3(draw):
-        start_tag_name = draw(sampled_from(["Elsie", "Lacie", "Tillie"]))
-        num_attr = 1
-        input_name_filter = draw(one_of([sampled_from(["p", "div"]),  # string filter
-                                         sampled_from([re.compile("^p"), re.compile("^div")]), # re filter
-                                         permutations(["p", "div"]).map(lambda x: x[:num_attr]), # list of filter
-                                         sampled_from([True]), # boolean True
-                                         ]))
+        start_tag_name = draw(START_TAGS)
+        input_name_filter = draw(parent_names())
         input_attrs_filter = {} # empty dict
-        # set expected result based on attrs_filter
-        if ( input_name_filter=="div" or 
-             input_name_filter==re.compile("^div") or 
-             (isinstance(input_name_filter,list) and "div" in input_name_filter) ):
-            r_exp = "wrapper_div_2"
-        elif input_name_filter==True:
-            r_exp = "sister"
-        else:
-            r_exp = "story"
+
+        r_exp = expected_3(start_tag_name, input_name_filter, input_attrs_filter)
 
         return (start_tag_name, input_name_filter, input_attrs_filter, r_exp)
     @given(input=input_and_r_3())
@@ -156,15 +187,12 @@ class TestFindParent(unittest.TestCase):
 
     @composite
     def input_and_r_4(draw):
-        start_tag_name = draw(sampled_from(["Elsie", "Lacie", "Tillie"]))
-        num_attr = draw(sampled_from([1, 2]))        
-        input_name_filter = draw(one_of([sampled_from(["p_not_exist", "div_not_exist"]),  # string filter
-                                         sampled_from([re.compile("^p_not_exist"), re.compile("^div_not_exist")]), # re filter
-                                         permutations(["p_not_exist", "div_not_exist"]).map(lambda x: x[:num_attr]), # list of filter
-                                         ]))
-        input_attrs_filter = draw(dictionaries(keys=sampled_from(["class"]), values=sampled_from(["class_not_exits"]), min_size=1))                   
-        # set expected result based on attrs_filter
-        r_exp = None
+        start_tag_name = draw(START_TAGS)
+        num_attr = draw(NUM_ATTRS)
+        input_name_filter = draw(parent_names_not_exist(num_attr))
+        input_attrs_filter = draw(CLASS_ATTRS_NOT_EXIST)
+
+        r_exp = expected_4(start_tag_name, input_name_filter, input_attrs_filter)
 
         return (start_tag_name, input_name_filter, input_attrs_filter, r_exp)
     @given(input=input_and_r_4())
@@ -182,16 +210,12 @@ class TestFindParent(unittest.TestCase):
         
     @composite
     def input_and_r_5(draw):
-        start_tag_name = draw(sampled_from(["Elsie", "Lacie", "Tillie"]))
-        num_attr = draw(sampled_from([1, 2]))        
-        input_name_filter = draw(one_of([sampled_from(["p_not_exist", "div_not_exist"]),  # string filter
-                                         sampled_from([re.compile("^p_not_exist"), re.compile("^div_not_exist")]), # re filter
-                                         permutations(["p_not_exist", "div_not_exist"]).map(lambda x: x[:num_attr]), # list of filter
-                                         # sampled_from([True]), # boolean True
-                                         ]))
+        start_tag_name = draw(START_TAGS)
+        num_attr = draw(NUM_ATTRS)
+        input_name_filter = draw(parent_names_not_exist(num_attr))
         input_attrs_filter = {} # empty dict
-        # set expected result based on attrs_filter
-        r_exp = None
+
+        r_exp = expected_5(start_tag_name, input_name_filter, input_attrs_filter)
 
         return (start_tag_name, input_name_filter, input_attrs_filter, r_exp)    
     @given(input=input_and_r_5())
@@ -208,11 +232,11 @@ class TestFindParent(unittest.TestCase):
 
     @composite
     def input_and_r_6(draw):
-        start_tag_name = draw(sampled_from(["Elsie", "Lacie", "Tillie"]))       
-        input_name_filter = draw(sampled_from(["", []]))
-        input_attrs_filter = draw(dictionaries(keys=sampled_from(["class"]), values=sampled_from(["class_not_exits"]), min_size=1))
-        # set expected result based on attrs_filter
-        r_exp = None
+        start_tag_name = draw(START_TAGS)
+        input_name_filter = draw(EMPTY_FILTERS)
+        input_attrs_filter = draw(CLASS_ATTRS_NOT_EXIST)
+
+        r_exp = expected_6(start_tag_name, input_name_filter, input_attrs_filter)
         return (start_tag_name, input_name_filter, input_attrs_filter, r_exp)    
     @given(input=input_and_r_6())
     def test_black_6(self, input):
@@ -229,12 +253,11 @@ class TestFindParent(unittest.TestCase):
 
     @composite
     def input_and_r_7(draw):
-        start_tag_name = draw(sampled_from(["Elsie", "Lacie", "Tillie"]))       
-        input_name_filter = draw(sampled_from(["", []]))
+        start_tag_name = draw(START_TAGS)
+        input_name_filter = draw(EMPTY_FILTERS)
         input_attrs_filter = {} # empty dict
-        # set expected result based on attrs_filter
-        if input_name_filter=="": r_exp = None
-        else: r_exp="sister"
+
+        r_exp = expected_7(start_tag_name, input_name_filter, input_attrs_filter)
 
         return (start_tag_name, input_name_filter, input_attrs_filter, r_exp)    
     @given(input=input_and_r_7())
@@ -248,6 +271,28 @@ class TestFindParent(unittest.TestCase):
         r = tag.find_parent(name=input_name_filter, attrs=input_attrs_filter)
         r_c = r['class'][0] if not r==None else None
         self.assertEqual(r_c, r_exp)
+
+
+    """ Whitebox Testing's args:
+            name: 
+                - String
+                - True
+    """ 
+
+    def test_white_1(self):
+        """ name: String / True
+            the walk stops at the matched ancestor (counted with Instrumentation.VisitCounter)
+        """
+        for start_tag_name in ["Elsie", "Lacie", "Tillie"]:
+            tag = self.test_html_page_element.find(string=start_tag_name)
+            parents = list(tag.parents)
+            for name in ["a", "p", "div", True]:
+                with VisitCounter() as counter:
+                    r = tag.find_parent(name=name)
+                stats = counter.last("find_parent")
+                distance = [i for i, p in enumerate(parents) if p is r][0] + 1
+                self.assertEqual(stats.visited, distance)
+                self.assertTrue(stats.visited <= len(parents))
     
 
 if __name__ == '__main__':
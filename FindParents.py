@@ -5,7 +5,75 @@ from hypothesis.internal.conjecture.utils import boolean
 from hypothesis.strategies import *
 import re
 
+import FixtureCache
+from Profiling import profile_tests
+from Strategies import (CLASS_ATTRS_NOT_EXIST, EMPTY_FILTERS, LIMITS_10, NUM_ATTRS, START_TAGS, WRAPPER_DIV_ATTRS,
+                        parent_names, parent_names_not_exist)
 
+
+# Expected results of the blackbox testcases, shared by the input_and_r_N strategies
+# and the exhaustive mode (Exhaustive.py).
+
+def expected_1(start_tag_name, input_name_filter, input_attrs_filter, input_limit):
+    # set expected result based on attrs_filter
+    if ( input_name_filter=="div" or 
+         input_name_filter==re.compile("^div") or 
+         (isinstance(input_name_filter,list) and "div" in input_name_filter) or
+         input_name_filter==True):
+        r_exp=2
+    else:
+        r_exp=0
+    # set expected result to input_limit if 0<input_limit<r_exp 
+    if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+    return r_exp
+
+def expected_2(start_tag_name, input_name_filter, input_attrs_filter, input_limit):
+    # set expected result based on attrs_filter
+    r_exp=0
+    # set expected result to input_limit if 0<input_limit<r_exp 
+    if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+    return r_exp
+
+def expected_3(start_tag_name, input_name_filter, input_attrs_filter, input_limit):
+    # set expected result based on attrs_filter
+    if isinstance(input_name_filter,list): r_exp = len(input_name_filter)*2
+    elif isinstance(input_name_filter, bool): r_exp = 8
+    else: r_exp = 2
+    # set expected result to input_limit if 0<input_limit<r_exp 
+    if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+    return r_exp
+
+def expected_4(start_tag_name, input_name_filter, input_attrs_filter, input_limit):
+    # set expected result based on attrs_filter
+    r_exp = 0
+    # set expected result to input_limit if 0<input_limit<r_exp 
+    if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+    return r_exp
+
+def expected_5(start_tag_name, input_name_filter, input_attrs_filter, input_limit):
+    # set expected result based on attrs_filter
+    r_exp = 0
+    # set expected result to input_limit if 0<input_limit<r_exp 
+    if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+    return r_exp
+
+def expected_6(start_tag_name, input_name_filter, input_attrs_filter, input_limit):
+    # set expected result based on attrs_filter
+    r_exp = 0
+    # set expected result to input_limit if 0<input_limit<r_exp 
+    if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+    return r_exp
+
+def expected_7(start_tag_name, input_name_filter, input_attrs_filter, input_limit):
+    # set expected result based on attrs_filter
+    if input_name_filter=="": r_exp = 0
+    else: r_exp=8
+    # set expected result to input_limit if 0<input_limit<r_exp 
+    if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+    return r_exp
+
+
+@profile_tests
 class TestFindParents(unittest.TestCase):       
     """
     This class contains all blackbox testcases for function find_parents() of class BeautifulSoup(inherited from class PageElement)
@@ -30,7 +98,7 @@ class TestFindParents(unittest.TestCase):
     
     @classmethod
     def setUpClass(cls) -> None:
-        cls.test_html_page_element = bs4.BeautifulSoup(
+        cls.test_html_page_element = FixtureCache.parse(
         """
         <html><head><title>The Dormouse's story</title></head>
         <body>
@@ -62,26 +130,13 @@ class TestFindParents(unittest.TestCase):
 
     @composite
     def input_and_r_1(draw):
-        start_tag_name = draw(sampled_from(["Elsie", "Lacie", "Tillie"]))
-        num_attr = draw(sampled_from([1, 2]))        
-        input_name_filter = draw(one_of([sampled_from(["p", "div"]),  # string filter
-                                         sampled_from([re.compile("^p"), re.compile("^div")]), # re filter
-                                         permutations(["p", "div"]).map(lambda x: x[:num_attr]), # list of filter
-                                         sampled_from([True]), # boolean True
-                                         ]))
-        input_attrs_filter = draw(dictionaries(keys=sampled_from(["class"]), values=sampled_from(["wrapper_div"]), min_size=1))
-        input_limit = draw(integers(min_value=1, max_value=10))     # seems that behavior is not deterministic if limit<=0                              
-
-        # set expected result based on attrs_filter
-        if ( input_name_filter=="div" or 
-             input_name_filter==re.compile("^div") or 
-             (isinstance(input_name_filter,list) and "div" in input_name_filter) or
-             input_name_filter==True):
-            r_exp=2
-        else:
-            r_exp=0
-        # set expected result to input_limit if 0<input_limit<r_exp 
-        if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+        start_tag_name = draw(START_TAGS)
+        num_attr = draw(NUM_ATTRS)
+        input_name_filter = draw(parent_names(num_attr))
+        input_attrs_filter = draw(WRAPPER_DIV_ATTRS)
+        input_limit = draw(LIMITS_10)
+
+        r_exp = expected_1(start_tag_name, input_name_filter, input_attrs_filter, input_limit)
 
         return (start_tag_name, input_name_filter, input_attrs_filter, input_limit, r_exp)
     @given(input=input_and_r_1())
@@ -99,19 +154,13 @@ class TestFindParents(unittest.TestCase):
 
     @composite
     def input_and_r_2(draw):
-        start_tag_name = draw(sampled_from(["Elsie", "Lacie", "Tillie"]))
-        num_attr = draw(sampled_from([1, 2]))        
-        input_name_filter = draw(one_of([sampled_from(["p", "div"]),  # string filter
-                                         sampled_from([re.compile("^p"), re.compile("^div")]), # re filter
-                                         permutations(["p", "div"]).map(lambda x: x[:num_attr]), # list of filter
-                                         sampled_from([True]), # boolean True
-                                         ]))
-        input_attrs_filter = draw(dictionaries(keys=sampled_from(["class"]), values=sampled_from(["class_not_exits"]), min_size=1))
-        input_limit = draw(integers(min_value=1, max_value=10))     # seems that behavior is not deterministic if limit<=0                              
-        # set expected result based on attrs_filter
-        r_exp=0
-        # set expected result to input_limit if 0<input_limit<r_exp 
-        if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+        start_tag_name = draw(START_TAGS)
+        num_attr = draw(NUM_ATTRS)
+        input_name_filter = draw(parent_names(num_attr))
+        input_attrs_filter = draw(CLASS_ATTRS_NOT_EXIST)
+        input_limit = draw(LIMITS_10)
+
+        r_exp = expected_2(start_tag_name, input_name_filter, input_attrs_filter, input_limit)
 
         return (start_tag_name, input_name_filter, input_attrs_filter, input_limit, r_exp)
     @given(input=input_and_r_2())
@@ -129,21 +178,13 @@ class TestFindParents(unittest.TestCase):
 
     @composite
     def input_and_r_3(draw):
-        start_tag_name = draw(sampled_from(["Elsie", "Lacie", "Tillie"]))
-        num_attr = draw(sampled_from([1, 2]))        
-        input_name_filter = draw(one_of([sampled_from(["p", "div"]),  # string filter
-                                         sampled_from([re.compile("^p"), re.compile("^div")]), # re filter
-                                         permutations(["p", "div"]).map(lambda x: x[:num_attr]), # list of filter
-                                         sampled_from([True]), # boolean True
-                                         ]))
+        start_tag_name = draw(START_TAGS)
+        num_attr = draw(NUM_ATTRS)
+        input_name_filter = draw(parent_names(num_attr))
         input_attrs_filter = {} # empty dict
-        input_limit = draw(integers(min_value=1, max_value=10))     # seems that behavior is not deterministic if limit<=0                              
-        # set expected result based on attrs_filter
-        if isinstance(input_name_filter,list): r_exp = num_attr*2
-        elif isinstance(input_name_filter, bool): r_exp = 8
-        else: r_exp = 2
-        # set expected result to input_limit if 0<input_limit<r_exp 
-        if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+        input_limit = draw(LIMITS_10)
+
+        r_exp = expected_3(start_tag_name, input_name_filter, input_attrs_filter, input_limit)
 
         return (start_tag_name, input_name_filter, input_attrs_filter, input_limit, r_exp)
     @given(input=input_and_r_3())
@@ -161,19 +202,13 @@ class TestFindParents(unittest.TestCase):
 
     @composite
     def input_and_r_4(draw):
-        start_tag_name = draw(sampled_from(["Elsie", "Lacie", "Tillie"]))
-        num_attr = draw(sampled_from([1, 2]))        
-        input_name_filter = draw(one_of([sampled_from(["p_not_exist", "div_not_exist"]),  # string filter
-                                         sampled_from([re.compile("^p_not_exist"), re.compile("^div_not_exist")]), # re filter
-                                         permutations(["p_not_exist", "div_not_exist"]).map(lambda x: x[:num_attr]), # list of filter
-                                         # sampled_from([True]), # boolean True
-                                         ]))
-        input_attrs_filter = draw(dictionaries(keys=sampled_from(["class"]), values=sampled_from(["class_not_exits"]), min_size=1))
-        input_limit = draw(integers(min_value=1, max_value=10))     # seems that behavior is not deterministic if limit<=0                              
-        # set expected result based on attrs_filter
-        r_exp = 0
-        # set expected result to input_limit if 0<input_limit<r_exp 
-        if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+        start_tag_name = draw(START_TAGS)
+        num_attr = draw(NUM_ATTRS)
+        input_name_filter = draw(parent_names_not_exist(num_attr))
+        input_attrs_filter = draw(CLASS_ATTRS_NOT_EXIST)
+        input_limit = draw(LIMITS_10)
+
+        r_exp = expected_4(start_tag_name, input_name_filter, input_attrs_filter, input_limit)
 
         return (start_tag_name, input_name_filter, input_attrs_filter, input_limit, r_exp)
     @given(input=input_and_r_4())
@@ -191,19 +226,13 @@ class TestFindParents(unittest.TestCase):
         
     @composite
     def input_and_r_5(draw):
-        start_tag_name = draw(sampled_from(["Elsie", "Lacie", "Tillie"]))
-        num_attr = draw(sampled_from([1, 2]))        
-        input_name_filter = draw(one_of([sampled_from(["p_not_exist", "div_not_exist"]),  # string filter
-                                         sampled_from([re.compile("^p_not_exist"), re.compile("^div_not_exist")]), # re filter
-                                         permutations(["p_not_exist", "div_not_exist"]).map(lambda x: x[:num_attr]), # list of filter
-                                         # sampled_from([True]), # boolean True
-                                         ]))
+        start_tag_name = draw(START_TAGS)
+        num_attr = draw(NUM_ATTRS)
+        input_name_filter = draw(parent_names_not_exist(num_attr))
         input_attrs_filter = {} # empty dict
-        input_limit = draw(integers(min_value=1, max_value=10))     # seems that behavior is not deterministic if limit<=0                              
-        # set expected result based on attrs_filter
-        r_exp = 0
-        # set expected result to input_limit if 0<input_limit<r_exp 
-        if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+        input_limit = draw(LIMITS_10)
+
+        r_exp = expected_5(start_tag_name, input_name_filter, input_attrs_filter, input_limit)
 
         return (start_tag_name, input_name_filter, input_attrs_filter, input_limit, r_exp)    
     @given(input=input_and_r_5())
@@ -220,14 +249,12 @@ class TestFindParents(unittest.TestCase):
 
     @composite
     def input_and_r_6(draw):
-        start_tag_name = draw(sampled_from(["Elsie", "Lacie", "Tillie"]))       
-        input_name_filter = draw(sampled_from(["", []]))
-        input_attrs_filter = draw(dictionaries(keys=sampled_from(["class"]), values=sampled_from(["class_not_exits"]), min_size=1))
-        input_limit = draw(integers(min_value=1, max_value=10))     # seems that behavior is not deterministic if limit<=0                              
-        # set expected result based on attrs_filter
-        r_exp = 0
-        # set expected result to input_limit if 0<input_limit<r_exp 
-        if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+        start_tag_name = draw(START_TAGS)
+        input_name_filter = draw(EMPTY_FILTERS)
+        input_attrs_filter = draw(CLASS_ATTRS_NOT_EXIST)
+        input_limit = draw(LIMITS_10)
+
+        r_exp = expected_6(start_tag_name, input_name_filter, input_attrs_filter, input_limit)
 
         return (start_tag_name, input_name_filter, input_attrs_filter, input_limit, r_exp)    
     @given(input=input_and_r_6())
@@ -244,15 +271,12 @@ class TestFindParents(unittest.TestCase):
 
     @composite
     def input_and_r_7(draw):
-        start_tag_name = draw(sampled_from(["Elsie", "Lacie", "Tillie"]))       
-        input_name_filter = draw(sampled_from(["", []]))
+        start_tag_name = draw(START_TAGS)
+        input_name_filter = draw(EMPTY_FILTERS)
         input_attrs_filter = {} # empty dict
-        input_limit = draw(integers(min_value=1, max_value=10))     # seems that behavior is not deterministic if limit<=0                              
-        # set expected result based on attrs_filter
-        if input_name_filter=="": r_exp = 0
-        else: r_exp=8
-        # set expected result to input_limit if 0<input_limit<r_exp 
-        if (input_limit>0 and input_limit<r_exp): r_exp=input_limit 
+        input_limit = draw(LIMITS_10)
+
+        r_exp = expected_7(start_tag_name, input_name_filter, input_attrs_filter, input_limit)
 
         return (start_tag_name, input_name_filter, input_attrs_filter, input_limit, r_exp)    
     @given(input=input_and_r_7())
@@ -0,0 +1,303 @@
+""" Parsed-fixture cache shared by the testcase classes and the benchmark modules.
+
+    parse(markup, features) returns the BeautifulSoup tree of `markup`, parsing each distinct
+    document at most once per process. Parsed trees are also pickled to disk, as a flat list of
+    their nodes (so neither saving nor loading recurses, however deep or long the tree), keyed by
+    a hash of the markup, the parser and the bs4 version; later runs and worker processes load the
+    tree instead of parsing it again.
+
+    The cached tree is shared: callers must not modify it, or must ask for copy=True.
+
+    Environment:
+        FIXTURE_CACHE_DIR       directory of the pickled trees (default: .fixture_cache next to this file)
+        FIXTURE_CACHE_DISABLE   set to 1 to skip the disk layer
+        FIXTURE_CACHE_REPORT    set to 1 to print hit/miss statistics at exit
+
+    Usage: python FixtureCache.py [--clear]
+"""
+import argparse
+import atexit
+import copy as copy_module
+import gc
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import time
+import unittest
+import bs4
+
+
+CACHE_DIR = os.environ.get("FIXTURE_CACHE_DIR",
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), ".fixture_cache"))
+DISK_ENABLED = os.environ.get("FIXTURE_CACHE_DISABLE", "0") != "1"
+
+# pickling a tree directly recurses along its next_element chain, once per element, so trees
+# are stored as a flat list of nodes in document order and relinked in a loop on load
+FORMAT = 1
+
+_trees = {}        # key -> (soup, parse_ns, pickled tree or None)
+_stats = dict(memory_hits=0, disk_hits=0, misses=0, unpicklable=0, saved_ns=0, parse_ns=0)
+
+
+def cache_key(markup, features):
+    h = hashlib.sha256()
+    for part in (str(FORMAT), bs4.__version__, features, markup):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _disk_path(key):
+    return os.path.join(CACHE_DIR, key + ".pickle")
+
+
+def _flatten(soup):
+    """ [(parent index, NavigableString class, text) or (parent index, name, namespace, prefix, attrs,
+        sourceline, sourcepos)] of every node below soup, in document order. """
+    index = {id(soup): 0}
+    strings = {}        # one copy of every repeated text and name in the pickle
+    nodes = []
+    for i, element in enumerate(soup.descendants, 1):
+        index[id(element)] = i
+        parent = index[id(element.parent)]
+        if isinstance(element, bs4.element.Tag):
+            nodes.append((parent, strings.setdefault(element.name, element.name), element.namespace, element.prefix,
+                          element.attrs, getattr(element, "sourceline", None), getattr(element, "sourcepos", None)))
+        else:
+            text = str(element)
+            nodes.append((parent, type(element), strings.setdefault(text, text)))
+    return nodes
+
+
+def _rebuild(features, nodes):
+    """ The BeautifulSoup tree of a _flatten() node list, linked as the parser links it.
+
+        The first tag of every name goes through Tag.__init__; the others copy its builder-derived
+        fields, since their attrs were already converted when the document was parsed. """
+    soup = bs4.BeautifulSoup("", features)
+    templates = {}
+    elements = [soup]
+    previous = soup
+    for node in nodes:
+        parent = elements[node[0]]
+        if len(node) == 3:
+            element = node[1](node[2])
+        else:
+            _, name, namespace, prefix, attrs, sourceline, sourcepos = node
+            template = templates.get((name, namespace, prefix))
+            if template is None:
+                tag = bs4.element.Tag(soup, soup.builder, name, namespace, prefix)
+                template = templates[name, namespace, prefix] = dict(tag.__dict__)
+            element = bs4.element.Tag.__new__(bs4.element.Tag)
+            element.__dict__.update(template)
+            element.attrs = attrs
+            element.contents = []
+            element._namespaces = {}
+            if sourceline is not None:
+                element.sourceline, element.sourcepos = sourceline, sourcepos
+        element.setup(parent, previous)
+        parent.contents.append(element)
+        elements.append(element)
+        previous = element
+    return soup
+
+
+def _without_gc(fn, *args):
+    """ fn(*args) with the garbage collector paused: (un)pickling allocates an object or more per
+        node, and the collections that triggers would rescan the whole tree many times over. """
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return fn(*args)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def _dumps(soup, parse_ns, features):
+    """ Return the serialised (soup, parse_ns), or None when the tree cannot be pickled. """
+    try:
+        return _without_gc(lambda: pickle.dumps((FORMAT, features, _flatten(soup), parse_ns), pickle.HIGHEST_PROTOCOL))
+    except (pickle.PicklingError, TypeError, AttributeError):
+        _stats["unpicklable"] += 1
+        return None
+
+
+def _loads(data):
+    def load():
+        version, features, nodes, parse_ns = pickle.loads(data)
+        if version != FORMAT:
+            raise pickle.UnpicklingError("fixture cache format %r" % version)
+        return _rebuild(features, nodes), parse_ns
+    return _without_gc(load)
+
+
+def _load(key):
+    """ Return (pickled tree, soup, parse_ns) from the disk layer, or None. """
+    try:
+        with open(_disk_path(key), "rb") as f:
+            data = f.read()
+        soup, parse_ns = _loads(data)
+        return data, soup, parse_ns
+    except FileNotFoundError:
+        return None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None     # corrupt or written by an incompatible bs4, parse again
+
+
+def _store(key, data):
+    """ Write the pickled tree atomically, so concurrent workers never read a partial file. """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = "%s.%d.tmp" % (_disk_path(key), os.getpid())
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, _disk_path(key))
+
+
+def _copy(soup, data):
+    if data is not None:
+        return _loads(data)[0]
+    return copy_module.copy(soup)     # bs4 re-parses the tree's markup
+
+
+def parse(markup, features="html.parser", copy=False):
+    """ Return the parsed tree of markup, from the in-process cache, the disk cache or the parser.
+        With copy=True the caller gets a private tree it may modify. """
+    key = cache_key(markup, features)
+    if key in _trees:
+        soup, parse_ns, data = _trees[key]
+        _stats["memory_hits"] += 1
+        _stats["saved_ns"] += parse_ns
+        return _copy(soup, data) if copy else soup
+
+    t0 = time.perf_counter_ns()
+    loaded = _load(key) if DISK_ENABLED else None
+    if loaded is not None:
+        data, soup, parse_ns = loaded
+        _stats["disk_hits"] += 1
+        _stats["saved_ns"] += parse_ns - (time.perf_counter_ns() - t0)
+    else:
+        t0 = time.perf_counter_ns()
+        soup = bs4.BeautifulSoup(markup, features)
+        parse_ns = time.perf_counter_ns() - t0
+        _stats["misses"] += 1
+        _stats["parse_ns"] += parse_ns
+        data = _dumps(soup, parse_ns, features)
+        if DISK_ENABLED and data is not None:
+            _store(key, data)
+    _trees[key] = (soup, parse_ns, data)
+    return _copy(soup, data) if copy else soup
+
+
+def stats():
+    return dict(_stats)
+
+
+def summary():
+    s = _stats
+    return ("fixture cache: %d memory hits, %d disk hits, %d misses (%d not persisted), "
+            "%.1f ms parsing, %.1f ms saved" % (s["memory_hits"], s["disk_hits"], s["misses"],
+                                                s["unpicklable"], s["parse_ns"] / 1e6, s["saved_ns"] / 1e6))
+
+
+def clear(disk=True):
+    _trees.clear()
+    if disk and os.path.isdir(CACHE_DIR):
+        for name in os.listdir(CACHE_DIR):
+            if name.endswith(".pickle") or name.endswith(".tmp"):
+                os.remove(os.path.join(CACHE_DIR, name))
+
+
+@atexit.register
+def _report():
+    if os.environ.get("FIXTURE_CACHE_REPORT", "0") == "1":
+        print(summary(), file=sys.stderr)
+
+
+class TestFixtureCache(unittest.TestCase):
+    """ The cache must hand back equivalent trees from every layer. """
+
+    markup = '<p class="story"><a class="sister" id="link1">Elsie</a>, <a class="sister" id="link2">Lacie</a></p>'
+
+    def setUp(self):
+        global CACHE_DIR
+        self.old_cache_dir = CACHE_DIR
+        self.tmp = tempfile.TemporaryDirectory()
+        CACHE_DIR = self.tmp.name
+        clear(disk=False)
+
+    def tearDown(self):
+        global CACHE_DIR
+        clear(disk=False)
+        CACHE_DIR = self.old_cache_dir
+        self.tmp.cleanup()
+
+    def test_memory_hit(self):
+        before = stats()
+        soup = parse(self.markup)
+        self.assertIs(parse(self.markup), soup)
+        after = stats()
+        self.assertEqual(after["memory_hits"] - before["memory_hits"], 1)
+        self.assertEqual(after["misses"] - before["misses"], 1)
+
+    @unittest.skipUnless(DISK_ENABLED, "FIXTURE_CACHE_DISABLE is set")
+    def test_disk_hit(self):
+        soup = parse(self.markup)
+        clear(disk=False)
+        before = stats()["disk_hits"]
+        loaded = parse(self.markup)
+        self.assertEqual(stats()["disk_hits"] - before, 1)
+        self.assertIsNot(loaded, soup)
+        self.assertEqual(str(loaded), str(soup))
+
+    def test_copy(self):
+        soup = parse(self.markup)
+        private = parse(self.markup, copy=True)
+        private.a.decompose()
+        self.assertEqual(len(soup.find_all("a")), 2)
+        self.assertEqual(len(private.find_all("a")), 1)
+
+    def assert_same_tree(self, a, b):
+        self.assertEqual(str(a), str(b))
+        for x, y in zip(a.descendants, b.descendants):
+            self.assertEqual(type(x), type(y))
+            self.assertEqual([type(e) for e in (x.parent, x.previous_sibling, x.next_sibling, x.next_element)],
+                             [type(e) for e in (y.parent, y.previous_sibling, y.next_sibling, y.next_element)])
+        self.assertEqual(len(list(a.descendants)), len(list(b.descendants)))
+
+    @unittest.skipUnless(DISK_ENABLED, "FIXTURE_CACHE_DISABLE is set")
+    def test_large_document(self):
+        markup = ('<html><body><p class="story">'
+                  + "".join('<a class="sister" id="link%d">Lacie</a>, who lived at the bottom of a well; ' % i
+                            for i in range(30000))
+                  + "<!-- end --></p></body></html>")
+        self.assertGreater(len(markup), 2 << 20)
+        before = stats()["unpicklable"]
+        soup = parse(markup)
+        self.assertEqual(stats()["unpicklable"], before)
+        self.assertTrue(os.path.exists(_disk_path(cache_key(markup, "html.parser"))))
+        clear(disk=False)
+        loaded = parse(markup)
+        self.assert_same_tree(loaded, soup)
+        self.assertEqual(len(loaded.a.find_next_siblings("a", {"class": "sister"})), 29999)
+        self.assertIsInstance(loaded.p.contents[-1], bs4.Comment)
+        self.assertEqual(loaded.a["class"], ["sister"])
+
+    def test_deep_tree(self):
+        markup = "<div>" * 3000 + "Elsie" + "</div>" * 3000
+        soup = parse(markup)
+        self.assertEqual(len(parse(markup, copy=True).find(string="Elsie").find_parents("div")), 3000)
+        self.assertEqual(len(soup.find(string="Elsie").find_parents("div")), 3000)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clear", action="store_true", help="remove every pickled tree")
+    args = parser.parse_args()
+    if args.clear:
+        clear()
+    files = os.listdir(CACHE_DIR) if os.path.isdir(CACHE_DIR) else []
+    size = sum(os.path.getsize(os.path.join(CACHE_DIR, f)) for f in files)
+    print("%s: %d trees, %.1f KB" % (CACHE_DIR, len(files), size / 1024))
@@ -0,0 +1,140 @@
+""" Node-visit instrumentation for find_parents(), find_parent() and find_next_siblings().
+
+    Inside a `with VisitCounter() as counter:` block every call of the three methods gets a
+    CallStats record in counter.calls with:
+        visited             elements pulled from the .parents / .next_siblings generator
+        strainer_searches   SoupStrainer.search calls (one per candidate element)
+        filter_evaluations  SoupStrainer._matches calls, including the nested ones made for
+                            list filters and multi-valued attributes
+        results             number of elements returned (0 or 1 for find_parent)
+
+    Counts are attributed to every instrumented call that is active, so the find_parents call
+    made inside find_parent has a record of its own with the same counts.
+"""
+import unittest
+from bs4.element import PageElement, SoupStrainer
+
+
+class CallStats(object):
+
+    def __init__(self, method):
+        self.method = method
+        self.visited = 0
+        self.strainer_searches = 0
+        self.filter_evaluations = 0
+        self.results = 0
+
+    def __repr__(self):
+        return "CallStats(%s: visited=%d, strainer_searches=%d, filter_evaluations=%d, results=%d)" % (
+            self.method, self.visited, self.strainer_searches, self.filter_evaluations, self.results)
+
+
+class VisitCounter(object):
+    """ Context manager that patches bs4 to count the work of each navigation call. """
+
+    METHODS = ["find_parents", "find_parent", "find_next_siblings"]
+    GENERATORS = ["parents", "next_siblings"]
+
+    def __init__(self):
+        self.calls = []
+        self._active = []
+        self._saved = []
+
+    def _count(self, field):
+        for stats in self._active:
+            setattr(stats, field, getattr(stats, field) + 1)
+
+    def _patch(self, cls, attr, value):
+        self._saved.append((cls, attr, cls.__dict__[attr]))
+        setattr(cls, attr, value)
+
+    def _counting_generator(self, prop):
+        counter = self
+
+        def fget(element):
+            for item in prop.fget(element):
+                counter._count("visited")
+                yield item
+        return property(fget)
+
+    def _instrumented_method(self, method, fn):
+        counter = self
+
+        def wrapper(*args, **kwargs):
+            stats = CallStats(method)
+            counter.calls.append(stats)
+            counter._active.append(stats)
+            try:
+                r = fn(*args, **kwargs)
+            finally:
+                counter._active.remove(stats)
+            stats.results = 0 if r is None else (len(r) if isinstance(r, list) else 1)
+            return r
+        return wrapper
+
+    def _counting(self, field, fn):
+        counter = self
+
+        def wrapper(*args, **kwargs):
+            counter._count(field)
+            return fn(*args, **kwargs)
+        return wrapper
+
+    def __enter__(self):
+        for name in self.GENERATORS:
+            self._patch(PageElement, name, self._counting_generator(PageElement.__dict__[name]))
+        for name in self.METHODS:
+            self._patch(PageElement, name, self._instrumented_method(name, PageElement.__dict__[name]))
+        self._patch(SoupStrainer, "search", self._counting("strainer_searches", SoupStrainer.__dict__["search"]))
+        self._patch(SoupStrainer, "_matches", self._counting("filter_evaluations", SoupStrainer.__dict__["_matches"]))
+        return self
+
+    def __exit__(self, *exc):
+        while self._saved:
+            cls, attr, value = self._saved.pop()
+            setattr(cls, attr, value)
+        return False
+
+    def last(self, method):
+        """ The most recent record of the given method. """
+        for stats in reversed(self.calls):
+            if stats.method == method:
+                return stats
+        raise LookupError("no %s call was recorded" % method)
+
+
+class TestVisitCounter(unittest.TestCase):
+    """ The counter itself: patches are undone and counts match a hand-counted tree. """
+
+    markup = '<div class="d"><p class="p"><a class="sister">Elsie</a>, <a>Lacie</a> and <b>Tillie</b></p></div>'
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        import FixtureCache
+        cls.test_html_page_element = FixtureCache.parse(cls.markup, "html.parser")
+
+    def test_restores_bs4(self):
+        before = PageElement.__dict__["find_parents"], SoupStrainer.__dict__["search"]
+        with VisitCounter():
+            self.assertIsNot(PageElement.__dict__["find_parents"], before[0])
+        self.assertEqual((PageElement.__dict__["find_parents"], SoupStrainer.__dict__["search"]), before)
+
+    def test_find_next_siblings_counts(self):
+        tag = self.test_html_page_element.a
+        with VisitCounter() as counter:
+            r = tag.find_next_siblings("a", limit=5)
+        stats = counter.last("find_next_siblings")
+        # ", ", <a>, " and ", <b>
+        self.assertEqual((stats.visited, stats.strainer_searches, stats.results), (4, 4, len(r)))
+
+    def test_find_parent_nested_record(self):
+        tag = self.test_html_page_element.find(string="Elsie")
+        with VisitCounter() as counter:
+            tag.find_parent("div")
+        outer, inner = counter.last("find_parent"), counter.last("find_parents")
+        self.assertEqual((outer.visited, outer.results), (inner.visited, inner.results))
+        self.assertEqual(outer.visited, 3)      # a, p, div
+
+
+if __name__ == '__main__':
+    unittest.main()
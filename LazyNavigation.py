@@ -0,0 +1,230 @@
+""" Lazy, generator-based equivalents of find_next_siblings(), find_parents() and find_parent().
+
+    lazy_find() runs the SoupStrainer that find_*() would build over the .next_siblings /
+    .parents generator and stops after `limit` matches through itertools.islice, so no list is
+    built past what the caller takes. The test classes pair every blackbox testcase with its
+    lazy equivalent: the same input_and_r_N strategy, the same r_exp, and the same elements as the
+    eager call.
+
+    The benchmark compares the two styles on large trees (wide documents from
+    BenchFindNextSiblings, deep ones from BenchFindParents) for every distinct filter of the
+    blackbox cases, without a limit:
+        first       latency to the first match; the eager call only has it once the walk ends
+        total       time to collect every match
+
+    Usage: python LazyNavigation.py --size 5000 --depth 1000 --repeat 3
+           python -m unittest LazyNavigation
+"""
+import argparse
+import itertools
+import unittest
+from hypothesis import given
+from bs4.element import SoupStrainer
+
+import FindNextSiblings
+import FindParent
+import FindParents
+from BenchFindNextSiblings import wide_soup
+from BenchFindParents import best_of, deep_soup
+from FilterSpaces import NEXT_SIBLINGS_SPACES, freeze
+from Scenarios import Scenario, scenarios
+
+
+GENERATORS = {
+    "find_next_siblings": "next_siblings",
+    "find_parents": "parents",
+    "find_parent": "parents",
+}
+
+
+def iter_matches(generator, name=None, attrs={}, string=None, **kwargs):
+    """ Lazily yield the elements of generator that find_*() would return, in the same order. """
+    if isinstance(name, SoupStrainer):
+        strainer = name
+    else:
+        strainer = SoupStrainer(name, attrs, string, **kwargs)
+    for i in generator:
+        if i:
+            found = strainer.search(i)
+            if found:
+                yield found
+
+
+def lazy_find(element, method, name=None, attrs={}, limit=None, **kwargs):
+    """ Generator of the first `limit` elements element.<method>(name, attrs, limit, **kwargs) returns.
+        As in bs4, a limit of 0 (or None) means no limit. """
+    if method == "find_parent":
+        limit = 1
+    return itertools.islice(iter_matches(getattr(element, GENERATORS[method]), name, attrs, **kwargs), limit or None)
+
+
+def lazy_iter(scenario, element):
+    """ Scenario.call() in the lazy style. """
+    kwargs = {scenario.text_kwarg: scenario.text} if scenario.method == "find_next_siblings" else {}
+    return lazy_find(element, scenario.method, scenario.name, scenario.attrs, scenario.limit, **kwargs)
+
+
+def unlimited_scenarios(method):
+    """ One scenario per distinct filter of the blackbox cases of method, without a limit. """
+    seen = set()
+    for s in scenarios([method]):
+        key = (s.case, s.start, freeze(s.name), freeze(s.attrs), freeze(s.text))
+        if key not in seen:
+            seen.add(key)
+            yield Scenario(s.method, s.case, s.name, s.attrs, None, s.text, s.text_kwarg, s.start)
+
+
+def bench(method, soup, repeat):
+    """ Yield (scenario, matches, walked, eager ns, lazy first-match ns, lazy total ns). """
+    for scenario in unlimited_scenarios(method):
+        element = scenario.start_element(soup)
+        walked = sum(1 for _ in getattr(element, GENERATORS[method]))
+        eager_ns, r_eager = best_of(lambda: scenario.call(element), repeat)
+        first_ns, _ = best_of(lambda: next(lazy_iter(scenario, element), None), repeat)
+        total_ns, r_lazy = best_of(lambda: list(lazy_iter(scenario, element)), repeat)
+        assert [id(e) for e in r_eager] == [id(e) for e in r_lazy], scenario
+        yield scenario, len(r_eager), walked, eager_ns, first_ns, total_ns
+
+
+def report(method, rows):
+    groups = {}
+    for scenario, matches, walked, eager_ns, first_ns, total_ns in rows:
+        groups.setdefault((scenario.name_kind, matches > 0), []).append((walked, eager_ns, first_ns, total_ns))
+    header = "%-20s %-9s %-7s %6s %8s %12s %12s %9s %12s %12s" % (
+        "method", "name", "matches", "combos", "walked", "eager_us", "first_us", "first_x", "lazy_us", "lazy_el/s")
+    print(header)
+    print("-" * len(header))
+    for (name_kind, matched), g in sorted(groups.items()):
+        walked = sum(w for w, _, _, _ in g) / len(g)
+        eager = sum(e for _, e, _, _ in g) / len(g)
+        first = sum(f for _, _, f, _ in g) / len(g)
+        total = sum(t for _, _, _, t in g) / len(g)
+        print("%-20s %-9s %-7s %6d %8.0f %12.1f %12.1f %8.1fx %12.1f %12.0f" % (
+            method, name_kind, "yes" if matched else "no", len(g), walked, eager / 1e3, first / 1e3,
+            eager / first, total / 1e3, walked / total * 1e9))
+    print()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=5000, help="siblings of the find_next_siblings document")
+    parser.add_argument("--depth", type=int, default=1000, help="wrapper levels of the find_parents document")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    report("find_next_siblings", bench("find_next_siblings", wide_soup(args.size), args.repeat))
+    report("find_parents", bench("find_parents", deep_soup(args.depth), args.repeat))
+
+
+class TestLazyFindNextSiblings(unittest.TestCase):
+    """ TestFindNextSiblings.input_and_r_1..7 in the lazy style. """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        FindNextSiblings.TestFindNextSiblings.setUpClass()
+        cls.test_html_page_element = FindNextSiblings.TestFindNextSiblings.test_html_page_element
+
+    def check(self, case, input):
+        (input_name_filter, input_attrs_filter, input_text_filter, input_limit, r_exp) = input
+        text_kwarg = {NEXT_SIBLINGS_SPACES[case]["text_kwarg"]: input_text_filter}
+        tag = self.test_html_page_element.a # get first tag <a>
+        r = list(lazy_find(tag, "find_next_siblings", input_name_filter, input_attrs_filter, input_limit, **text_kwarg))
+        self.assertEqual(len(r), r_exp)
+        r_eager = tag.find_next_siblings(name=input_name_filter, attrs=input_attrs_filter, limit=input_limit, **text_kwarg)
+        self.assertEqual([id(e) for e in r], [id(e) for e in r_eager])
+
+    def test_limit_zero(self):
+        tag = self.test_html_page_element.a
+        for name, attrs in [("a", {"class": "sister"}), (True, {}), ("p", {})]:
+            r = list(lazy_find(tag, "find_next_siblings", name, attrs, 0))
+            self.assertEqual([id(e) for e in r], [id(e) for e in tag.find_next_siblings(name, attrs, limit=0)])
+            self.assertTrue(r)
+
+    @given(input=FindNextSiblings.TestFindNextSiblings.input_and_r_1())
+    def test_lazy_1(self, input): self.check(1, input)
+    @given(input=FindNextSiblings.TestFindNextSiblings.input_and_r_2())
+    def test_lazy_2(self, input): self.check(2, input)
+    @given(input=FindNextSiblings.TestFindNextSiblings.input_and_r_3())
+    def test_lazy_3(self, input): self.check(3, input)
+    @given(input=FindNextSiblings.TestFindNextSiblings.input_and_r_4())
+    def test_lazy_4(self, input): self.check(4, input)
+    @given(input=FindNextSiblings.TestFindNextSiblings.input_and_r_5())
+    def test_lazy_5(self, input): self.check(5, input)
+    @given(input=FindNextSiblings.TestFindNextSiblings.input_and_r_6())
+    def test_lazy_6(self, input): self.check(6, input)
+    @given(input=FindNextSiblings.TestFindNextSiblings.input_and_r_7())
+    def test_lazy_7(self, input): self.check(7, input)
+
+
+class TestLazyFindParents(unittest.TestCase):
+    """ TestFindParents.input_and_r_1..7 in the lazy style. """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        FindParents.TestFindParents.setUpClass()
+        cls.test_html_page_element = FindParents.TestFindParents.test_html_page_element
+
+    def check(self, input):
+        (start_tag_name, input_name_filter, input_attrs_filter, input_limit, r_exp) = input
+        tag = self.test_html_page_element.find(string=start_tag_name)
+        r = list(lazy_find(tag, "find_parents", input_name_filter, input_attrs_filter, input_limit))
+        self.assertEqual(len(r), r_exp)
+        r_eager = tag.find_parents(name=input_name_filter, attrs=input_attrs_filter, limit=input_limit)
+        self.assertEqual([id(e) for e in r], [id(e) for e in r_eager])
+
+    def test_limit_zero(self):
+        tag = self.test_html_page_element.find(string="Elsie")
+        for name, attrs in [("p", {}), (True, {}), ("div", {"class": "wrapper_div"})]:
+            r = list(lazy_find(tag, "find_parents", name, attrs, 0))
+            self.assertEqual([id(e) for e in r], [id(e) for e in tag.find_parents(name, attrs, limit=0)])
+            self.assertTrue(r)
+
+    @given(input=FindParents.TestFindParents.input_and_r_1())
+    def test_lazy_1(self, input): self.check(input)
+    @given(input=FindParents.TestFindParents.input_and_r_2())
+    def test_lazy_2(self, input): self.check(input)
+    @given(input=FindParents.TestFindParents.input_and_r_3())
+    def test_lazy_3(self, input): self.check(input)
+    @given(input=FindParents.TestFindParents.input_and_r_4())
+    def test_lazy_4(self, input): self.check(input)
+    @given(input=FindParents.TestFindParents.input_and_r_5())
+    def test_lazy_5(self, input): self.check(input)
+    @given(input=FindParents.TestFindParents.input_and_r_6())
+    def test_lazy_6(self, input): self.check(input)
+    @given(input=FindParents.TestFindParents.input_and_r_7())
+    def test_lazy_7(self, input): self.check(input)
+
+
+class TestLazyFindParent(unittest.TestCase):
+    """ TestFindParent.input_and_r_1..7 in the lazy style. """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        FindParent.TestFindParent.setUpClass()
+        cls.test_html_page_element = FindParent.TestFindParent.test_html_page_element
+
+    def check(self, input):
+        (start_tag_name, input_name_filter, input_attrs_filter, r_exp) = input
+        tag = self.test_html_page_element.find(string=start_tag_name)
+        r = next(lazy_find(tag, "find_parent", input_name_filter, input_attrs_filter), None)
+        r_c = r['class'][0] if not r==None else None
+        self.assertEqual(r_c, r_exp)
+        self.assertIs(r, tag.find_parent(name=input_name_filter, attrs=input_attrs_filter))
+
+    @given(input=FindParent.TestFindParent.input_and_r_1())
+    def test_lazy_1(self, input): self.check(input)
+    @given(input=FindParent.TestFindParent.input_and_r_2())
+    def test_lazy_2(self, input): self.check(input)
+    @given(input=FindParent.TestFindParent.input_and_r_3())
+    def test_lazy_3(self, input): self.check(input)
+    @given(input=FindParent.TestFindParent.input_and_r_4())
+    def test_lazy_4(self, input): self.check(input)
+    @given(input=FindParent.TestFindParent.input_and_r_5())
+    def test_lazy_5(self, input): self.check(input)
+    @given(input=FindParent.TestFindParent.input_and_r_6())
+    def test_lazy_6(self, input): self.check(input)
+    @given(input=FindParent.TestFindParent.input_and_r_7())
+    def test_lazy_7(self, input): self.check(input)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,344 @@
+""" Mutation-interleaved workload: find_* queries on a tree that is being edited.
+
+    The testcases only query a fixture that never changes. Here a private copy of a Dormouse-style
+    document (Corpus.py stories, parsed through FixtureCache.parse(copy=True)) takes a seeded
+    random mix of edits and queries:
+
+        insert_after        a new a.sister / p.brother, or an extracted element, after a random element
+        extract             a random element leaves the tree (to be the next insert_after)
+        decompose           a random leaf tag (an <a>, a p.brother, the <b> of the title) is destroyed
+        reparent            a random tag is appended to a random tag outside its own subtree
+        find_parents, find_parent, find_next_siblings
+                            from a random element, with a NavigationOracle.random_filter filter
+
+    html, head and body are never edited. A Model mirrors the tree as parent / children lists
+    updated by the same edits, never reading bs4's pointers, and answers every query with
+    DifferentialCheck.tag_matches: each bs4 result must be the model's elements in the model's
+    order. The run is split into phases, and per phase the report gives the throughput of every
+    edit (bs4 call only) and of every query, with the query cost per element walked, so an
+    operation that slows down as edits pile up shows as a column that drifts from phase 0.
+
+    Usage: python Mutations.py --stories 200 --steps 20000 --mutations 0.3 --phases 5 --seed 1
+"""
+import argparse
+import collections
+import io
+import random
+import sys
+import time
+import unittest
+from bs4.element import Tag
+
+import Corpus
+import FixtureCache
+from DifferentialCheck import tag_matches
+from NavigationOracle import random_filter
+
+
+MUTATIONS = ["insert_after", "extract", "decompose", "reparent"]
+QUERIES = ["find_parents", "find_parent", "find_next_siblings"]
+
+
+def build_document(stories, seed):
+    """ Markup of one Corpus.py document with `stories` stories. """
+    config = Corpus.CorpusConfig(stories=stories, depth=6, breadth=4, seed=seed)
+    rng = Corpus.document_rng(config.seed, 0)
+    counts = {"tags": collections.Counter(), "classes": collections.Counter(), "strings": collections.Counter()}
+    out = io.StringIO()
+    out.write(Corpus.HEAD)
+    for s in range(stories):
+        Corpus.write_story(out, rng, config, s, counts)
+    out.write(Corpus.TAIL)
+    return out.getvalue()
+
+
+class Model(object):
+    """ Parent / children lists of a soup, kept in step with the edits applied to it. """
+
+    def __init__(self, soup):
+        self.root = soup
+        self.parent = {id(soup): None}
+        self.children = {}
+        self.live = []          # attached elements, for drawing edit and query targets
+        self.position = {}      # id -> index in live
+        self._register(soup)
+        self._attach(soup)
+        self.protected = {id(soup)} | {id(soup.find(name)) for name in ["html", "head", "body"]}
+
+    def _register(self, element):
+        """ Start tracking a subtree that is not in the model yet (a parsed or a new element). """
+        if isinstance(element, Tag):
+            self.children[id(element)] = list(element.contents)
+            for child in element.contents:
+                self.parent[id(child)] = element
+                self._register(child)
+
+    def subtree(self, element):
+        stack = [element]
+        while stack:
+            element = stack.pop()
+            yield element
+            stack.extend(reversed(self.children.get(id(element), [])))
+
+    def _attach(self, element):
+        for e in self.subtree(element):
+            self.position[id(e)] = len(self.live)
+            self.live.append(e)
+
+    def _detach(self, element, forget=False):
+        for e in list(self.subtree(element)):
+            i = self.position.pop(id(e))
+            last = self.live.pop()
+            if last is not e:
+                self.live[i] = last
+                self.position[id(last)] = i
+            if forget:
+                del self.parent[id(e)]
+                self.children.pop(id(e), None)
+
+    def index(self, element):
+        siblings = self.children[id(self.parent[id(element)])]
+        return next(i for i, e in enumerate(siblings) if e is element)
+
+    def inside(self, element, ancestor):
+        while element is not None:
+            if element is ancestor:
+                return True
+            element = self.parent[id(element)]
+        return False
+
+    def ancestors(self, element):
+        p = self.parent[id(element)]
+        while p is not None:
+            yield p
+            p = self.parent[id(p)]
+
+    # edits
+    def extract(self, element, forget=False):
+        del self.children[id(self.parent[id(element)])][self.index(element)]
+        self.parent[id(element)] = None
+        self._detach(element, forget)
+
+    def insert_after(self, element, new):
+        if id(new) not in self.parent:
+            self.parent[id(new)] = None
+            self._register(new)
+        parent = self.parent[id(element)]
+        self.children[id(parent)].insert(self.index(element) + 1, new)
+        self.parent[id(new)] = parent
+        self._attach(new)
+
+    def append(self, parent, element):
+        del self.children[id(self.parent[id(element)])][self.index(element)]
+        self.children[id(parent)].append(element)
+        self.parent[id(element)] = parent
+
+    # queries
+    def find_parents(self, element, name, attrs):
+        return [p for p in self.ancestors(element) if tag_matches(p, name, attrs)]
+
+    def find_parent(self, element, name, attrs):
+        return self.find_parents(element, name, attrs)[:1]
+
+    def find_next_siblings(self, element, name, attrs):
+        siblings = self.children[id(self.parent[id(element)])]
+        return [e for e in siblings[self.index(element) + 1:] if isinstance(e, Tag) and tag_matches(e, name, attrs)]
+
+    def walked(self, op, element, result):
+        """ Elements bs4 steps over to answer the query. """
+        if op == "find_next_siblings":
+            return len(self.children[id(self.parent[id(element)])]) - self.index(element) - 1
+        ancestors = list(self.ancestors(element))
+        if op == "find_parent" and result:
+            return next(i for i, p in enumerate(ancestors) if p is result[0]) + 1
+        return len(ancestors)
+
+
+class Workload(object):
+    """ A private soup, its Model, and a seeded source of edits and queries on both. """
+
+    def __init__(self, stories=100, seed=0):
+        self.rng = random.Random(seed)
+        self.soup = FixtureCache.parse(build_document(stories, seed), "html.parser", copy=True)
+        self.model = Model(self.soup)
+        self.detached = []
+        self.names = sorted({t.name for t in self.soup.find_all(True)})
+        self.classes = sorted({c for t in self.soup.find_all(True) for c in t.get("class", [])})
+        self.serial = 0
+        self.size = len(self.model.live)
+
+    def random_element(self, accept=lambda e: True, attempts=1000):
+        """ A random attached element that accept() takes, or None. """
+        for _ in range(attempts):
+            element = self.rng.choice(self.model.live)
+            if accept(element):
+                return element
+        return None
+
+    def editable(self, element):
+        return id(element) not in self.model.protected
+
+    def leaf_tag(self, element):
+        return (isinstance(element, Tag) and self.editable(element)
+                and not any(isinstance(c, Tag) for c in self.model.children[id(element)]))
+
+    def new_element(self):
+        if self.detached:
+            return self.detached.pop(self.rng.randrange(len(self.detached)))
+        self.serial += 1
+        if self.rng.random() < 0.5:
+            tag = self.soup.new_tag("a", attrs={"class": "sister", "id": "new%d" % self.serial})
+            tag.string = self.rng.choice(Corpus.SISTER_NAMES)
+        else:
+            tag = self.soup.new_tag("p", attrs={"class": "brother"})
+            tag.string = self.rng.choice(Corpus.BROTHER_NAMES)
+        return tag
+
+    def mutate(self, op):
+        """ Apply one edit to the soup and to the model; return (op done, ns of the bs4 call).
+
+            An edit that finds no target (every leaf tag decomposed, say) becomes an insert_after, and
+            so does an extract or decompose while the tree is below 90% of its parsed size, so that
+            the phases query trees of about the same size and differ only in how edited they are.
+        """
+        element = None
+        if op in ("extract", "decompose") and len(self.model.live) < 0.9 * self.size:
+            pass
+        elif op == "extract":
+            element = self.random_element(self.editable)
+        elif op in ("decompose", "reparent"):
+            element = self.random_element(self.leaf_tag if op == "decompose" else
+                                          lambda e: isinstance(e, Tag) and self.editable(e))
+        if element is None:
+            op = "insert_after"
+
+        if op == "insert_after":
+            element = self.random_element(self.editable) or self.soup.head     # body emptied: into <html>
+            new = self.new_element()
+            t0 = time.perf_counter_ns()
+            element.insert_after(new)
+            ns = time.perf_counter_ns() - t0
+            self.model.insert_after(element, new)
+        elif op == "extract":
+            t0 = time.perf_counter_ns()
+            element.extract()
+            ns = time.perf_counter_ns() - t0
+            self.model.extract(element)
+            self.detached.append(element)
+        elif op == "decompose":
+            t0 = time.perf_counter_ns()
+            element.decompose()
+            ns = time.perf_counter_ns() - t0
+            self.model.extract(element, forget=True)
+        else:
+            parent = self.random_element(lambda e: isinstance(e, Tag) and e is not self.soup
+                                         and not self.model.inside(e, element))
+            if parent is None:
+                parent = self.soup.body
+            t0 = time.perf_counter_ns()
+            parent.append(element)
+            ns = time.perf_counter_ns() - t0
+            self.model.append(parent, element)
+        return op, ns
+
+    def query(self, op):
+        """ Run one query on the soup; return (ns, elements walked, result, expected, (start, name, attrs)). """
+        element = self.random_element(lambda e: e is not self.soup)
+        name, attrs = random_filter(self.rng, self.names, self.classes)
+        while op == "find_next_siblings" and not (name or attrs):
+            name, attrs = random_filter(self.rng, self.names, self.classes)     # "" / [] alone select strings too
+        t0 = time.perf_counter_ns()
+        r = getattr(element, op)(name, attrs)
+        ns = time.perf_counter_ns() - t0
+        r = [] if r is None else (r if isinstance(r, list) else [r])
+        expected = getattr(self.model, op)(element, name, attrs)
+        return ns, self.model.walked(op, element, expected), r, expected, (element, name, attrs)
+
+
+def run(stories, steps, mutation_ratio, phases, seed):
+    """ Yield per phase ({op: [count, ns, elements walked]}, mismatching queries, attached elements). """
+    workload = Workload(stories, seed)
+    for _ in range(phases):
+        stats = {op: [0, 0, 0] for op in MUTATIONS + QUERIES}
+        mismatches = []
+        for _ in range(max(1, steps // phases)):
+            if workload.rng.random() < mutation_ratio:
+                op, ns = workload.mutate(workload.rng.choice(MUTATIONS))
+                stats[op][0] += 1
+                stats[op][1] += ns
+            else:
+                op = workload.rng.choice(QUERIES)
+                ns, walked, r, expected, call = workload.query(op)
+                stats[op][0] += 1
+                stats[op][1] += ns
+                stats[op][2] += walked
+                if [id(e) for e in r] != [id(e) for e in expected]:
+                    mismatches.append((op,) + call)
+        yield stats, mismatches, len(workload.model.live)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stories", type=int, default=200)
+    parser.add_argument("--steps", type=int, default=20000)
+    parser.add_argument("--mutations", type=float, default=0.3, help="share of the steps that edit the tree")
+    parser.add_argument("--phases", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if args.phases < 1 or args.steps < 1:
+        parser.error("--phases and --steps must be at least 1")
+    print("edits: ops/s; queries: ops/s / ns per element walked")
+    header = "%5s %7s " % ("phase", "nodes") + " ".join("%18s" % op for op in MUTATIONS + QUERIES) + " %8s" % "mismatch"
+    print(header)
+    print("-" * len(header))
+    failed = 0
+    first = None
+    for phase, (stats, mismatches, nodes) in enumerate(run(args.stories, args.steps, args.mutations, args.phases,
+                                                           args.seed)):
+        rates = {op: count / (ns / 1e9) if ns else 0.0 for op, (count, ns, _) in stats.items()}
+        first = first or rates
+        cells = ["%.0f" % rates[op] if op in MUTATIONS else
+                 "%.0f / %.1f" % (rates[op], stats[op][1] / max(stats[op][2], 1)) for op in MUTATIONS + QUERIES]
+        print("%5d %7d " % (phase, nodes) + " ".join("%18s" % c for c in cells) + " %8d" % len(mismatches))
+        for mismatch in mismatches[:3]:
+            print("  mismatch: %s from %r, name=%r, attrs=%r" % mismatch)
+        failed += len(mismatches)
+    print("last / first phase throughput: " + "  ".join(
+        "%s %.2f" % (op, rates[op] / first[op]) for op in MUTATIONS + QUERIES if first[op] and rates[op]))
+    return 1 if failed else 0
+
+
+class TestMutations(unittest.TestCase):
+    """ Queries on an edited tree return what the model of the edits predicts. """
+
+    def test_interleaved(self):
+        phases = list(run(stories=20, steps=2000, mutation_ratio=0.4, phases=2, seed=7))
+        self.assertEqual([mismatches for _, mismatches, _ in phases], [[], []])
+        done = {op: sum(stats[op][0] for stats, _, _ in phases) for op in MUTATIONS + QUERIES}
+        self.assertTrue(all(done.values()), done)
+
+    def test_model_tracks_edits(self):
+        workload = Workload(10, 3)
+        for i in range(400):
+            workload.mutate(MUTATIONS[i % 4])
+        model = workload.model
+
+        def markup(element, children):
+            if not isinstance(element, Tag):
+                return str(element)
+            return "<%s>%s</%s>" % (element.name, "".join(markup(c, children) for c in children(element)),
+                                     element.name)
+        self.assertEqual(markup(workload.soup, lambda e: model.children[id(e)]),
+                         markup(workload.soup, lambda e: e.contents))
+        self.assertEqual(len(model.live), len(list(workload.soup.descendants)) + 1)
+
+    def test_mismatch_detected(self):
+        workload = Workload(5, 1)
+        sister = workload.soup.find("a", class_="sister")
+        sister.parent.append(workload.soup.new_tag("a", attrs={"class": "sister"}))     # behind the model's back
+        self.assertNotEqual(sister.find_next_siblings("a", {"class": "sister"}),
+                            workload.model.find_next_siblings(sister, "a", {"class": "sister"}))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
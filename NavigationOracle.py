@@ -0,0 +1,397 @@
+""" NumPy-backed oracle for find_parents(), find_parent() and find_next_siblings().
+
+    NavigationOracle flattens a parsed soup into arrays (parent index, depth, tag-name id,
+    attribute-value ids, tag.string ids and sibling order, all in document order) and answers
+    the three navigation queries from them, so the expected result of any filter can be computed
+    for generated documents instead of being hard-coded per fixture like r_exp.
+
+    Filters are evaluated once per distinct name / attribute value / text in the document and
+    gathered to a per-node mask that is cached per filter; a query is then a gather over the
+    ancestor chain or a slice of the parent's children. The matching rules mirror the ones
+    documented for bs4's SoupStrainer, including its corner cases (an empty string name matches
+    no tag, an empty list name matches every tag, text filters skip tags unless a name or attrs
+    filter is given).
+
+    Usage: python NavigationOracle.py --size 100000 --queries 5000
+"""
+import argparse
+import random
+import re
+import time
+import unittest
+import numpy as np
+from bs4.element import Tag
+from hypothesis import given, settings
+from hypothesis.strategies import *
+
+import FixtureCache
+from FilterSpaces import NEXT_SIBLINGS_SPACES, PARENTS_NAME_FILTERS, freeze
+
+
+MASK_CACHE_SIZE = 256
+
+
+def normalize(value):
+    """ Normalize a filter value the way SoupStrainer does. """
+    if isinstance(value, (str, bool, re.Pattern)) or value is None or callable(value):
+        return value
+    if isinstance(value, bytes):
+        return value.decode("utf8")
+    if hasattr(value, "__iter__"):
+        return [v if (hasattr(v, "__iter__") and not isinstance(v, (str, bytes))) else normalize(v)
+                for v in value]
+    return str(value)
+
+
+def match_value(value, f):
+    """ Whether an attribute value or a text (str, tuple of str for multi-valued
+        attributes, or None when missing) matches filter f. """
+    if isinstance(value, tuple):
+        return any(match_value(v, f) for v in value) or match_value(" ".join(value), f)
+    if f is True:
+        return value is not None
+    if callable(f) and not isinstance(f, re.Pattern):
+        return bool(f(value))
+    if value is None:
+        return not f
+    if hasattr(f, "__iter__") and not isinstance(f, str):
+        return any(match_value(value, item) for item in f)
+    if isinstance(f, str):
+        return value == f
+    if isinstance(f, re.Pattern):
+        return f.search(value) is not None
+    return False
+
+
+def match_name(name, prefix, f):
+    """ Whether a tag called name (with namespace prefix) matches a non-callable name filter f. """
+    if f is True:
+        return True
+    if hasattr(f, "__iter__") and not isinstance(f, str):
+        return any(match_name(name, prefix, item) for item in f)
+    if isinstance(f, str):
+        return name == f or (bool(prefix) and prefix + ":" + name == f)
+    if isinstance(f, re.Pattern):
+        return (f.search(name) is not None
+                or (bool(prefix) and f.search(prefix + ":" + name) is not None))
+    return False
+
+
+class NavigationOracle(object):
+    """ Array form of a parsed soup; nodes are numbered in document order, 0 is the soup itself. """
+
+    def __init__(self, soup):
+        nodes = [soup]
+        nodes.extend(soup.descendants)
+        index = {id(node): i for i, node in enumerate(nodes)}
+        n = len(nodes)
+
+        parent = [-1] * n
+        depth = [0] * n
+        sibling_pos = [0] * n
+        child_count = [0] * n
+        is_tag = [False] * n
+        truthy = [True] * n
+        name_id = [-1] * n
+        text_id = [-1] * n
+        attr_ids = {}          # attribute name -> list of value ids
+        attr_values = {}       # attribute name -> {value: id}
+        names, texts = {}, {}
+
+        for i, node in enumerate(nodes):
+            p = node.parent
+            if p is not None:
+                pi = index[id(p)]
+                parent[i] = pi
+                depth[i] = depth[pi] + 1
+                sibling_pos[i] = child_count[pi]
+                child_count[pi] += 1
+            if isinstance(node, Tag):
+                is_tag[i] = True
+                name_id[i] = names.setdefault((node.name, node.prefix), len(names))
+                for key, value in node.attrs.items():
+                    if isinstance(value, list):
+                        value = tuple(value)
+                    ids = attr_ids.get(key)
+                    if ids is None:
+                        ids = attr_ids[key] = [-1] * n
+                        attr_values[key] = {}
+                    values = attr_values[key]
+                    ids[i] = values.setdefault(value, len(values))
+                s = node.string
+                if s is not None:
+                    text_id[i] = texts.setdefault(str(s), len(texts))
+            else:
+                truthy[i] = bool(node)
+                text_id[i] = texts.setdefault(str(node), len(texts))
+
+        self.nodes = nodes
+        self.index = index
+        self.parent = np.array(parent, dtype=np.int64)
+        self.depth = np.array(depth, dtype=np.int64)
+        self.sibling_pos = np.array(sibling_pos, dtype=np.int64)
+        self.is_tag = np.array(is_tag, dtype=bool)
+        self.truthy = np.array(truthy, dtype=bool)
+        self.name_id = np.array(name_id, dtype=np.int64)
+        self.text_id = np.array(text_id, dtype=np.int64)
+        self.attr_ids = {key: np.array(ids, dtype=np.int64) for key, ids in attr_ids.items()}
+        self.names = list(names)
+        self.texts = list(texts)
+        self.attr_values = {key: list(values) for key, values in attr_values.items()}
+
+        # children of node p, in order, are children[child_ptr[p]:child_ptr[p + 1]]
+        self.child_ptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.array(child_count, dtype=np.int64), out=self.child_ptr[1:])
+        self.children = np.argsort(self.parent[1:], kind="stable") + 1
+
+        self._masks = {}
+        self._ancestors = {}
+
+    def __len__(self):
+        return len(self.nodes)
+
+    # ---- per-node masks ----
+
+    def _gather(self, ids, vocab, f, match):
+        """ Evaluate f once per distinct value and gather the result to every node;
+            ids == -1 stands for a missing value. """
+        table = np.empty(len(vocab) + 1, dtype=bool)
+        table[0] = match(None, f)
+        table[1:] = np.fromiter((match(v, f) for v in vocab), dtype=bool, count=len(vocab))
+        return table[ids + 1]
+
+    def _name_mask(self, f):
+        if not f and not isinstance(f, str):
+            return self.is_tag.copy()           # None, [] and False match every tag
+        if callable(f) and not isinstance(f, re.Pattern):
+            return np.fromiter((isinstance(node, Tag) and bool(f(node)) for node in self.nodes),
+                               dtype=bool, count=len(self.nodes))
+        if f == "":
+            # SoupStrainer rejects unprefixed tags whose name differs, and matches prefixed ones
+            return self._gather(self.name_id, self.names, f, lambda v, f: v is not None and bool(v[1]))
+        return self._gather(self.name_id, self.names, f,
+                            lambda v, f: v is not None and match_name(v[0], v[1], f))
+
+    def _attr_mask(self, key, f):
+        ids = self.attr_ids.get(key)
+        if ids is None:
+            return np.full(len(self.nodes), match_value(None, f), dtype=bool)
+        return self._gather(ids, self.attr_values[key], f, match_value)
+
+    def mask(self, name=None, attrs={}, string=None, **kwargs):
+        """ Boolean array over all nodes: whether SoupStrainer(name, attrs, string, **kwargs)
+            matches the node when it comes out of a find_* generator. """
+        if string is None and "text" in kwargs:
+            string = kwargs.pop("text")
+        if not isinstance(attrs, dict):
+            kwargs["class"] = attrs
+            attrs = None
+        if "class_" in kwargs:
+            kwargs["class"] = kwargs.pop("class_")
+        if kwargs:
+            attrs = dict(attrs or {}, **kwargs)
+        name = normalize(name)
+        attrs = {key: normalize(value) for key, value in (attrs or {}).items()}
+        string = normalize(string)
+
+        key = (freeze(name), freeze(attrs), freeze(string))
+        m = self._masks.get(key)
+        if m is not None:
+            return m
+
+        if string and not name and not attrs:
+            tags = np.zeros(len(self.nodes), dtype=bool)     # looking for text only
+        else:
+            tags = self._name_mask(name)
+            for attr, f in attrs.items():
+                tags &= self._attr_mask(attr, f)
+            if string:
+                tags &= self._gather(self.text_id, self.texts, string, match_value)
+        if not name and not attrs:
+            strings = (~self.is_tag) & self.truthy & self._gather(self.text_id, self.texts, string, match_value)
+            m = tags | strings
+        else:
+            m = tags
+        m &= self.truthy
+
+        if len(self._masks) >= MASK_CACHE_SIZE:
+            self._masks.pop(next(iter(self._masks)))
+        self._masks[key] = m
+        return m
+
+    # ---- navigation ----
+
+    def ancestors(self, i):
+        """ Indices of the parents of node i, closest first. """
+        chain = self._ancestors.get(i)
+        if chain is None:
+            parent = self.parent
+            out = []
+            p = parent[i]
+            while p >= 0:
+                out.append(p)
+                p = parent[p]
+            chain = self._ancestors[i] = np.array(out, dtype=np.int64)
+        return chain
+
+    def next_siblings(self, i):
+        """ Indices of the siblings after node i, in document order. """
+        p = self.parent[i]
+        if p < 0:
+            return np.empty(0, dtype=np.int64)
+        return self.children[self.child_ptr[p] + self.sibling_pos[i] + 1:self.child_ptr[p + 1]]
+
+    @staticmethod
+    def _select(candidates, m, limit):
+        """ The first `limit` candidates that match m (all of them without a limit). With a limit
+            the candidates are scanned in growing chunks, so the cost follows the position of
+            the last hit rather than the number of candidates. """
+        if not limit:
+            return candidates[m[candidates]]
+        limit = max(limit, 1)
+        found = []
+        count = 0
+        start, chunk = 0, 64
+        while start < len(candidates) and count < limit:
+            part = candidates[start:start + chunk]
+            hits = part[m[part]]
+            found.append(hits)
+            count += len(hits)
+            start += chunk
+            chunk *= 4
+        if not found:
+            return candidates[:0]
+        return np.concatenate(found)[:limit]
+
+    def find_parents(self, i, name=None, attrs={}, limit=None, **kwargs):
+        return self._select(self.ancestors(i), self.mask(name, attrs, **kwargs), limit)
+
+    def find_parent(self, i, name=None, attrs={}, **kwargs):
+        hits = self.find_parents(i, name, attrs, 1, **kwargs)
+        return int(hits[0]) if len(hits) else None
+
+    def find_next_siblings(self, i, name=None, attrs={}, string=None, limit=None, **kwargs):
+        return self._select(self.next_siblings(i), self.mask(name, attrs, string, **kwargs), limit)
+
+    def indices(self, elements):
+        """ Node indices of the elements of a bs4 ResultSet, or of a single element / None. """
+        if elements is None:
+            return None
+        if not isinstance(elements, list):
+            return self.index[id(elements)]
+        return [self.index[id(e)] for e in elements]
+
+
+def random_filter(rng, names, classes):
+    """ Draw a (name, attrs) filter pair from the tag names and classes of a document. """
+    name = rng.choice([rng.choice(names), re.compile("^" + re.escape(rng.choice(names)[:1])),
+                       rng.sample(names, min(2, len(names))), True, "", []])
+    attrs = rng.choice([{}, {"class": rng.choice(classes)}, {"class": re.compile(re.escape(rng.choice(classes)[:3]))}])
+    return name, attrs
+
+
+def main(argv=None):
+    from BenchFindNextSiblings import build_wide_document
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000, help="number of siblings of the generated document")
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--check", type=int, default=200, help="queries also run through bs4 and compared")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    rng = random.Random(args.seed)
+
+    soup = FixtureCache.parse(build_wide_document(args.size), "html.parser")
+    t0 = time.perf_counter()
+    oracle = NavigationOracle(soup)
+    print("flattened %d nodes in %.2f s" % (len(oracle), time.perf_counter() - t0))
+
+    names = [name for name, _ in oracle.names]
+    classes = sorted({c for v in oracle.attr_values.get("class", []) for c in v})
+    starts = [int(i) for i in np.flatnonzero(oracle.is_tag)[:: max(1, len(oracle) // 1000)]]
+    queries = [(rng.choice(starts), random_filter(rng, names, classes), rng.choice([None, 1, 5])) for _ in range(args.queries)]
+    t0 = time.perf_counter()
+    for start, (name, attrs), limit in queries:
+        oracle.find_parents(start, name, attrs, limit)
+        oracle.find_next_siblings(start, name, attrs, limit=limit)
+    dt = time.perf_counter() - t0
+    print("%d queries in %.2f s: %.0f queries/s" % (2 * len(queries), dt, 2 * len(queries) / dt))
+
+    for start, (name, attrs), limit in queries[:args.check]:
+        element = oracle.nodes[start]
+        assert oracle.find_parents(start, name, attrs, limit).tolist() == \
+            oracle.indices(element.find_parents(name, attrs, limit))
+        assert oracle.find_next_siblings(start, name, attrs, limit=limit).tolist() == \
+            oracle.indices(element.find_next_siblings(name, attrs, limit=limit))
+    print("%d queries agree with bs4" % min(args.check, len(queries)))
+
+
+class TestNavigationOracle(unittest.TestCase):
+    """ The oracle must agree with bs4 on the fixtures of the testcase classes. """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        import FindNextSiblings
+        import FindParents
+        FindNextSiblings.TestFindNextSiblings.setUpClass()
+        FindParents.TestFindParents.setUpClass()
+        cls.siblings_soup = FindNextSiblings.TestFindNextSiblings.test_html_page_element
+        cls.parents_soup = FindParents.TestFindParents.test_html_page_element
+        cls.siblings_oracle = NavigationOracle(cls.siblings_soup)
+        cls.parents_oracle = NavigationOracle(cls.parents_soup)
+
+    def test_find_next_siblings_spaces(self):
+        tag = self.siblings_soup.a
+        start = self.siblings_oracle.indices(tag)
+        for case, space in NEXT_SIBLINGS_SPACES.items():
+            for name in space["name"]:
+                for attrs in space["attrs"]:
+                    for text in space["text"]:
+                        for limit in [None, 1, 2]:
+                            kwargs = {space["text_kwarg"]: text}
+                            r = tag.find_next_siblings(name=name, attrs=attrs, limit=limit, **kwargs)
+                            r_oracle = self.siblings_oracle.find_next_siblings(start, name, attrs, limit=limit, **kwargs)
+                            self.assertEqual(r_oracle.tolist(), self.siblings_oracle.indices(r))
+
+    def test_find_parents_spaces(self):
+        for start_tag_name in ["Elsie", "Lacie", "Tillie"]:
+            tag = self.parents_soup.find(string=start_tag_name)
+            start = self.parents_oracle.indices(tag)
+            for name in PARENTS_NAME_FILTERS + ["p", re.compile("^p"), "div_not_exist"]:
+                for attrs in [{}, {"class": "wrapper_div"}, {"class": "class_not_exits"}]:
+                    for limit in [None, 1, 3, 10]:
+                        r = tag.find_parents(name=name, attrs=attrs, limit=limit)
+                        self.assertEqual(self.parents_oracle.find_parents(start, name, attrs, limit).tolist(),
+                                         self.parents_oracle.indices(r))
+                    self.assertEqual(self.parents_oracle.find_parent(start, name, attrs),
+                                     self.parents_oracle.indices(tag.find_parent(name=name, attrs=attrs)))
+
+    def test_callable_filters(self):
+        tag = self.siblings_soup.a
+        start = self.siblings_oracle.indices(tag)
+        has_id = lambda t: t.has_attr("id")
+        r = tag.find_next_siblings(has_id)
+        self.assertEqual(self.siblings_oracle.find_next_siblings(start, has_id).tolist(), self.siblings_oracle.indices(r))
+        brother = lambda s: s is not None and s.startswith("Tom")
+        r = tag.find_next_siblings(string=brother)
+        self.assertEqual(self.siblings_oracle.find_next_siblings(start, string=brother).tolist(),
+                         self.siblings_oracle.indices(r))
+
+    @settings(max_examples=300, deadline=None)
+    @given(start=integers(min_value=0), name=sampled_from(["a", "p", "b", "div", re.compile("^p"), ["a", "b"], True, "", []]),
+           attrs=sampled_from([{}, {"class": "sister"}, {"class": "story"}, {"id": re.compile("link[12]")}, {"class": True}]),
+           string=sampled_from([None, "Lacie", re.compile("^T"), True, ["Tom", "Bob"], ""]),
+           limit=sampled_from([None, 1, 2, 5]))
+    def test_black_random_start(self, start, name, attrs, string, limit):
+        oracle = self.siblings_oracle
+        start = start % len(oracle)
+        element = oracle.nodes[start]
+        self.assertEqual(oracle.find_next_siblings(start, name, attrs, string, limit).tolist(),
+                         oracle.indices(element.find_next_siblings(name, attrs, string=string, limit=limit)))
+        # find_parents has no string parameter, only the deprecated text keyword reaches the strainer
+        self.assertEqual(oracle.find_parents(start, name, attrs, limit, text=string).tolist(),
+                         oracle.indices(element.find_parents(name, attrs, limit, text=string)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+""" Process-pool runner for the testcase classes.
+
+    Test classes (--split class, the default) or individual test methods (--split test) are
+    spread across a pool of worker processes, in batches: every task is a contiguous run of at
+    least --batch ids (about two tasks per worker by default), so process startup, imports, IPC
+    and setUpClass are paid per batch rather than per test method. Every worker parses each
+    fixture once, through FixtureCache, however many of its tests use it.
+
+    Hypothesis example databases: every worker reads the shared database read-only and saves new
+    examples into a database of its own; after the run those are merged into the shared one file
+    by file. File names are content hashes, so the merge never overwrites or loses an entry.
+
+    The runner prints per-worker timing and, unless --no-serial is given, the end-to-end speedup
+    against running the same modules serially with unittest.main().
+
+    Usage: python ParallelRunner.py --workers 4 FindNextSiblings FindParents FindParent
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import time
+import traceback
+import unittest
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from hypothesis import settings
+from hypothesis.configuration import storage_directory
+from hypothesis.database import DirectoryBasedExampleDatabase, MultiplexedDatabase, ReadOnlyDatabase
+
+
+TEST_MODULES = ["FindNextSiblings", "FindParents", "FindParent"]
+
+
+def shared_database_path():
+    return str(storage_directory("examples"))
+
+
+def worker_database_path(pid):
+    return str(storage_directory("workers", str(pid)))
+
+
+def collect_test_ids(modules, split):
+    """ Ids of the tests to distribute: one per test method, or one per TestCase class. """
+    suite = unittest.defaultTestLoader.loadTestsFromNames(modules)
+    ids = []
+
+    def walk(s):
+        for t in s:
+            if isinstance(t, unittest.TestSuite):
+                walk(t)
+            else:
+                ids.append(t.id())
+    walk(suite)
+    if split == "class":
+        classes = []
+        for i in ids:
+            c = i.rsplit(".", 1)[0]
+            if c not in classes:
+                classes.append(c)
+        return classes
+    return ids
+
+
+def batches(ids, workers, size=None):
+    """ Contiguous runs of ids, so the tests of one class stay together: about two per worker, or
+        runs of `size` ids. """
+    if size is None:
+        size = max(1, -(-len(ids) // (2 * workers)))
+    return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+
+def _init_worker():
+    """ Route Hypothesis saves to a per-worker database before any test module is imported. """
+    db = MultiplexedDatabase(ReadOnlyDatabase(DirectoryBasedExampleDatabase(shared_database_path())),
+                             DirectoryBasedExampleDatabase(worker_database_path(os.getpid())))
+    settings.register_profile("parallel-worker", database=db)
+    settings.load_profile("parallel-worker")
+
+
+class TimingResult(unittest.TestResult):
+    """ TestResult that keeps (test id, outcome, seconds, details) for every test. """
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self._started = None
+
+    def startTest(self, test):
+        super().startTest(test)
+        self._started = time.perf_counter()
+
+    def _record(self, test, outcome, details=""):
+        self.records.append((test.id(), outcome, time.perf_counter() - self._started, details))
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self._record(test, "ok")
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._record(test, "FAIL", self.failures[-1][1])
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        if self._started is None:       # setUpClass failed, no test was started
+            self._started = time.perf_counter()
+        self._record(test, "ERROR", self.errors[-1][1])
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._record(test, "skip", reason)
+
+
+def run_in_worker(test_ids):
+    """ Run a batch of tests (or TestCase classes) as one suite; return (pid, seconds, records). """
+    t0 = time.perf_counter()
+    try:
+        suite = unittest.defaultTestLoader.loadTestsFromNames(test_ids)
+        result = TimingResult()
+        suite.run(result)
+        records = result.records
+    except Exception:
+        records = [(", ".join(test_ids), "ERROR", 0.0, traceback.format_exc())]
+    return os.getpid(), time.perf_counter() - t0, records
+
+
+def merge_databases(pids):
+    """ Copy every example saved by the workers into the shared database; return the number added. """
+    shared = shared_database_path()
+    added = 0
+    for pid in pids:
+        src = worker_database_path(pid)
+        if not os.path.isdir(src):
+            continue
+        for key_dir in os.listdir(src):
+            dst_dir = os.path.join(shared, key_dir)
+            os.makedirs(dst_dir, exist_ok=True)
+            for name in os.listdir(os.path.join(src, key_dir)):
+                dst = os.path.join(dst_dir, name)
+                if os.path.exists(dst):
+                    continue
+                tmp = "%s.%d.tmp" % (dst, os.getpid())
+                shutil.copyfile(os.path.join(src, key_dir, name), tmp)
+                os.replace(tmp, dst)
+                added += 1
+        shutil.rmtree(src, ignore_errors=True)
+    return added
+
+
+def run_parallel(modules, workers, split, batch=None):
+    tasks = batches(collect_test_ids(modules, split), workers, batch)
+    workers = min(workers, len(tasks))
+    busy = {}           # pid -> [tasks, seconds]
+    records = []
+    t0 = time.perf_counter()
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+        futures = [pool.submit(run_in_worker, b) for b in tasks]
+        for future in as_completed(futures):
+            pid, seconds, r = future.result()
+            entry = busy.setdefault(pid, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            records.extend(r)
+    wall = time.perf_counter() - t0
+    return wall, busy, records
+
+
+def run_serial(modules):
+    """ Wall time of `python -m unittest <modules>`, the path every module's unittest.main() takes. """
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "unittest", "-q"] + modules,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    return time.perf_counter() - t0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=TEST_MODULES)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--split", choices=["test", "class"], default="class")
+    parser.add_argument("--batch", type=int, help="ids per task (default: about two tasks per worker)")
+    parser.add_argument("--no-serial", action="store_true", help="skip the serial baseline run")
+    args = parser.parse_args(argv)
+    if args.workers > (os.cpu_count() or 1):
+        print("note: %d workers on %d CPUs; the extra workers only add startup time" % (args.workers, os.cpu_count() or 1))
+
+    wall, busy, records = run_parallel(args.modules, args.workers, args.split, args.batch)
+    added = merge_databases(busy)
+
+    failed = [r for r in records if r[1] in ("FAIL", "ERROR")]
+    for test_id, outcome, seconds, details in failed:
+        print("%s: %s\n%s" % (outcome, test_id, details))
+
+    print("%-10s %6s %10s %7s" % ("worker", "tasks", "busy_s", "util"))
+    for pid, (tasks, seconds) in sorted(busy.items()):
+        print("%-10d %6d %10.2f %6.0f%%" % (pid, tasks, seconds, 100 * seconds / wall))
+    print("%d tests, %d failed, %d examples merged into %s" % (len(records), len(failed), added, shared_database_path()))
+    print("parallel: %.2f s with %d workers" % (wall, args.workers))
+    if not args.no_serial:
+        serial = run_serial(args.modules)
+        print("serial:   %.2f s, speedup %.2fx" % (serial, serial / wall))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
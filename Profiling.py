@@ -0,0 +1,320 @@
+""" Opt-in cProfile hook for the test methods of the three testcase classes.
+
+    With PROFILE_TESTS set (to a directory, or to 1 for .profiles/), every test method of the
+    classes decorated with @profile_tests runs under cProfile and leaves, per test:
+        <Class>.<test>.pstats       the raw profile, for pstats / snakeviz
+        <Class>.<test>.collapsed    collapsed stacks ("f;g;h microseconds"), for flamegraph.pl
+                                    or speedscope; rebuilt from the caller graph, so time is split
+                                    across call paths in proportion to their cumulative time
+        <Class>.<test>.txt          the top bs4 functions by cumulative time
+    The hook also times every outermost find_parents / find_parent / find_next_siblings call by
+    the kind of its name filter (FilterSpaces.filter_kind). At exit, summary.txt ranks the
+    slowest tests, the filter kinds and the bs4 functions over the whole run.
+
+    Without PROFILE_TESTS the decorator returns the class unchanged.
+
+    Usage: PROFILE_TESTS=.profiles python -m unittest FindParents
+           python Profiling.py --out .profiles FindNextSiblings FindParents FindParent
+"""
+import argparse
+import atexit
+import cProfile
+import functools
+import io
+import os
+import pstats
+import re
+import sys
+import time
+import unittest
+from bs4.element import PageElement
+
+from FilterSpaces import filter_kind
+
+
+METHODS = ["find_parents", "find_parent", "find_next_siblings"]
+TOP = 15
+MIN_EDGE_SECONDS = 1e-6     # call paths below this are not written to the collapsed stacks
+
+
+def profile_dir():
+    value = os.environ.get("PROFILE_TESTS", "")
+    if value in ("", "0"):
+        return None
+    if value == "1":
+        return os.path.join(os.path.dirname(os.path.abspath(__file__)), ".profiles")
+    return value
+
+
+_tests = []         # (test id, seconds)
+_calls = {}         # (method, filter kind) -> [calls, seconds]
+_profiles = []      # pstats paths written in this process
+
+
+def kind_of(args, kwargs):
+    name = kwargs.get("name", args[0] if args else None)
+    if name is None:
+        return "None"
+    try:
+        return filter_kind(name)
+    except ValueError:
+        return type(name).__name__
+
+
+class FilterTimer(object):
+    """ Patch the three methods to add the time of each outermost call to _calls by filter kind. """
+
+    def __init__(self):
+        self._saved = []
+        self._depth = 0
+
+    def _timed(self, method, fn):
+        timer = self
+
+        @functools.wraps(fn)
+        def wrapper(self_, *args, **kwargs):
+            if timer._depth:
+                return fn(self_, *args, **kwargs)
+            timer._depth += 1
+            t0 = time.perf_counter()
+            try:
+                return fn(self_, *args, **kwargs)
+            finally:
+                entry = _calls.setdefault((method, kind_of(args, kwargs)), [0, 0.0])
+                entry[0] += 1
+                entry[1] += time.perf_counter() - t0
+                timer._depth -= 1
+        return wrapper
+
+    def __enter__(self):
+        for name in METHODS:
+            fn = PageElement.__dict__[name]
+            self._saved.append((name, fn))
+            setattr(PageElement, name, self._timed(name, fn))
+        return self
+
+    def __exit__(self, *exc):
+        while self._saved:
+            name, fn = self._saved.pop()
+            setattr(PageElement, name, fn)
+        return False
+
+
+def label(func):
+    filename, line, name = func
+    if filename == "~":
+        return name             # built-ins
+    return "%s (%s:%d)" % (name, os.path.basename(filename), line)
+
+
+def collapsed_stacks(stats):
+    """ {"root;...;leaf": seconds} of a pstats.Stats, from its caller graph. """
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    stacks = {}
+
+    def walk(func, path, labels, cumulative):
+        _, _, tottime, total_cumulative, _ = stats.stats[func]
+        share = cumulative / total_cumulative if total_cumulative else 0.0
+        key = ";".join(labels)
+        stacks[key] = stacks.get(key, 0.0) + tottime * share
+        for callee, edge_cumulative in callees.get(func, []):
+            t = edge_cumulative * share
+            if callee not in path and t >= MIN_EDGE_SECONDS:
+                walk(callee, path | {callee}, labels + [label(callee)], t)
+
+    # roots: called from outside the profile (the frame that enabled it, or nothing)
+    for func, (_, _, _, cumulative, callers) in stats.stats.items():
+        outside = [edge[3] for caller, edge in callers.items() if caller not in stats.stats]
+        if (not callers or outside) and "_lsprof.Profiler" not in func[2]:     # not profile.disable()
+            walk(func, {func}, [label(func)], sum(outside) if outside else cumulative)
+    return stacks
+
+
+def write_collapsed(stats, path):
+    with open(path, "w") as f:
+        for stack, seconds in sorted(collapsed_stacks(stats).items()):
+            us = int(round(seconds * 1e6))
+            if us:
+                f.write("%s %d\n" % (stack, us))
+
+
+def bs4_functions(stats, top=TOP):
+    """ [(cumulative s, total s, calls, label)] of the bs4 functions with the largest cumulative time. """
+    marker = os.sep + "bs4" + os.sep
+    rows = [(ct, tt, nc, label(func)) for func, (_, nc, tt, ct, _) in stats.stats.items() if marker in func[0]]
+    return sorted(rows, reverse=True)[:top]
+
+
+def format_functions(rows):
+    lines = ["%10s %10s %9s  %s" % ("cum_ms", "tot_ms", "calls", "function")]
+    lines += ["%10.2f %10.2f %9d  %s" % (ct * 1e3, tt * 1e3, nc, name) for ct, tt, nc, name in rows]
+    return "\n".join(lines)
+
+
+def _enabled(profile, fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        profile.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profile.disable()
+    return wrapper
+
+
+def _profiled(test_id, fn, directory):
+    """ fn profiled into <directory>/<test_id>.*. For @given tests only the test body is profiled,
+        once per example, through the reassignable .hypothesis.inner_test: the engine would
+        otherwise dominate the profile, and its proxy shares the code location of the body. """
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        profile = cProfile.Profile()
+        t0 = time.perf_counter()
+        handle = getattr(fn, "hypothesis", None)
+        if handle is not None:
+            inner_test = handle.inner_test
+            handle.inner_test = _enabled(profile, inner_test)
+            run = fn
+        else:
+            run = _enabled(profile, fn)
+        with FilterTimer():
+            try:
+                return run(self, *args, **kwargs)
+            finally:
+                if handle is not None:
+                    handle.inner_test = inner_test
+                _tests.append((test_id, time.perf_counter() - t0))
+                base = os.path.join(directory, test_id)
+                profile.dump_stats(base + ".pstats")
+                _profiles.append(base + ".pstats")
+                stats = pstats.Stats(profile)
+                write_collapsed(stats, base + ".collapsed")
+                with open(base + ".txt", "w") as f:
+                    f.write(format_functions(bs4_functions(stats)) + "\n")
+    return wrapper
+
+
+def profile_tests(cls):
+    """ Class decorator: profile every test method of cls when PROFILE_TESTS is set. """
+    directory = profile_dir()
+    if directory is None:
+        return cls
+    os.makedirs(directory, exist_ok=True)
+    for name, fn in list(vars(cls).items()):
+        if name.startswith("test") and callable(fn):
+            setattr(cls, name, _profiled("%s.%s" % (cls.__name__, name), fn, directory))
+    return cls
+
+
+def summary(top=10):
+    lines = ["slowest tests (profiled):"]
+    lines += ["  %8.1f ms  %s" % (s * 1e3, t) for t, s in sorted(_tests, key=lambda r: -r[1])[:top]]
+    lines.append("find_* time by method and name filter kind:")
+    lines.append("  %-20s %-9s %8s %10s %10s" % ("method", "kind", "calls", "total_ms", "us/call"))
+    for (method, kind), (calls, seconds) in sorted(_calls.items(), key=lambda r: -r[1][1]):
+        lines.append("  %-20s %-9s %8d %10.1f %10.1f" % (method, kind, calls, seconds * 1e3, seconds / calls * 1e6))
+    if _profiles:
+        stats = pstats.Stats(*_profiles)
+        lines.append("top bs4 functions over all profiled tests:")
+        lines += ["  " + line for line in format_functions(bs4_functions(stats)).splitlines()]
+    return "\n".join(lines)
+
+
+@atexit.register
+def _report():
+    directory = profile_dir()
+    if directory is None or not _tests:
+        return
+    text = summary()
+    with open(os.path.join(directory, "summary.txt"), "w") as f:
+        f.write(text + "\n")
+    print(text, file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=["FindNextSiblings", "FindParents", "FindParent"])
+    parser.add_argument("--out", default=".profiles")
+    args = parser.parse_args(argv)
+    os.environ["PROFILE_TESTS"] = args.out          # before the test modules are imported
+    suite = unittest.defaultTestLoader.loadTestsFromNames(args.modules)
+    result = unittest.TextTestRunner(verbosity=1).run(suite)
+    return 0 if result.wasSuccessful() else 1
+
+
+class TestProfiling(unittest.TestCase):
+    """ The hook writes the three files per test and the collapsed stacks add up to the profile. """
+
+    def test_profiled_class(self):
+        import tempfile
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup('<div class="d"><p><a>Elsie</a></p></div>', "html.parser")
+
+        class Probe(unittest.TestCase):
+            def test_walk(self):
+                for _ in range(200):
+                    soup.a.find_parents("div")
+                    soup.a.find_parent(re.compile("^p"))
+
+        with tempfile.TemporaryDirectory() as d:
+            os.environ["PROFILE_TESTS"] = d
+            try:
+                profile_tests(Probe)
+            finally:
+                del os.environ["PROFILE_TESTS"]
+            calls_before = dict((k, v[0]) for k, v in _calls.items())
+            unittest.TextTestRunner(stream=io.StringIO()).run(Probe("test_walk"))
+            files = sorted(os.listdir(d))
+            self.assertEqual(files, ["Probe.test_walk.collapsed", "Probe.test_walk.pstats", "Probe.test_walk.txt"])
+            stats = pstats.Stats(os.path.join(d, "Probe.test_walk.pstats"))
+            stacks = collapsed_stacks(stats)
+            self.assertAlmostEqual(sum(stacks.values()), stats.total_tt, delta=stats.total_tt * 0.05)
+            self.assertTrue(any("_find_all" in stack for stack in stacks))
+            self.assertIn("search", open(os.path.join(d, "Probe.test_walk.txt")).read())
+            self.assertEqual(_calls[("find_parents", "string")][0] - calls_before.get(("find_parents", "string"), 0), 200)
+            self.assertEqual(_calls[("find_parent", "re")][0] - calls_before.get(("find_parent", "re"), 0), 200)
+        _tests.clear()
+        _profiles.clear()
+
+    def test_given_body_only(self):
+        import tempfile
+        from hypothesis import given, settings
+        from hypothesis.strategies import integers
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup("<p><a>Elsie</a><a>Lacie</a></p>", "html.parser")
+
+        class Probe(unittest.TestCase):
+            @settings(max_examples=20, database=None)
+            @given(integers(min_value=1, max_value=3))
+            def test_siblings(self, limit):
+                soup.a.find_next_siblings("a", limit=limit)
+
+        with tempfile.TemporaryDirectory() as d:
+            os.environ["PROFILE_TESTS"] = d
+            try:
+                profile_tests(Probe)
+            finally:
+                del os.environ["PROFILE_TESTS"]
+            result = unittest.TextTestRunner(stream=io.StringIO()).run(Probe("test_siblings"))
+            self.assertTrue(result.wasSuccessful())
+            stacks = collapsed_stacks(pstats.Stats(os.path.join(d, "Probe.test_siblings.pstats")))
+            self.assertTrue(all(stack.startswith("test_siblings") for stack in stacks))
+            self.assertFalse(any("hypothesis" in stack for stack in stacks))
+            self.assertTrue(any("find_next_siblings" in stack for stack in stacks))
+        _tests.clear()
+        _profiles.clear()
+
+    def test_disabled(self):
+        class Probe(unittest.TestCase):
+            def test_nothing(self):
+                pass
+        fn = Probe.__dict__["test_nothing"]
+        if profile_dir() is None:
+            self.assertIs(profile_tests(Probe).__dict__["test_nothing"], fn)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,230 @@
+""" Performance regression gate for the blackbox scenarios of the three testcase modules.
+
+    Every input_and_r_N case is one gate scenario (e.g. "find_parents#3"): one sample is a pass
+    over all its combinations (Scenarios.scenarios()), timed best-of-`number`, and each scenario
+    is sampled `samples` times. Each sample is divided by a fixed pure-Python calibration loop timed
+    in the same round, so a baseline recorded on one machine is comparable on another and slow
+    drift of the machine's speed during a run cancels out.
+
+    --save writes the mean and 95% confidence interval of every scenario into a JSON baseline
+    (FORMAT_VERSION, plus the Python / bs4 versions it was recorded with). A later run compares
+    against it and fails when, for any scenario, the lower end of the new interval is more than
+    --threshold above the upper end of the baseline interval, i.e. when the slowdown exceeds the
+    threshold even with the noise of both runs counted in its favour.
+
+    Usage: python RegressionGate.py --save                   (record perf_baseline.json)
+           python RegressionGate.py --threshold 0.15         (compare, exit status 1 on regression)
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+import unittest
+import bs4
+
+from BenchFindParents import best_of
+from Scenarios import METHODS, fixture, scenarios
+
+
+FORMAT_VERSION = 1
+DEFAULT_BASELINE = "perf_baseline.json"
+
+# two-sided 95% Student t quantiles by degrees of freedom; 1.96 beyond the table
+T_95 = [None, 12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+
+def confidence_interval(values):
+    """ (mean, low, high) of the 95% confidence interval of the mean of values. """
+    mean = statistics.fmean(values)
+    if len(values) < 2:
+        return mean, mean, mean
+    df = len(values) - 1
+    t = T_95[df] if df < len(T_95) else 1.96
+    half = t * statistics.stdev(values) / math.sqrt(len(values))
+    return mean, mean - half, mean + half
+
+
+def calibrate(repeat=5):
+    """ ns of a fixed pure-Python workload (dict, str and list operations, like a tree walk). """
+    def work():
+        d = {}
+        for i in range(20000):
+            key = "k%d" % (i % 500)
+            d[key] = d.get(key, 0) + 1
+        return sorted(d.items())
+    ns, _ = best_of(work, repeat)
+    return ns
+
+
+def gate_scenarios(methods=METHODS):
+    """ {"method#case": [Scenario, ...]} in a fixed order. """
+    groups = {}
+    for s in scenarios(methods):
+        groups.setdefault("%s#%d" % (s.method, s.case), []).append(s)
+    return groups
+
+
+def sample(groups, samples, number):
+    """ Return ({key: [normalised time per pass, ...]}, [calibration ns per round]).
+        Each round times every scenario once, interleaved so drift hits all of them alike, and
+        divides by the calibration loop timed in the same round. """
+    prepared = {}
+    for key, group in groups.items():
+        soup = fixture(group[0].method)
+        prepared[key] = [(s, s.start_element(soup)) for s in group]
+    timings = {key: [] for key in groups}
+    calibrations = []
+    for _ in range(samples):
+        calibration_ns = calibrate(number)
+        calibrations.append(calibration_ns)
+        for key, calls in prepared.items():
+            def one_pass():
+                for s, element in calls:
+                    s.call(element)
+            ns, _ = best_of(one_pass, number)
+            timings[key].append(ns / calibration_ns)
+    return timings, calibrations
+
+
+def measure(methods=METHODS, samples=10, number=3):
+    """ Normalised timings of every gate scenario, as stored in a baseline. """
+    timings, calibrations = sample(gate_scenarios(methods), samples, number)
+    result = {}
+    for key, values in timings.items():
+        mean, low, high = confidence_interval(values)
+        result[key] = {"mean": mean, "low": low, "high": high, "samples": values}
+    return {
+        "format": FORMAT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "bs4": bs4.__version__,
+        "machine": platform.machine(),
+        "calibration_ns": statistics.median(calibrations),
+        "scenarios": result,
+    }
+
+
+def save(run, path):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(run, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def load(path):
+    with open(path) as f:
+        run = json.load(f)
+    if run.get("format") != FORMAT_VERSION:
+        raise ValueError("%s has baseline format %r, expected %d; record a new one with --save"
+                         % (path, run.get("format"), FORMAT_VERSION))
+    return run
+
+
+def compare(baseline, current, threshold):
+    """ Yield (key, baseline entry, current entry, change, status); status is "ok", "faster",
+        "REGRESSED", "new" or "missing". change is the relative change of the means. """
+    base, cur = baseline["scenarios"], current["scenarios"]
+    for key in sorted(set(base) | set(cur)):
+        if key not in base:
+            yield key, None, cur[key], None, "new"
+            continue
+        if key not in cur:
+            yield key, base[key], None, None, "missing"
+            continue
+        b, c = base[key], cur[key]
+        change = c["mean"] / b["mean"] - 1
+        if c["low"] > b["high"] * (1 + threshold):
+            status = "REGRESSED"
+        elif c["high"] * (1 + threshold) < b["low"]:
+            status = "faster"
+        else:
+            status = "ok"
+        yield key, b, c, change, status
+
+
+def report(baseline, current, rows):
+    print("baseline: %s, Python %s, bs4 %s" % (baseline["created"], baseline["python"], baseline["bs4"]))
+    print("current:  %s, Python %s, bs4 %s" % (current["created"], current["python"], current["bs4"]))
+    header = "%-24s %19s %19s %8s  %s" % ("scenario", "baseline [95% CI]", "current [95% CI]", "change", "status")
+    print(header)
+    print("-" * len(header))
+
+    def interval(e):
+        return "-" if e is None else "%5.2f [%5.2f,%5.2f]" % (e["mean"], e["low"], e["high"])
+    for key, b, c, change, status in rows:
+        print("%-24s %19s %19s %8s  %s" % (key, interval(b), interval(c),
+                                           "-" if change is None else "%+7.1f%%" % (100 * change), status))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="record the baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=0.10, help="tolerated slowdown, 0.10 = 10%%")
+    parser.add_argument("--samples", type=int, default=10, help="samples per scenario")
+    parser.add_argument("--number", type=int, default=3, help="passes per sample, the fastest is kept")
+    parser.add_argument("--methods", nargs="+", choices=METHODS, default=METHODS)
+    args = parser.parse_args(argv)
+
+    current = measure(args.methods, args.samples, args.number)
+    if args.save:
+        save(current, args.baseline)
+        print("saved %d scenarios to %s" % (len(current["scenarios"]), args.baseline))
+        return 0
+    baseline = load(args.baseline)
+    rows = list(compare(baseline, current, args.threshold))
+    report(baseline, current, rows)
+    regressed = [key for key, _, _, _, status in rows if status == "REGRESSED"]
+    if regressed:
+        print("%d scenario(s) regressed by more than %.0f%%: %s" % (len(regressed), 100 * args.threshold, ", ".join(regressed)))
+        return 1
+    return 0
+
+
+class TestRegressionGate(unittest.TestCase):
+    """ Interval arithmetic, the comparison rule and the baseline file format. """
+
+    @staticmethod
+    def entry(values):
+        mean, low, high = confidence_interval(values)
+        return {"mean": mean, "low": low, "high": high, "samples": values}
+
+    def run_of(self, **scenarios):
+        return {"format": FORMAT_VERSION, "created": "", "python": "", "bs4": "", "calibration_ns": 1,
+                "scenarios": {k: self.entry(v) for k, v in scenarios.items()}}
+
+    def test_confidence_interval(self):
+        mean, low, high = confidence_interval([1.0, 2.0, 3.0])
+        self.assertEqual(mean, 2.0)
+        self.assertAlmostEqual(high - mean, 4.303 / math.sqrt(3))
+        self.assertEqual(confidence_interval([5.0]), (5.0, 5.0, 5.0))
+
+    def test_compare(self):
+        baseline = self.run_of(a=[1.0, 1.01, 0.99], b=[1.0, 1.01, 0.99], c=[1.0, 1.5, 0.5], gone=[1.0])
+        current = self.run_of(a=[1.3, 1.31, 1.29], b=[1.05, 1.06, 1.04], c=[1.4, 2.0, 0.9], new=[1.0])
+        status = {key: s for key, _, _, _, s in compare(baseline, current, 0.10)}
+        self.assertEqual(status, {"a": "REGRESSED", "b": "ok", "c": "ok", "gone": "missing", "new": "new"})
+        status = {key: s for key, _, _, _, s in compare(current, baseline, 0.10)}
+        self.assertEqual(status["a"], "faster")
+
+    def test_save_load(self):
+        import tempfile
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "baseline.json")
+            run = measure(["find_parent"], samples=2, number=1)
+            save(run, path)
+            self.assertEqual(load(path), run)
+            self.assertEqual(sorted(run["scenarios"]), ["find_parent#%d" % i for i in range(1, 8)])
+            run["format"] = FORMAT_VERSION + 1
+            save(run, path)
+            self.assertRaises(ValueError, load, path)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
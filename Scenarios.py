@@ -0,0 +1,132 @@
+""" The blackbox combinations of the three testcase modules as runnable scenarios.
+
+    A Scenario is one point of FilterSpaces.*_SPACES for one input_and_r_N: the method under
+    test, its filters, the start element and the expected result from expected_N(). It calls
+    the method exactly like the matching test_black_N does, on any soup shaped like the fixture.
+"""
+from bs4.element import SoupStrainer
+
+import FindNextSiblings
+import FindParent
+import FindParents
+from FilterSpaces import NEXT_SIBLINGS_SPACES, PARENTS_SPACES, PARENT_SPACES, filter_kind, iter_space
+
+
+METHODS = ["find_next_siblings", "find_parents", "find_parent"]
+
+TEST_CLASSES = {
+    "find_next_siblings": FindNextSiblings.TestFindNextSiblings,
+    "find_parents": FindParents.TestFindParents,
+    "find_parent": FindParent.TestFindParent,
+}
+
+MODULES = {
+    "find_next_siblings": FindNextSiblings,
+    "find_parents": FindParents,
+    "find_parent": FindParent,
+}
+
+
+def fixture(method):
+    """ The (cached, shared) fixture soup of the testcase class of method. """
+    cls = TEST_CLASSES[method]
+    cls.setUpClass()
+    return cls.test_html_page_element
+
+
+class Scenario(object):
+
+    def __init__(self, method, case, name, attrs, limit=None, text=None, text_kwarg="text", start=None):
+        self.method = method
+        self.case = case
+        self.name = name
+        self.attrs = attrs
+        self.limit = limit
+        self.text = text
+        self.text_kwarg = text_kwarg
+        self.start = start
+
+    def __repr__(self):
+        parts = ["%s#%d" % (self.method, self.case)]
+        if self.start is not None:
+            parts.append("start=%r" % self.start)
+        parts.append("name=%r" % (self.name,))
+        parts.append("attrs=%r" % (self.attrs,))
+        if self.method == "find_next_siblings":
+            parts.append("%s=%r" % (self.text_kwarg, self.text))
+        if self.limit is not None:
+            parts.append("limit=%r" % self.limit)
+        return "Scenario(%s)" % ", ".join(parts)
+
+    @property
+    def name_kind(self):
+        return filter_kind(self.name)
+
+    @property
+    def text_kind(self):
+        return filter_kind(self.text) if self.text is not None else "-"
+
+    def start_element(self, soup):
+        """ The element test_black_N starts from. """
+        if self.method == "find_next_siblings":
+            return soup.a # get first tag <a>
+        return soup.find(string=self.start)
+
+    def strainer(self):
+        """ A SoupStrainer equivalent to the scenario's filters. """
+        return SoupStrainer(self.name, self.attrs, string=self.text)
+
+    def call(self, element, strainer=None):
+        """ Run the method from element, with raw filters or with a prebuilt strainer.
+            find_parent's result is returned as a list of zero or one element. """
+        if self.method == "find_next_siblings":
+            if strainer is not None:
+                return element.find_next_siblings(strainer, limit=self.limit)
+            return element.find_next_siblings(name=self.name, attrs=self.attrs, limit=self.limit,
+                                              **{self.text_kwarg: self.text})
+        if self.method == "find_parents":
+            if strainer is not None:
+                return element.find_parents(strainer, limit=self.limit)
+            return element.find_parents(name=self.name, attrs=self.attrs, limit=self.limit)
+        if strainer is not None:
+            r = element.find_parent(strainer)
+        else:
+            r = element.find_parent(name=self.name, attrs=self.attrs)
+        return [] if r is None else [r]
+
+    def run(self, soup, strainer=None):
+        return self.call(self.start_element(soup), strainer)
+
+    def expected(self):
+        """ r_exp of the testcase: a result count, or find_parent's expected class. """
+        expected = getattr(MODULES[self.method], "expected_%d" % self.case)
+        if self.method == "find_next_siblings":
+            return expected(self.name, self.attrs, self.text, self.limit)
+        if self.method == "find_parents":
+            return expected(self.start, self.name, self.attrs, self.limit)
+        return expected(self.start, self.name, self.attrs)
+
+    def check(self, r):
+        """ Whether a result of call() is what test_black_N expects. """
+        if self.method == "find_parent":
+            r_c = r[0]['class'][0] if r else None
+            return r_c == self.expected()
+        return len(r) == self.expected()
+
+
+def scenarios(methods=METHODS):
+    """ Every blackbox combination of the given methods, in a fixed order. """
+    out = []
+    if "find_next_siblings" in methods:
+        for case, space in NEXT_SIBLINGS_SPACES.items():
+            for name, attrs, text, limit in iter_space(space, ["name", "attrs", "text", "limit"]):
+                out.append(Scenario("find_next_siblings", case, name, attrs, limit, text, space["text_kwarg"]))
+    if "find_parents" in methods:
+        for case, space in PARENTS_SPACES.items():
+            for start, name, attrs, limit in iter_space(space, ["start", "name", "attrs", "limit"]):
+                out.append(Scenario("find_parents", case, name, attrs, limit, start=start))
+    if "find_parent" in methods:
+        for case, space in PARENT_SPACES.items():
+            for start, name, attrs in iter_space(space, ["start", "name", "attrs"]):
+                out.append(Scenario("find_parent", case, name, attrs, start=start))
+    return out
@@ -0,0 +1,167 @@
+""" Shared Hypothesis strategies for the input_and_r_N composites of the three testcase modules.
+
+    The composites used to build their one_of(...) trees, compile their regex filters and wrap
+    permutations(...).map(lambda ...) inline on every draw. The strategies below are built once,
+    at import, from precompiled patterns; the composites only draw from them. The value sets
+    and the one_of(string, re, list, True) structure are the ones the composites had, so the
+    distribution of examples is unchanged.
+
+    python Strategies.py measures examples generated per second for every input_and_r_N;
+    python Strategies.py --inline measures the same composites with every shared strategy rebuilt
+    on each draw, as they were before this module, for the before / after comparison.
+"""
+import argparse
+import contextlib
+import functools
+import operator
+import re
+import sys
+import time
+from hypothesis import Phase, given, settings
+from hypothesis.strategies import composite, dictionaries, integers, one_of, permutations, sampled_from
+
+from FilterSpaces import START_TAG_NAMES
+
+
+@functools.lru_cache(maxsize=None)
+def pattern(value):
+    """ The precompiled "^value" regex filter. """
+    return re.compile("^" + value)
+
+
+def build_filters(values, true=True, num_attr=1, compile=pattern):
+    """ one_of(string, re, list of num_attr, True) filter strategy over the given tag names / strings. """
+    kinds = [sampled_from(values),                                                  # string filter
+             sampled_from([compile(v) for v in values]),                            # re filter
+             permutations(values).map(operator.itemgetter(slice(None, num_attr))),  # list of filter
+             ]
+    if true:
+        kinds.append(sampled_from([True]))                                          # boolean True
+    return one_of(kinds)
+
+
+def build_class_attrs(value):
+    """ Non-empty attrs dict filter {"class": value}. """
+    return dictionaries(keys=sampled_from(["class"]), values=sampled_from([value]), min_size=1)
+
+
+filters = functools.lru_cache(maxsize=None)(build_filters)
+class_attrs = functools.lru_cache(maxsize=None)(build_class_attrs)
+
+
+START_TAGS = sampled_from(START_TAG_NAMES)
+NUM_ATTRS = sampled_from([1, 2])
+EMPTY_FILTERS = sampled_from(["", []])
+LIMITS_5 = integers(min_value=1, max_value=5)       # seems that behavior is not deterministic if limit<=0
+LIMITS_10 = integers(min_value=1, max_value=10)
+
+# TestFindNextSiblings
+SIBLING_NAMES = filters(("a", "p"))
+SIBLING_NAMES_NOT_EXIST = filters(("a_not_exist", "p_not_exist"), true=False)
+LACIE_TEXTS = filters(("Lacie",))
+LACIE_TEXTS_NOT_EXIST = filters(("Lacie_not_exist",), true=False)
+SISTER_ATTRS = class_attrs("sister")
+SISTER_ATTRS_NOT_EXIST = class_attrs("sister_not_exist")
+
+# TestFindParents and TestFindParent; "class_not_exits" is the value the testcases always used
+WRAPPER_DIV_ATTRS = class_attrs("wrapper_div")
+WRAPPER_DIV_2_ATTRS = class_attrs("wrapper_div_2")
+CLASS_ATTRS_NOT_EXIST = class_attrs("class_not_exits")
+
+
+def parent_names(num_attr=1):
+    """ Filters on "p" / "div", lists of num_attr of them. """
+    return filters(("p", "div"), num_attr=num_attr)
+
+
+def parent_names_not_exist(num_attr=1):
+    return filters(("p_not_exist", "div_not_exist"), true=False, num_attr=num_attr)
+
+
+@composite
+def _rebuilt(draw, build):
+    return draw(build())
+
+
+def _inline_pattern(value):
+    return re.compile("^" + value)
+
+
+# how the composites built each strategy on every draw before they shared the ones above
+INLINE = {
+    "START_TAGS": lambda: sampled_from(START_TAG_NAMES),
+    "NUM_ATTRS": lambda: sampled_from([1, 2]),
+    "EMPTY_FILTERS": lambda: sampled_from(["", []]),
+    "LIMITS_5": lambda: integers(min_value=1, max_value=5),
+    "LIMITS_10": lambda: integers(min_value=1, max_value=10),
+    "SIBLING_NAMES": lambda: build_filters(("a", "p"), compile=_inline_pattern),
+    "SIBLING_NAMES_NOT_EXIST": lambda: build_filters(("a_not_exist", "p_not_exist"), False, compile=_inline_pattern),
+    "LACIE_TEXTS": lambda: build_filters(("Lacie",), compile=_inline_pattern),
+    "LACIE_TEXTS_NOT_EXIST": lambda: build_filters(("Lacie_not_exist",), False, compile=_inline_pattern),
+    "SISTER_ATTRS": lambda: build_class_attrs("sister"),
+    "SISTER_ATTRS_NOT_EXIST": lambda: build_class_attrs("sister_not_exist"),
+    "WRAPPER_DIV_ATTRS": lambda: build_class_attrs("wrapper_div"),
+    "WRAPPER_DIV_2_ATTRS": lambda: build_class_attrs("wrapper_div_2"),
+    "CLASS_ATTRS_NOT_EXIST": lambda: build_class_attrs("class_not_exits"),
+}
+
+
+@contextlib.contextmanager
+def inline_strategies(modules):
+    """ Within the block, the composites of modules rebuild every strategy they draw from on each draw. """
+    saved = []
+    for module in modules:
+        for name, build in INLINE.items():
+            if hasattr(module, name):
+                saved.append((module, name, getattr(module, name)))
+                setattr(module, name, _rebuilt(build))
+        for name, values, true in [("parent_names", ("p", "div"), True),
+                                   ("parent_names_not_exist", ("p_not_exist", "div_not_exist"), False)]:
+            if hasattr(module, name):
+                saved.append((module, name, getattr(module, name)))
+                setattr(module, name, lambda num_attr=1, values=values, true=true:
+                        build_filters(values, true, num_attr, compile=_inline_pattern))
+    try:
+        yield
+    finally:
+        for module, name, value in saved:
+            setattr(module, name, value)
+
+
+def examples_per_second(strategy, max_examples):
+    """ (examples generated, examples per second) for strategy, generation phase only. """
+    count = [0]
+
+    @settings(max_examples=max_examples, database=None, deadline=None, derandomize=True, phases=[Phase.generate])
+    @given(strategy)
+    def run(example):
+        count[0] += 1
+    t0 = time.perf_counter()
+    run()
+    return count[0], count[0] / (time.perf_counter() - t0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Examples per second of every input_and_r_N strategy")
+    parser.add_argument("--max-examples", type=int, default=500)
+    parser.add_argument("--inline", action="store_true", help="rebuild every strategy on each draw (the old composites)")
+    args = parser.parse_args(argv)
+
+    from Scenarios import TEST_CLASSES
+    modules = [sys.modules[cls.__module__] for cls in TEST_CLASSES.values()]
+    header = "%-22s %4s %9s %12s" % ("class", "case", "examples", "examples/s")
+    print(header)
+    print("-" * len(header))
+    total, seconds = 0, 0.0
+    for cls in TEST_CLASSES.values():
+        for case in range(1, 8):
+            with inline_strategies(modules) if args.inline else contextlib.nullcontext():
+                n, rate = examples_per_second(getattr(cls, "input_and_r_%d" % case)(), args.max_examples)
+            total += n
+            seconds += n / rate
+            print("%-22s %4d %9d %12.0f" % (cls.__name__, case, n, rate))
+    print("all: %d examples, %.0f examples/s" % (total, total / seconds))
+
+
+if __name__ == '__main__':
+    main()